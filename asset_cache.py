@@ -0,0 +1,163 @@
+"""On-disk, content-addressed cache for the datapack asset tree.
+
+Bodies are stored once per SHA-256 under objects/, and manifest.json maps each
+URL to its digest plus the validators (ETag / Last-Modified) needed to
+revalidate it with a conditional request. The cache has a size cap enforced by
+least-recently-used eviction, and an offline mode that never touches the
+network.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Mapping, Optional
+
+DEFAULT_CACHE_DIR = os.getenv('DRAAFT_ASSET_CACHE_DIR', '.asset_cache')
+DEFAULT_MAX_BYTES = int(os.getenv('DRAAFT_ASSET_CACHE_MAX_MB', '64')) * 1024 * 1024
+# How long a cached index is trusted without revalidating it at all
+DEFAULT_INDEX_MAX_AGE = int(os.getenv('DRAAFT_ASSET_INDEX_MAX_AGE', '300'))
+DEFAULT_OFFLINE = os.getenv('DRAAFT_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+_default_cache = None
+
+
+class AssetCacheMiss(Exception):
+    """Raised when offline mode needs a file that is not cached."""
+
+
+class AssetCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 offline: bool = DEFAULT_OFFLINE, index_max_age: float = DEFAULT_INDEX_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.index_max_age = index_max_age
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.entries: Dict[str, Dict[str, Any]] = self._load_manifest()
+        self._dirty = False
+
+    # --- Manifest ---
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Drop entries whose object went missing from disk
+        return {url: entry for url, entry in entries.items()
+                if os.path.exists(self._object_path(entry['sha256']))}
+
+    def save(self):
+        """Write the manifest if it changed, replacing it atomically."""
+        if not self._dirty:
+            return
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    # --- Lookups ---
+
+    def has(self, url: str) -> bool:
+        return url in self.entries
+
+    def digest(self, url: str) -> Optional[str]:
+        entry = self.entries.get(url)
+        return entry['sha256'] if entry else None
+
+    def is_fresh(self, url: str, max_age: float) -> bool:
+        """Whether the entry was validated recently enough to skip revalidation."""
+        entry = self.entries.get(url)
+        return entry is not None and time.time() - entry['validated_at'] < max_age
+
+    def read(self, url: str) -> bytes:
+        """Return a cached body and mark it as recently used."""
+        entry = self.entries.get(url)
+        if entry is None:
+            raise AssetCacheMiss(f"{url} is not in the asset cache")
+        with open(self._object_path(entry['sha256']), 'rb') as f:
+            data = f.read()
+        entry['last_access'] = time.time()
+        self._dirty = True
+        return data
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified."""
+        entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    # --- Updates ---
+
+    def mark_validated(self, url: str):
+        """Record that the server confirmed the cached copy is current (304)."""
+        entry = self.entries[url]
+        entry['validated_at'] = entry['last_access'] = time.time()
+        self._dirty = True
+
+    def store(self, url: str, data: bytes, headers: Optional[Mapping[str, str]] = None):
+        """Store a freshly downloaded body and its validators."""
+        headers = headers or {}
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        self.entries[url] = {
+            'sha256': digest,
+            'size': len(data),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'validated_at': now,
+            'last_access': now,
+        }
+        self._dirty = True
+        self._evict()
+
+    def total_bytes(self) -> int:
+        """Size of the stored objects; identical bodies are only counted once."""
+        return sum({entry['sha256']: entry['size'] for entry in self.entries.values()}.values())
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its size cap."""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for url, entry in sorted(self.entries.items(), key=lambda kv: kv[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            del self.entries[url]
+            digest = entry['sha256']
+            # Objects are shared between URLs with identical content
+            if not any(other['sha256'] == digest for other in self.entries.values()):
+                try:
+                    os.remove(self._object_path(digest))
+                except OSError:
+                    pass
+                total -= entry['size']
+        self._dirty = True
+
+
+def get_default_asset_cache() -> AssetCache:
+    """The process-wide cache configured from the DRAAFT_ASSET_* environment variables."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AssetCache()
+    return _default_cache
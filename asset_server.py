@@ -0,0 +1,139 @@
+"""Offline stand-ins for the upstream asset server, for tests and benchmarks.
+
+The asset tree is recorded into a fixture directory (index.txt plus every file
+it lists) with record_fixture(), and replayed either by serve_assets(), a
+local aiohttp server, or by FixtureFetcher, which plugs straight into
+DatapackGenerator without HTTP. Both add tunable latency and can inject
+failures to exercise the retry path.
+"""
+import asyncio
+import hashlib
+import os
+import random
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Collection, Dict, List, Mapping, Tuple, Union
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'draaft_assets')
+ASSET_PREFIX = "/assets/draaft/"
+
+AssetFiles = Mapping[str, Union[str, bytes]]
+
+
+def load_fixture(path: str = FIXTURE_DIR) -> Dict[str, bytes]:
+    """Read a recorded asset tree: index path -> contents, in index order."""
+    with open(os.path.join(path, 'index.txt'), 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    files = {}
+    for line in lines:
+        with open(os.path.join(path, *line.split('/')), 'rb') as f:
+            files[line] = f.read()
+    return files
+
+
+async def record_fixture(base_url: str, path: str = FIXTURE_DIR) -> int:
+    """Download the live asset tree into a fixture directory. Returns the file count."""
+    import aiohttp
+
+    base = base_url.rstrip('/') + ASSET_PREFIX
+    async with aiohttp.ClientSession(raise_for_status=True) as session:
+        async with session.get(base + "index.txt") as response:
+            index = await response.text()
+        lines = [line for line in index.split('\n') if line.strip()]
+        for line in lines:
+            async with session.get(base + line) as response:
+                content = await response.read()
+            destination = os.path.join(path, *line.split('/'))
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            with open(destination, 'wb') as f:
+                f.write(content)
+    with open(os.path.join(path, 'index.txt'), 'w', encoding='utf-8') as f:
+        f.write(index)
+    return len(lines)
+
+
+class AssetServer:
+    """Serves a set of files as the upstream asset tree.
+
+    latency is added to every request. Paths in fail_first answer 503 to
+    their first request, and any request fails with probability failure_rate
+    (seeded, so runs are repeatable). Every request is logged as
+    (path, status).
+    """
+
+    def __init__(self, files: AssetFiles, latency: float = 0.0, fail_first: Collection[str] = (),
+                 failure_rate: float = 0.0, seed: int = 0):
+        self.files = dict(files)
+        self.latency = latency
+        self.fail_first = fail_first
+        self.failure_rate = failure_rate
+        self.url = None
+        self.requests: List[Tuple[str, int]] = []
+        self._failed = set()
+        self._random = random.Random(seed)
+
+    def body(self, path: str) -> bytes:
+        if path == "index.txt" and path not in self.files:
+            return ("\n".join(self.files) + "\n").encode('utf-8')
+        content = self.files[path]
+        return content if isinstance(content, bytes) else content.encode('utf-8')
+
+    async def respond(self, path: str, headers: Mapping[str, str]) -> Tuple[int, bytes, Dict[str, str]]:
+        """Answer one GET for path, like the upstream server would."""
+        await asyncio.sleep(self.latency)
+        status, body, response_headers = self._respond(path, headers)
+        self.requests.append((path, status))
+        return status, body, response_headers
+
+    def _respond(self, path: str, headers: Mapping[str, str]) -> Tuple[int, bytes, Dict[str, str]]:
+        if path in self.fail_first and path not in self._failed:
+            self._failed.add(path)
+            return 503, b'', {}
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            return 503, b'', {}
+        if path != "index.txt" and path not in self.files:
+            return 404, b'', {}
+        body = self.body(path)
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        if headers.get('If-None-Match') == etag:
+            return 304, b'', {'ETag': etag}
+        return 200, body, {'ETag': etag}
+
+
+@asynccontextmanager
+async def serve_assets(files: AssetFiles, latency: float = 0.0, fail_first: Collection[str] = (),
+                       failure_rate: float = 0.0, seed: int = 0) -> AsyncIterator[AssetServer]:
+    """Serve files under /assets/draaft/ on localhost; server.url is the base_url to use."""
+    from aiohttp import web
+
+    server = AssetServer(files, latency, fail_first, failure_rate, seed)
+
+    async def handler(request):
+        status, body, headers = await server.respond(request.match_info['path'], request.headers)
+        return web.Response(status=status, body=body or None, headers=headers)
+
+    app = web.Application()
+    app.router.add_get(ASSET_PREFIX + '{path:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    server.url = f"http://127.0.0.1:{port}"
+    try:
+        yield server
+    finally:
+        await runner.cleanup()
+
+
+class FixtureFetcher(AssetServer):
+    """An AssetServer called directly as a DatapackGenerator fetcher, without HTTP."""
+
+    def __init__(self, files: AssetFiles, base_url: str = "http://fixture", **kwargs):
+        super().__init__(files, **kwargs)
+        self.url = base_url
+
+    async def __call__(self, url: str, headers: Dict[str, str]) -> Tuple[int, bytes, Mapping[str, str]]:
+        prefix = self.url + ASSET_PREFIX
+        if not url.startswith(prefix):
+            return 404, b'', {}
+        return await self.respond(url[len(prefix):], headers)
@@ -0,0 +1,213 @@
+"""Pre-compressed ZIP entries for the part of a datapack no draft changes.
+
+Most files in the asset index are copied into every datapack untouched. They
+are compressed once per upstream index version into a BasePack, whose
+compressed bytes live in a temporary file, and copied byte-for-byte into each
+draft's archive; only on_load.mcfunction, files targeted by an item's
+file_query and generated draaftpack/ files are produced per draft.
+
+Entries carry a fixed timestamp and permissions, so the same inputs and
+compression settings always give a byte-identical archive.
+"""
+import copy
+import hashlib
+import tempfile
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from datapack_ops import ON_LOAD_FILENAME, GENERATED_PREFIX
+
+# Base packs kept around, one per (base_url, index version, compression, normalize)
+BASE_PACK_CACHE_SIZE = 4
+COPY_CHUNK_SIZE = 64 * 1024
+# Earliest timestamp a ZIP can hold; used for every entry
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# Unix, so the archive doesn't depend on the platform that built it
+CREATE_SYSTEM_UNIX = 3
+
+_base_packs: 'OrderedDict[Tuple[Hashable, ...], BasePack]' = OrderedDict()
+
+
+class CompressionSettings(NamedTuple):
+    """How entries are compressed.
+
+    method is zipfile.ZIP_DEFLATED or zipfile.ZIP_STORED; level is the deflate
+    level (None for zlib's default); files smaller than store_below bytes are
+    stored, since deflate rarely pays off on tiny files.
+    """
+    method: int = zipfile.ZIP_DEFLATED
+    level: Optional[int] = None
+    store_below: int = 0
+
+    def method_for(self, size: int) -> int:
+        if size < self.store_below:
+            return zipfile.ZIP_STORED
+        return self.method
+
+
+DEFAULT_COMPRESSION = CompressionSettings()
+
+
+class PrecompressedEntry:
+    """A ZIP member whose compressed bytes, CRC and sizes are already known."""
+
+    def __init__(self, zinfo: zipfile.ZipInfo, data: bytes, source_digest: str):
+        self.zinfo = zinfo
+        self.data = data
+        # SHA-256 of the uncompressed content, to tell when upstream changed
+        self.source_digest = source_digest
+
+    @property
+    def name(self) -> str:
+        return self.zinfo.filename
+
+    def chunks(self) -> Iterator[bytes]:
+        yield self.data
+
+
+def content_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def compress_entry(name: str, content: bytes,
+                   settings: CompressionSettings = DEFAULT_COMPRESSION) -> PrecompressedEntry:
+    """Compress content into an entry that can later be copied into any archive."""
+    zinfo = zipfile.ZipInfo(name, date_time=FIXED_DATE_TIME)
+    zinfo.create_system = CREATE_SYSTEM_UNIX
+    zinfo.external_attr = 0o644 << 16
+    zinfo.compress_type = settings.method_for(len(content))
+    if zinfo.compress_type == zipfile.ZIP_STORED:
+        data = content
+    else:
+        compressor = zlib.compressobj(
+            zlib.Z_DEFAULT_COMPRESSION if settings.level is None else settings.level,
+            zlib.DEFLATED, -15)
+        data = compressor.compress(content) + compressor.flush()
+    zinfo.file_size = len(content)
+    zinfo.compress_size = len(data)
+    zinfo.CRC = zlib.crc32(content)
+    return PrecompressedEntry(zinfo, data, content_digest(content))
+
+
+def write_precompressed(zip_file: zipfile.ZipFile, entry: PrecompressedEntry):
+    """Append an already-compressed entry to an open ZipFile without recompressing it.
+
+    zipfile has no public API for raw copies, so this mirrors what
+    ZipFile.writestr does once compression is finished: local header, data,
+    then bookkeeping for the central directory written on close().
+    """
+    zinfo = copy.copy(entry.zinfo)
+    with zip_file._lock:
+        if zip_file._writing:
+            raise ValueError(
+                "Can't write to ZIP archive while an open writing handle exists.")
+        zip_file._writecheck(zinfo)
+        zip_file._didModify = True
+        zinfo.header_offset = zip_file.fp.tell()
+        zip_file.fp.write(zinfo.FileHeader(False))
+        for chunk in entry.chunks():
+            zip_file.fp.write(chunk)
+        zip_file.start_dir = zip_file.fp.tell()
+        zip_file.filelist.append(zinfo)
+        zip_file.NameToInfo[zinfo.filename] = zinfo
+
+
+def index_version(index_content: str) -> str:
+    """Identify an upstream index by the hash of its contents."""
+    return hashlib.sha256(index_content.encode('utf-8')).hexdigest()
+
+
+def is_overlay_file(filename: str, catalog_queries: Iterable[str]) -> bool:
+    """Whether any draft could change this downloaded file."""
+    return filename == ON_LOAD_FILENAME or any(query in filename for query in catalog_queries)
+
+
+def catalog_file_queries(all_items) -> Tuple[str, ...]:
+    """The file_query of every catalog item that modifies a downloaded file."""
+    return tuple(sorted({item.file_query for item in all_items
+                         if item.file_query and not item.file_query.startswith(GENERATED_PREFIX)}))
+
+
+class StoredEntry(PrecompressedEntry):
+    """A pre-compressed entry whose bytes are read back from its BasePack's file."""
+
+    def __init__(self, pack: 'BasePack', zinfo: zipfile.ZipInfo, offset: int, source_digest: str):
+        super().__init__(zinfo, b'', source_digest)
+        self.pack = pack
+        self.offset = offset
+
+    def chunks(self) -> Iterator[bytes]:
+        position = self.offset
+        remaining = self.zinfo.compress_size
+        while remaining:
+            chunk = self.pack.read_at(position, min(remaining, COPY_CHUNK_SIZE))
+            position += len(chunk)
+            remaining -= len(chunk)
+            yield chunk
+
+
+class BasePack:
+    """The pre-compressed, draft-independent entries of one index version.
+
+    Compressed bytes are appended to an anonymous temporary file so that
+    memory use does not grow with the size of the asset tree.
+    """
+
+    def __init__(self, version: str):
+        self.version = version
+        self.entries: Dict[str, StoredEntry] = {}
+        # Set once every draft-independent file of the index has been added
+        self.complete = False
+        self._file = tempfile.TemporaryFile()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, filename: str) -> Optional[StoredEntry]:
+        return self.entries.get(filename)
+
+    def add(self, entry: PrecompressedEntry) -> StoredEntry:
+        """Store a freshly compressed entry, replacing any older copy of the file."""
+        with self._lock:
+            offset = self._size
+            self._file.seek(offset)
+            self._file.write(entry.data)
+            self._size += len(entry.data)
+        stored = StoredEntry(self, entry.zinfo, offset, entry.source_digest)
+        self.entries[entry.name] = stored
+        return stored
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+
+def get_or_create_base_pack(key: Tuple[Hashable, ...]) -> BasePack:
+    """The base pack for a key, created empty if unknown.
+
+    DatapackGenerator keys base packs by (base_url, index version,
+    compression settings, normalize): entries built with other settings or
+    without normalization hold different bytes. key[1] must be the index
+    version.
+    """
+    base_pack = _base_packs.get(key)
+    if base_pack is not None:
+        _base_packs.move_to_end(key)
+        return base_pack
+
+    base_pack = BasePack(key[1])
+    _base_packs[key] = base_pack
+    while len(_base_packs) > BASE_PACK_CACHE_SIZE:
+        # Entries already handed out keep reading from the file until closed by GC
+        _base_packs.popitem(last=False)
+    return base_pack
+
+
+def clear_base_packs():
+    _base_packs.clear()
@@ -0,0 +1,286 @@
+"""Benchmark suite for database.py.
+
+Seeds an SQLite database at a realistic scale (50k drafts and their players,
+items and picks by default), then times each hot database function and
+reports p50/p99 latency and SQL statements per call. Results can be saved as
+a baseline and later runs compared against it to catch regressions between
+commits. Run with:
+
+    python bench_database.py [--drafts N] [--samples N] [--db PATH]
+                             [--save baseline.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import database
+
+DEFAULT_DB = 'bench_draft_bot.db'
+GUILDS = 20
+CHANNELS_PER_GUILD = 10
+USERS = 5000
+SECONDS_PER_YEAR = 365 * 24 * 3600
+# A p50 this much slower than the baseline counts as a regression; p99 is
+# reported but too noisy to gate on
+REGRESSION_THRESHOLD = 0.25
+# Sampled player counts move queries per op by a fraction of a query; a
+# real regression adds at least one
+QUERY_TOLERANCE = 0.5
+# Transaction control is not counted as a query
+_NOT_QUERIES = ('BEGIN', 'COMMIT', 'ROLLBACK')
+
+
+def draft_shape(num_players: int) -> Tuple[int, int, List[int]]:
+    """Picks per category, picks per player and snake order, as /startdraft sets them up."""
+    picks_per_category = 2 if num_players == 2 else 1
+    picks_per_player = picks_per_category * len(database.CATEGORIES_ORDER)
+    order = []
+    for round_index in range(picks_per_player):
+        players = list(range(num_players))
+        order.extend(players if round_index % 2 == 0 else reversed(players))
+    return picks_per_category, picks_per_player, order
+
+
+def seed_database(db_name: str, num_drafts: int, rng: random.Random):
+    """Fill the database with drafts in every state, inserted in bulk."""
+    database.initialize_database(db_name)
+    conn = sqlite3.connect(db_name)
+    catalog = [(category, item) for category, items in database.INITIAL_ITEMS_BY_CATEGORY.items()
+               for item in items]
+    now = int(time.time())
+    drafts, players, draft_items, picks = [], [], [], []
+
+    def flush():
+        conn.executemany('''
+            INSERT INTO drafts (draft_id, guild_id, channel_id, admin_user_id, status, num_players,
+                                picks_allowed_per_player_per_category, total_picks_allotted_per_player,
+                                current_pick_global_index, total_picks_to_make,
+                                draft_order_player_indices_json, created_at_utc, seed)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', drafts)
+        conn.executemany('''
+            INSERT INTO draft_players (draft_id, user_id, display_name, player_slot_index)
+            VALUES (?, ?, ?, ?)''', players)
+        conn.executemany('''
+            INSERT INTO draft_items (draft_id, category_name, item_name, is_available)
+            VALUES (?, ?, ?, ?)''', draft_items)
+        conn.executemany('''
+            INSERT INTO player_picked_items (draft_id, user_id, category_name, item_name, pick_timestamp)
+            VALUES (?, ?, ?, ?, ?)''', picks)
+        for rows in (drafts, players, draft_items, picks):
+            rows.clear()
+
+    for n in range(num_drafts):
+        draft_id = uuid.UUID(int=rng.getrandbits(128)).hex[:10]
+        guild = rng.randrange(GUILDS)
+        channel = guild * CHANNELS_PER_GUILD + rng.randrange(CHANNELS_PER_GUILD)
+        num_players = rng.randint(2, 4)
+        user_ids = rng.sample(range(1, USERS + 1), num_players)
+        per_category, per_player, order = draft_shape(num_players)
+        created = now - rng.randrange(SECONDS_PER_YEAR)
+
+        roll = rng.random()
+        if roll < 0.85:
+            status, made = 'completed', len(order)
+        elif roll < 0.95:
+            status, made = 'active', rng.randrange(len(order))
+        else:
+            status, made = 'reset', rng.randrange(len(order))
+
+        drafts.append((draft_id, guild, channel, user_ids[0], status, num_players, per_category,
+                       per_player, made, len(order), json.dumps(order), created, str(rng.getrandbits(63))))
+        players.extend((draft_id, user_id, f"user{user_id}", slot) for slot, user_id in enumerate(user_ids))
+
+        picked = rng.sample(catalog, min(made, len(catalog)))
+        picked_set = set(picked)
+        draft_items.extend((draft_id, category, item, 0 if (category, item) in picked_set else 1)
+                           for category, item in catalog)
+        picks.extend((draft_id, user_ids[order[i]], category, item, created + 30 * i)
+                     for i, (category, item) in enumerate(picked))
+
+        if n % 1000 == 999:
+            flush()
+    flush()
+    conn.execute("CREATE TABLE IF NOT EXISTS bench_meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("INSERT OR REPLACE INTO bench_meta VALUES ('drafts', ?)", (str(num_drafts),))
+    conn.commit()
+    conn.close()
+
+
+def seeded_scale(db_name: str) -> Optional[int]:
+    if not os.path.exists(db_name):
+        return None
+    conn = sqlite3.connect(db_name)
+    try:
+        row = conn.execute("SELECT value FROM bench_meta WHERE key = 'drafts'").fetchone()
+        return int(row[0]) if row else None
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, statement: str):
+        if not statement.lstrip().upper().startswith(_NOT_QUERIES):
+            self.count += 1
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(operation: Callable[[], Any], samples: int, counter: QueryCounter) -> Dict[str, float]:
+    timings = []
+    counter.count = 0
+    for _ in range(samples):
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    return {
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'queries_per_op': counter.count / samples,
+    }
+
+
+def run_suite(db_name: str, samples: int, rng: random.Random) -> Dict[str, Dict[str, float]]:
+    conn = sqlite3.connect(db_name)
+    draft_ids = [row[0] for row in conn.execute("SELECT draft_id FROM drafts")]
+    active = conn.execute(
+        "SELECT channel_id FROM drafts WHERE status = 'active'").fetchall()
+    conn.close()
+    channels = [row[0] for row in active] or [0]
+
+    counter = QueryCounter()
+    database.add_query_listener(counter)
+    results = {}
+    try:
+        created: List[Tuple[str, List[int]]] = []
+
+        def create():
+            num_players = rng.randint(2, 4)
+            user_ids = rng.sample(range(1, USERS + 1), num_players)
+            per_category, per_player, order = draft_shape(num_players)
+            draft_id = database.create_draft(
+                db_name, rng.randrange(GUILDS), rng.choice(channels), user_ids[0],
+                [(user_id, f"user{user_id}") for user_id in user_ids],
+                per_category, per_player, order, len(order), None, "0")
+            created.append((draft_id, user_ids))
+
+        results['create_draft'] = measure(create, samples, counter)
+        results['get_draft_state'] = measure(
+            lambda: database.get_draft_state(db_name, rng.choice(draft_ids)), samples, counter)
+
+        # Picks go into the freshly created drafts, each for a still available item
+        catalog = [(category, item) for category, items in database.INITIAL_ITEMS_BY_CATEGORY.items()
+                   for item in items]
+        pending = [(draft_id, user_ids[i % len(user_ids)], category, item)
+                   for draft_id, user_ids in created
+                   for i, (category, item) in enumerate(rng.sample(catalog, len(catalog)))]
+        rng.shuffle(pending)
+        picks = iter(pending)
+        results['record_pick'] = measure(
+            lambda: database.record_pick(db_name, *next(picks)), samples, counter)
+
+        results['get_user_recent_drafts'] = measure(
+            lambda: database.get_user_recent_drafts(db_name, rng.randint(1, USERS)), samples, counter)
+        results['get_active_drafts_in_channel'] = measure(
+            lambda: database.get_active_drafts_in_channel(db_name, rng.choice(channels)), samples, counter)
+        results['get_recent_picks'] = measure(
+            lambda: database.get_recent_picks(db_name, rng.choice(draft_ids)), samples, counter)
+    finally:
+        database.remove_query_listener(counter)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Any]] = None,
+                  threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Print the results table; returns the operations that regressed against baseline."""
+    regressions = []
+    print(f"  {'operation':30} {'p50':>9} {'p99':>9} {'queries':>8}")
+    for name, result in results.items():
+        line = (f"  {name:30} {result['p50_ms']:7.3f}ms {result['p99_ms']:7.3f}ms "
+                f"{result['queries_per_op']:8.1f}")
+        previous = (baseline or {}).get('results', {}).get(name)
+        if previous:
+            changes = [(result[key] - previous[key]) / previous[key] if previous[key] else 0.0
+                       for key in ('p50_ms', 'p99_ms')]
+            line += f"   p50 {changes[0]:+.0%} p99 {changes[1]:+.0%}"
+            if (changes[0] > threshold
+                    or result['queries_per_op'] > previous['queries_per_op'] + QUERY_TOLERANCE):
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--drafts', type=int, default=50000, help="drafts to seed")
+    parser.add_argument('--samples', type=int, default=500, help="calls timed per operation")
+    parser.add_argument('--db', default=DEFAULT_DB, help="seeded database, reused across runs")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--save', metavar='PATH', help="write the results as a baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a saved baseline")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="p50 slowdown counted as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    if seeded_scale(args.db) != args.drafts:
+        if os.path.exists(args.db):
+            os.remove(args.db)
+        start = time.perf_counter()
+        seed_database(args.db, args.drafts, random.Random(args.seed))
+        print(f"Seeded {args.drafts} drafts into {args.db} in {time.perf_counter() - start:.1f}s")
+
+    # Work on a copy so timed writes don't accumulate in the seeded database
+    work_db = args.db + '.run'
+    source, target = sqlite3.connect(args.db), sqlite3.connect(work_db)
+    source.backup(target)
+    source.close()
+    target.close()
+    try:
+        # A generator of its own, so the suite samples the same operations
+        # whether or not this run had to seed the database
+        results = run_suite(work_db, args.samples, random.Random(args.seed))
+    finally:
+        os.remove(work_db)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Compared with baseline from commit {baseline.get('commit')}")
+    regressions = print_results(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'commit': git_commit(), 'drafts': args.drafts, 'samples': args.samples,
+                       'results': results}, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Benchmarks for building datapacks.
+
+dispatch compares the dispatch index in DatapackPlan with the previous
+approach of testing every drafted item against every file. compression
+compares archive size against compression time for CompressionSettings.
+builds runs full builds against the recorded asset fixture, offline, for
+every item on its own, every pool and all items together, and reports build
+time, peak memory and archive size. Run with:
+
+    python bench_datapack.py [dispatch|compression] [--files N] [--rounds N]
+    python bench_datapack.py builds [--latency S] [--failure-rate P] [--fetcher] [--warm]
+"""
+import argparse
+import asyncio
+import io
+import time
+import tracemalloc
+import zipfile
+from typing import Dict, List, Sequence, Tuple
+
+from asset_server import FixtureFetcher, load_fixture, serve_assets
+from base_pack import CompressionSettings, clear_base_packs, compress_entry, write_precompressed
+from datapack_generator import DatapackGenerator
+from datapack_ops import ON_LOAD_FILENAME, _compile_plan, compile_plan, render_ops
+from items import DraftItem, all_items, pools
+
+
+def scan_apply(items: Sequence[DraftItem], content: str, filename: str) -> str:
+    """The per-item substring scan update_file used before the dispatch index."""
+    for item in items:
+        if filename == ON_LOAD_FILENAME:
+            if item.file_query is None:
+                content += render_ops(item.datapack_ops)
+        elif item.file_query is not None and item.file_query in filename:
+            content += render_ops(item.datapack_ops)
+    return content
+
+
+def synthetic_index(num_files: int) -> list:
+    """Filenames shaped like the upstream index, including every queried file."""
+    filenames = [ON_LOAD_FILENAME, "data/draaft/functions/tick.mcfunction"]
+    for i in range(num_files - len(filenames)):
+        filenames.append(f"data/draaft/functions/generated/part_{i:04}.mcfunction")
+    return filenames
+
+
+def run_dispatch(num_files: int, rounds: int):
+    drafted = list(all_items)
+    filenames = synthetic_index(num_files)
+    content = "say base\n"
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for filename in filenames:
+            scan_apply(drafted, content, filename)
+    scan_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        # A generator is built per draft and the dispatch per build; clear
+        # the plan cache so each round compiles and dispatches from scratch
+        _compile_plan.cache_clear()
+        plan = compile_plan(drafted)
+        dispatch = plan.dispatch(filenames)
+        for filename in filenames:
+            plan.apply(content, filename, dispatch)
+    dispatch_seconds = time.perf_counter() - start
+
+    builds = num_files * rounds
+    print(f"{len(drafted)} items x {num_files} files, {rounds} builds")
+    print(f"  per-item scan:  {scan_seconds * 1000:8.1f}ms ({scan_seconds / builds * 1e6:.2f}us/file)")
+    print(f"  dispatch index: {dispatch_seconds * 1000:8.1f}ms ({dispatch_seconds / builds * 1e6:.2f}us/file)")
+    print(f"  speedup: {scan_seconds / dispatch_seconds:.1f}x")
+
+
+COMPRESSION_VARIANTS: Dict[str, CompressionSettings] = {
+    "stored": CompressionSettings(method=zipfile.ZIP_STORED),
+    "deflate-1": CompressionSettings(level=1),
+    "deflate-6": CompressionSettings(level=6),
+    "deflate-9": CompressionSettings(level=9),
+    "deflate-6, store <256B": CompressionSettings(level=6, store_below=256),
+}
+
+
+def synthetic_corpus(num_files: int) -> Dict[str, bytes]:
+    """Mostly small mcfunction and JSON files, like the upstream asset tree."""
+    fragments = [render_ops(item.datapack_ops) for item in all_items]
+    corpus = {}
+    for i in range(num_files):
+        if i % 3 == 0:
+            corpus[f"data/draaft/advancements/a_{i:04}.json"] = (
+                '{"criteria": {"c%d": {"trigger": "minecraft:tick"}}, "rewards": {"function": "draaft:f%d"}}'
+                % (i, i)).encode('utf-8')
+        else:
+            body = "".join(fragments[j % len(fragments)] for j in range(i % 7))
+            corpus[f"data/draaft/functions/f_{i:04}.mcfunction"] = f"# f{i}\n{body}".encode('utf-8')
+    return corpus
+
+
+def run_compression(num_files: int, rounds: int):
+    corpus = synthetic_corpus(num_files)
+    raw_size = sum(len(content) for content in corpus.values())
+    print(f"{num_files} files, {raw_size / 1024:.0f}KiB uncompressed, {rounds} builds")
+    for name, settings in COMPRESSION_VARIANTS.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            entries = [compress_entry(filename, content, settings) for filename, content in corpus.items()]
+        seconds = (time.perf_counter() - start) / rounds
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zip_file:
+            for entry in entries:
+                write_precompressed(zip_file, entry)
+        archive_size = len(buffer.getvalue())
+        print(f"  {name:24} {archive_size / 1024:8.1f}KiB {seconds * 1000:8.2f}ms/build")
+
+
+def item_combinations() -> List[Tuple[str, List[DraftItem]]]:
+    """Every item alone, every pool, then all items."""
+    combinations = []
+    for pool in pools:
+        for item in pool[2]:
+            combinations.append((f"{pool[1]}: {item.pretty_name}", [item]))
+    for pool in pools:
+        combinations.append((f"{pool[1]} (all)", list(pool[2])))
+    combinations.append(("All items", [item for pool in pools for item in pool[2]]))
+    return combinations
+
+
+async def measure_build(generator: DatapackGenerator) -> Tuple[float, int, int]:
+    """Build once; returns (seconds, peak traced bytes, archive bytes)."""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        data = await generator.generate_datapack()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak, len(data)
+
+
+async def run_builds(latency: float, failure_rate: float, use_fetcher: bool, warm: bool):
+    fixture = load_fixture()
+    print(f"{len(fixture)} fixture files, latency {latency * 1000:.0f}ms, "
+          f"failure rate {failure_rate:.0%}, {'fetcher' if use_fetcher else 'local HTTP server'}, "
+          f"{'warm' if warm else 'cold'} base pack")
+    print(f"  {'items':40} {'time':>9} {'peak mem':>10} {'archive':>9}")
+
+    async def build_all(base_url: str, fetcher=None):
+        for name, drafted in item_combinations():
+            if not warm:
+                clear_base_packs()
+            generator = DatapackGenerator("bench", drafted, base_url=base_url, fetcher=fetcher,
+                                          retries=8, retry_backoff=0.01)
+            seconds, peak, size = await measure_build(generator)
+            print(f"  {name:40} {seconds * 1000:7.1f}ms {peak / 1024:8.0f}KiB {size / 1024:7.1f}KiB")
+
+    if use_fetcher:
+        fetcher = FixtureFetcher(fixture, latency=latency, failure_rate=failure_rate)
+        await build_all(fetcher.url, fetcher)
+    else:
+        async with serve_assets(fixture, latency=latency, failure_rate=failure_rate) as server:
+            await build_all(server.url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('benchmark', nargs='?', choices=['dispatch', 'compression', 'builds'])
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to each request")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="chance of a 503 per request")
+    parser.add_argument('--fetcher', action='store_true', help="skip HTTP and plug the fixture in directly")
+    parser.add_argument('--warm', action='store_true', help="reuse the base pack between builds")
+    args = parser.parse_args()
+    if args.benchmark in (None, 'dispatch'):
+        run_dispatch(args.files, args.rounds)
+    if args.benchmark in (None, 'compression'):
+        run_compression(args.files, args.rounds)
+    if args.benchmark in (None, 'builds'):
+        asyncio.run(run_builds(args.latency, args.failure_rate, args.fetcher, args.warm))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,35 @@
 # bot.py
+import asyncio
+from io import BytesIO
+import logging
 import discord
 from discord.ext import commands
 from discord import app_commands
 import typing
 import os
+import re
+import tempfile
 from dotenv import load_dotenv
 import database
+import export
+import logs
+import metrics
+import profiling
+import tracing
 import utils
-from items import get_draft_item, DraftItem, all_items
+from embed_layout import EmbedSpec, Section, layout_pages
+from items import get_draft_item, get_draft_item_by_name, DraftItem, all_items
+from asset_cache import get_default_asset_cache
+from datapack_cache import build_draft_datapacks
+from view_registry import ViewRegistry
+from draft_index import DraftIndex
+from render_cache import RenderCache
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger('bot')
+
 # Get environment variables
 BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
 DATABASE_NAME = os.getenv('DATABASE_NAME', 'draft_bot.db')
@@ -20,6 +38,19 @@ DATABASE_NAME = os.getenv('DATABASE_NAME', 'draft_bot.db')
 MIN_PLAYERS = 2
 MAX_PLAYERS = 4
 VIEW_TIMEOUT_SECONDS = 300
+MAX_TOURNAMENT_DRAFTS = 25
+ITEM_STATS_LIMIT = 15
+OVERVIEW_DRAFTS_PER_PAGE = 6
+# As wide as any "Page n of m" footer, so layout reserves room for it
+OVERVIEW_FOOTER_PLACEHOLDER = "Page 9999 of 9999"
+# Boards a tournament posts at once. discord.py waits out rate limits itself;
+# this keeps the burst small enough that other commands aren't queued behind it.
+TOURNAMENT_POST_CONCURRENCY = 4
+DRAFT_STATUS_EMOJI = {
+    'active': '🟢',
+    'completed': '✅',
+    'reset': '🔄'
+}
 
 # --- Intents ---
 intents = discord.Intents.default()
@@ -27,13 +58,88 @@ intents.messages = True
 intents.guilds = True
 intents.members = True
 
+
+class DraftCommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Runs before every slash command; binds its context to the command's logs."""
+        logs.bind_interaction(interaction)
+        return True
+
+
 # Bot setup
 bot = commands.Bot(command_prefix=commands.when_mentioned_or(
-    "!unusedprefix!"), intents=intents)
+    "!unusedprefix!"), intents=intents, tree_cls=DraftCommandTree)
+metrics.instrument_http(bot.http)
+tracing.instrument_http(bot.http)
+metrics_server = None
+
+# The one live pick or username view of each draft
+live_views = ViewRegistry()
+metrics.registry.add_gauge(
+    'draaft_live_views', "Live draft views by view type.",
+    lambda: [({'view': name}, count) for name, count in live_views.counts().items()])
+metrics.registry.add_gauge(
+    'draaft_live_view_bytes', "Approximate memory held by live draft views.",
+    lambda: [({}, live_views.approximate_bytes())])
+metrics.registry.add_gauge(
+    'draaft_superseded_views', "Views stopped early because a newer one replaced them.",
+    lambda: [({}, live_views.superseded)])
+
+# Active and recent drafts for draft_id autocomplete, loaded in on_ready
+draft_index = DraftIndex()
+metrics.registry.add_gauge(
+    'draaft_indexed_drafts', "Drafts held in the draft_id autocomplete index.",
+    lambda: [({}, len(draft_index))])
+
+# Rendered /channeloverview pages by channel, reused until the drafts change
+overview_cache = RenderCache()
+metrics.registry.add_gauge(
+    'draaft_render_cache', "Channel overview render cache entries, hits and misses.",
+    lambda: [({'stat': name}, value) for name, value in overview_cache.stats().items()])
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected
+background_tasks: set[asyncio.Task] = set()
+
+# Set while /rebuildstats holds the database's write lock; picks are turned
+# away meanwhile rather than failing on "database is locked"
+rebuilding_pick_stats = False
 
 # --- Helper Functions ---
 
 
+def run_in_background(coro) -> asyncio.Task:
+    """Run a coroutine without blocking the caller, keeping the task alive until it ends."""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+async def ensure_owner(interaction: discord.Interaction, action: str) -> bool:
+    """Whether the user is the bot owner; anyone else is told they can't do action."""
+    if await bot.is_owner(interaction.user):
+        return True
+    await interaction.response.send_message(f"❌ Only the bot owner can {action}.", ephemeral=True)
+    return False
+
+
+async def post_draft_datapacks(channel: discord.abc.Messageable, draft_id: str):
+    """Build every player's datapack for a completed draft and post them to the channel."""
+    draft_state = database.get_draft_state(DATABASE_NAME, draft_id)
+    if not draft_state:
+        return
+    try:
+        packs = await build_draft_datapacks(draft_state, asset_cache=get_default_asset_cache())
+    except Exception:
+        logger.exception("Error generating datapacks for draft %s", draft_id)
+        await channel.send(f"⚠️ Could not generate the datapacks for Draft ID: **{draft_id}**.")
+        return
+
+    files = [discord.File(BytesIO(data), filename=filename)
+             for filename, data in packs.values()]
+    await channel.send(content=f"📦 Datapacks for Draft ID: **{draft_id}**", files=files)
+
+
 def generate_global_draft_order(num_players: int, total_picks_allotted_per_player: int) -> list[int]:
     """Generate the global draft order based on number of players and picks."""
     order_indices = []
@@ -44,6 +150,149 @@ def generate_global_draft_order(num_players: int, total_picks_allotted_per_playe
         order_indices.extend(current_round_order)
     return order_indices
 
+
+def draft_rules(num_players: int) -> tuple[int, int, list[int]]:
+    """Picks per category per player, picks per player and the global pick order."""
+    picks_allowed_per_cat = 2 if num_players == 2 else 1
+    num_categories = len(database.INITIAL_ITEMS_BY_CATEGORY)
+    total_picks_allotted_player = picks_allowed_per_cat * num_categories
+    draft_order_indices = generate_global_draft_order(
+        num_players, total_picks_allotted_player)
+    return picks_allowed_per_cat, total_picks_allotted_player, draft_order_indices
+
+
+def format_start_message(starter: discord.abc.User, players_info: list[tuple[int, str]],
+                         picks_allowed_per_cat: int, total_picks_allotted_player: int,
+                         total_picks_overall: int, seed: typing.Optional[str]) -> str:
+    """The message that opens a draft; its Draft ID line is added once the draft exists."""
+    player_names_str = ", ".join([name for _, name in players_info])
+    start_message = (
+        f"🎉 New Draft Started by {starter.mention} with players: {player_names_str}!\n"
+        f"**Rules:** {picks_allowed_per_cat} pick(s) per category per player. Total {total_picks_allotted_player} picks per player.\n"
+        f"Total picks in draft: {total_picks_overall}.\n"
+    )
+
+    if seed:
+        start_message += f"**Seed:** `{seed}`\n\n"
+
+    start_message += "**Recent Picks:**\n"
+    return start_message
+
+
+def format_draft_id_line(draft_id: str) -> str:
+    return f"\n**Draft ID: `{draft_id}`** (Use this ID for other commands like `/draftboard`, `/mydraft`)"
+
+
+_MENTION = re.compile(r"<@!?(\d+)>")
+
+
+def parse_player_groups(text: str) -> list[list[int]]:
+    """User IDs of each group of mentions in text, groups separated by ';' or new lines.
+
+    Raises ValueError, with a message for the user, for a group that is not
+    MIN_PLAYERS to MAX_PLAYERS distinct players, or a player in two groups.
+    """
+    groups = []
+    seen = set()
+    for number, chunk in enumerate((chunk for chunk in re.split(r"[;\n]", text) if chunk.strip()), start=1):
+        user_ids = [int(user_id) for user_id in _MENTION.findall(chunk)]
+        if len(set(user_ids)) != len(user_ids):
+            raise ValueError(f"Group {number} mentions a player more than once.")
+        if not (MIN_PLAYERS <= len(user_ids) <= MAX_PLAYERS):
+            raise ValueError(
+                f"Group {number} has {len(user_ids)} player(s); each group needs {MIN_PLAYERS} to {MAX_PLAYERS}.")
+        repeated = seen.intersection(user_ids)
+        if repeated:
+            raise ValueError(f"<@{repeated.pop()}> is in more than one group.")
+        seen.update(user_ids)
+        groups.append(user_ids)
+    if not groups:
+        raise ValueError("No player groups given. Separate groups with ';', e.g. `@a @b; @c @d @e`.")
+    return groups
+
+
+def build_board_embeds(draft_state: dict, guild: discord.Guild, final_update: bool = False) -> list[discord.Embed]:
+    """Build the draft board and pick history embeds, fitted into a single message."""
+    draft_id = draft_state['draft_id']
+    title, description = utils.format_draft_status(draft_state, guild)
+
+    sections = [
+        utils.format_category_section(
+            category_name,
+            draft_state['master_item_list'].get(category_name, []),
+            draft_state['available_items'].get(category_name, []))
+        for category_name in draft_state['categories_order']
+    ]
+
+    # Add pick order if active
+    if draft_state['status'] == 'active' and not final_update and draft_state['draft_order_player_indices']:
+        pick_order = utils.format_pick_order(
+            draft_state, draft_state['current_pick_global_index'])
+        sections.append(Section(
+            f"🐍 Global Pick Order (Turn {draft_state['current_pick_global_index'] + 1})",
+            [pick_order]))
+
+    board_spec = EmbedSpec(
+        title, description, color=discord.Color.blue(),
+        footer=f"Draft ID: {draft_id} | Global Draft with Per-Category Limits",
+        sections=sections)
+
+    # Get all picks from the database
+    recent_picks = database.get_recent_picks(
+        DATABASE_NAME, draft_id, limit=100)  # Increased limit to get all picks
+    history_spec = EmbedSpec(
+        "📜 Pick History",
+        None if recent_picks else "No picks made yet.",
+        color=discord.Color.green(),
+        sections=utils.format_pick_history_sections(draft_state, recent_picks))
+
+    # The board is a single message that gets edited, so it only gets one page
+    return layout_pages([board_spec, history_spec], max_pages=1)[0]
+
+
+async def send_pages(interaction: discord.Interaction, pages: list[list[discord.Embed]], ephemeral: bool = True):
+    """Send laid-out embed pages, the first as the response and the rest as followups."""
+    for page in pages:
+        if interaction.response.is_done():
+            await interaction.followup.send(embeds=page, ephemeral=ephemeral)
+        else:
+            await interaction.response.send_message(embeds=page, ephemeral=ephemeral)
+
+
+def build_overview_pages(channel_name: str, drafts: list[dict]) -> list[list[discord.Embed]]:
+    """Pages of OVERVIEW_DRAFTS_PER_PAGE drafts each, for /channeloverview."""
+    chunks = [drafts[i:i + OVERVIEW_DRAFTS_PER_PAGE] for i in range(0, len(drafts), OVERVIEW_DRAFTS_PER_PAGE)]
+    pages = []
+    for chunk in chunks:
+        sections = []
+        for draft in chunk:
+            lines = [
+                f"Turn: <@{draft['current_user_id']}> ({draft['current_player']})" if draft['current_user_id']
+                else "Turn: -",
+                f"Picks: {draft['current_pick_global_index']} / {draft['total_picks_to_make']}",
+            ]
+            if draft['last_pick_item']:
+                lines.append(f"Last pick: {draft['last_pick_item']} ({draft['last_pick_category']}) "
+                             f"by {draft['last_pick_player']} <t:{draft['last_pick_utc']}:R>")
+            else:
+                lines.append("Last pick: none yet")
+            lines.append(f"Players: {draft['num_players']}, started <t:{draft['created_at_utc']}:R>")
+            if draft.get('message_link'):
+                lines.append(f"[Jump to Draft]({draft['message_link']})")
+            sections.append(Section(f"Draft ID: `{draft['draft_id']}`", lines))
+        pages.extend(layout_pages([EmbedSpec(
+            f"Active Drafts in #{channel_name}",
+            f"{len(drafts)} active draft(s) in this channel.",
+            color=discord.Color.blurple(),
+            # Sized for the real footer, which is only known once layout has
+            # split the chunks into pages
+            footer=OVERVIEW_FOOTER_PLACEHOLDER,
+            sections=sections)]))
+    for number, page in enumerate(pages, start=1):
+        for embed in page:
+            embed.set_footer(text=f"Page {number} of {len(pages)}")
+    return pages
+
 # --- UI Views ---
 
 
@@ -58,8 +307,7 @@ class DraftPickView(discord.ui.View):
         if not current_draft_state or not current_draft_state['status'] == 'active':
             for item_ui in self.children:
                 item_ui.disabled = True
-            print(
-                f"Warning: DraftPickView created for inactive/non-existent draft_id {self.draft_id}")
+            logger.warning("DraftPickView created for inactive/non-existent draft_id %s", self.draft_id)
             return
 
         current_player_name = database.get_player_name_by_id(
@@ -90,8 +338,7 @@ class DraftPickView(discord.ui.View):
                 for item_name in items_in_category_master:
                     if item_name in draft_state['available_items'].get(category_name, []):
                         # Get the DraftItem object for this item
-                        draft_item = next(
-                            (item for item in all_items if item.pretty_name == item_name), None)
+                        draft_item = get_draft_item_by_name(item_name)
                         if draft_item:
                             description = draft_item.description[:100] if len(
                                 draft_item.description) > 100 else draft_item.description
@@ -113,16 +360,19 @@ class DraftPickView(discord.ui.View):
                 self.add_item(select)
                 select_count += 1
             elif select_count >= 5 and items_in_category_master and can_pick_from_this_cat:
-                print(
-                    f"Warning: Draft {self.draft_id} - More than 5 eligible categories for player {self.current_player_id}, only showing first 5.")
+                logger.warning("Draft %s - More than 5 eligible categories for player %s, only showing first 5.",
+                               self.draft_id, self.current_player_id, extra=logs.sample(100))
                 break
 
         if select_count == 0:
-            print(
-                f"Info: DraftPickView for player {self.current_player_id}, draft {self.draft_id} has no eligible pick options.")
+            logger.info("DraftPickView for player %s, draft %s has no eligible pick options.",
+                        self.current_player_id, self.draft_id, extra=logs.sample(100))
 
+    @metrics.timed('view')
+    @tracing.traced()
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         """Check if the interaction is valid."""
+        logs.bind_interaction(interaction, draft_id=self.draft_id)
         current_draft_state = database.get_draft_state(
             DATABASE_NAME, self.draft_id)
         if not current_draft_state or not current_draft_state['status'] == 'active':
@@ -142,8 +392,16 @@ class DraftPickView(discord.ui.View):
             return False
         return True
 
+    @metrics.timed('view')
+    @tracing.traced()
     async def select_callback(self, interaction: discord.Interaction):
         """Handle the selection of an item."""
+        if rebuilding_pick_stats:
+            await interaction.response.send_message(
+                "⏳ The pick statistics are being rebuilt. Please make your pick again in a few seconds.",
+                ephemeral=True)
+            return
+
         selected_value = interaction.data['values'][0]
         category_name, item_name_actual = selected_value.split('|', 1)
 
@@ -188,6 +446,7 @@ class DraftPickView(discord.ui.View):
                     await interaction.edit_original_response(view=new_view)
                 except:
                     pass
+            live_views.register(self.draft_id, new_view)
             return False
 
         return True
@@ -204,53 +463,15 @@ class DraftPickView(discord.ui.View):
             )
             return False
 
-        # Update the pick history embed
+        # Update the board and pick history embeds
         current_draft_state = database.get_draft_state(
             DATABASE_NAME, self.draft_id)
         if current_draft_state and current_draft_state.get('board_message_id'):
             try:
                 channel = interaction.channel
                 message = await channel.fetch_message(current_draft_state['board_message_id'])
-
-                # Create pick history embed
-                pick_history_embed = discord.Embed(
-                    title="📜 Pick History",
-                    color=discord.Color.green()
-                )
-
-                # Get all picks from the database
-                recent_picks = database.get_recent_picks(
-                    DATABASE_NAME, self.draft_id, limit=100)  # Increased limit to get all picks
-
-                if recent_picks:
-                    # Group picks by player
-                    picks_by_player = {}
-                    for pick in recent_picks:
-                        player_name = next(
-                            (name for id, name in current_draft_state['players'] if id == pick['player_id']), "Unknown")
-                        if player_name not in picks_by_player:
-                            picks_by_player[player_name] = []
-                        picks_by_player[player_name].append(
-                            f"**{pick['item_name']}** from {pick['category_name']}")
-
-                    # Create fields for each player's picks in draft order
-                    players_with_picks = [
-                        (id, name) for id, name in current_draft_state['players'] if name in picks_by_player]
-                    for i, (player_id, player_name) in enumerate(players_with_picks):
-                        pick_history_embed.add_field(
-                            name=f"🎯 {player_name}'s Picks",
-                            value="\n".join(picks_by_player[player_name]),
-                            inline=False
-                        )
-                        # Add a blank field for spacing, but not after the last player
-                        if i < len(players_with_picks) - 1:
-                            pick_history_embed.add_field(
-                                name="\u200b",  # Zero-width space
-                                value="\u200b",
-                                inline=False
-                            )
-                else:
-                    pick_history_embed.description = "No picks made yet."
+                embeds = build_board_embeds(
+                    current_draft_state, interaction.guild)
 
                 # Disable the view after successful pick
                 for child in self.children:
@@ -258,12 +479,12 @@ class DraftPickView(discord.ui.View):
 
                 # Update the message with both embeds and the disabled view
                 if not interaction.response.is_done():
-                    await interaction.response.edit_message(embeds=[message.embeds[0], pick_history_embed], view=self)
+                    await interaction.response.edit_message(embeds=embeds, view=self)
                 else:
-                    await message.edit(embeds=[message.embeds[0], pick_history_embed], view=self)
+                    await message.edit(embeds=embeds, view=self)
 
-            except Exception as e:
-                print(f"Error updating pick history embed: {e}")
+            except Exception:
+                logger.exception("Error updating board after pick")
 
         return True
 
@@ -275,18 +496,26 @@ class DraftPickView(discord.ui.View):
             return
 
         if updated_draft_state['current_pick_global_index'] >= updated_draft_state['total_picks_to_make']:
-            database.update_draft_status(
-                DATABASE_NAME, self.draft_id, 'completed')
+            # Only the call that completes the draft announces it and builds
+            # the packs; a repeated or racing final pick finds it done
+            if not database.update_draft_status(DATABASE_NAME, self.draft_id, 'completed'):
+                return
+            draft_index.set_status(self.draft_id, 'completed')
             await interaction.channel.send(
                 f"🎉🎉 All picks for Draft ID: **{self.draft_id}** have been made! The draft is complete! 🎉🎉"
             )
+            # Packs build in parallel while the final board and status are posted
+            run_in_background(post_draft_datapacks(interaction.channel, self.draft_id))
             await update_draft_message(draft_id=self.draft_id, final_update=True)
             await _draft_status_logic(interaction, self.draft_id, ephemeral_response=False)
         else:
             await update_draft_message(draft_id=self.draft_id)
 
+    @metrics.timed('view')
+    @tracing.traced()
     async def on_timeout(self):
         """Handle view timeout."""
+        logs.bind(draft_id=self.draft_id)
         current_draft_state = database.get_draft_state(
             DATABASE_NAME, self.draft_id)
         if current_draft_state and current_draft_state['status'] == 'active' and current_draft_state.get('board_message_id'):
@@ -312,10 +541,10 @@ class DraftPickView(discord.ui.View):
                     database.update_last_event_message(
                         DATABASE_NAME, self.draft_id, timeout_content)
 
-                    await msg.edit(content=timeout_content, embed=msg.embeds[0] if msg.embeds else None, view=self)
-                except Exception as e:
-                    print(
-                        f"Error during on_timeout for draft {self.draft_id}: {e}")
+                    await msg.edit(content=timeout_content, embeds=msg.embeds, view=self)
+                except Exception:
+                    logger.exception("Error during on_timeout for draft %s", self.draft_id)
+        live_views.discard(self.draft_id, self)
         self.stop()
 
 
@@ -338,6 +567,12 @@ class MinecraftUsernameModal(discord.ui.Modal):
         )
         self.add_item(self.username_input)
 
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        logs.bind_interaction(interaction, draft_id=self.draft_id)
+        return True
+
+    @metrics.timed('view')
+    @tracing.traced()
     async def on_submit(self, interaction: discord.Interaction):
         if interaction.user.id != self.current_player_id:
             await interaction.response.send_message("This is not your turn!", ephemeral=True)
@@ -351,6 +586,7 @@ class MinecraftUsernameModal(discord.ui.Modal):
             draft_pick_view = DraftPickView(
                 current_player_id=self.current_player_id, draft_id=self.draft_id)
             await interaction.message.edit(view=draft_pick_view)
+            live_views.register(self.draft_id, draft_pick_view)
         else:
             await interaction.response.send_message("❌ Failed to save your Minecraft username. Please try again.", ephemeral=True)
 
@@ -374,6 +610,12 @@ class MinecraftUsernameView(discord.ui.View):
         self.enter_username_button.callback = self.enter_username
         self.add_item(self.enter_username_button)
 
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        logs.bind_interaction(interaction, draft_id=self.draft_id)
+        return True
+
+    @metrics.timed('view')
+    @tracing.traced()
     async def enter_username(self, interaction: discord.Interaction):
         if interaction.user.id != self.current_player_id:
             await interaction.response.send_message("This is not your turn!", ephemeral=True)
@@ -384,19 +626,58 @@ class MinecraftUsernameView(discord.ui.View):
         await interaction.response.send_modal(modal)
 
 
+class OverviewPagesView(discord.ui.View):
+    """Previous/next buttons over the already rendered pages of a channel overview."""
+
+    def __init__(self, pages: list[list[discord.Embed]]):
+        super().__init__(timeout=VIEW_TIMEOUT_SECONDS)
+        self.pages = pages
+        self.page = 0
+
+        self.previous_button = discord.ui.Button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+        self.previous_button.callback = self.previous_page
+        self.add_item(self.previous_button)
+        self.next_button = discord.ui.Button(label="Next ▶", style=discord.ButtonStyle.secondary)
+        self.next_button.callback = self.next_page
+        self.add_item(self.next_button)
+        self._update_buttons()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        logs.bind_interaction(interaction)
+        return True
+
+    def _update_buttons(self):
+        self.previous_button.disabled = self.page == 0
+        self.next_button.disabled = self.page == len(self.pages) - 1
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        self.page = max(0, min(page, len(self.pages) - 1))
+        self._update_buttons()
+        await interaction.response.edit_message(embeds=self.pages[self.page], view=self)
+
+    @metrics.timed('view')
+    @tracing.traced()
+    async def previous_page(self, interaction: discord.Interaction):
+        await self._show(interaction, self.page - 1)
+
+    @metrics.timed('view')
+    @tracing.traced()
+    async def next_page(self, interaction: discord.Interaction):
+        await self._show(interaction, self.page + 1)
+
+
 async def update_draft_message(draft_id: str, final_update: bool = False):
     """Update the draft board message."""
     current_draft_state = database.get_draft_state(DATABASE_NAME, draft_id)
     if not current_draft_state:
-        print(
-            f"update_draft_message called for non-existent draft_id {draft_id}.")
+        logger.warning("update_draft_message called for non-existent draft_id %s.", draft_id)
         return
 
     channel_id = current_draft_state['channel_id']
     guild_id = current_draft_state['guild_id']
     guild = bot.get_guild(guild_id)
     if not guild:
-        print(f"Error: Could not find guild {guild_id} for draft {draft_id}.")
+        logger.error("Could not find guild %s for draft %s.", guild_id, draft_id)
         return
 
     message_content_override = None
@@ -408,71 +689,7 @@ async def update_draft_message(draft_id: str, final_update: bool = False):
     if current_draft_state['status'] != 'active' and not final_update:
         return
 
-    title, description = utils.format_draft_status(current_draft_state, guild)
-    embed = utils.create_draft_embed(title, description)
-
-    # Add category fields
-    for category_name in current_draft_state['categories_order']:
-        master_list = current_draft_state['master_item_list'].get(
-            category_name, [])
-        available_items = current_draft_state['available_items'].get(
-            category_name, [])
-        field_name, field_value = utils.format_category_field(
-            category_name, master_list, available_items)
-        embed.add_field(name=field_name, value=field_value, inline=False)
-
-    # Add pick order if active
-    if current_draft_state['status'] == 'active' and not final_update and current_draft_state['draft_order_player_indices']:
-        pick_order = utils.format_pick_order(
-            current_draft_state, current_draft_state['current_pick_global_index'])
-        embed.add_field(
-            name=f"🐍 Global Pick Order (Turn {current_draft_state['current_pick_global_index'] + 1})",
-            value=pick_order,
-            inline=False
-        )
-
-    embed.set_footer(
-        text=f"Draft ID: {draft_id} | Global Draft with Per-Category Limits")
-
-    # Create pick history embed
-    pick_history_embed = discord.Embed(
-        title="📜 Pick History",
-        color=discord.Color.green()
-    )
-
-    # Get all picks from the database
-    recent_picks = database.get_recent_picks(
-        DATABASE_NAME, draft_id, limit=100)  # Increased limit to get all picks
-
-    if recent_picks:
-        # Group picks by player
-        picks_by_player = {}
-        for pick in recent_picks:
-            player_name = next(
-                (name for id, name in current_draft_state['players'] if id == pick['player_id']), "Unknown")
-            if player_name not in picks_by_player:
-                picks_by_player[player_name] = []
-            picks_by_player[player_name].append(
-                f"**{pick['item_name']}** from {pick['category_name']}")
-
-        # Create fields for each player's picks in draft order
-        players_with_picks = [
-            (id, name) for id, name in current_draft_state['players'] if name in picks_by_player]
-        for i, (player_id, player_name) in enumerate(players_with_picks):
-            pick_history_embed.add_field(
-                name=f"🎯 {player_name}'s Picks",
-                value="\n".join(picks_by_player[player_name]),
-                inline=False
-            )
-            # Add a blank field for spacing, but not after the last player
-            if i < len(players_with_picks) - 1:
-                pick_history_embed.add_field(
-                    name="\u200b",  # Zero-width space
-                    value="\u200b",
-                    inline=False
-                )
-    else:
-        pick_history_embed.description = "No picks made yet."
+    embeds = build_board_embeds(current_draft_state, guild, final_update)
 
     # Create view for current player if active
     view_to_send = None
@@ -504,18 +721,25 @@ async def update_draft_message(draft_id: str, final_update: bool = False):
     try:
         if target_message_id:
             message = await channel.fetch_message(target_message_id)
-            await message.edit(content=message_content_override, embeds=[embed, pick_history_embed], view=view_to_send)
+            await message.edit(content=message_content_override, embeds=embeds, view=view_to_send)
         else:
-            msg = await channel.send(content=message_content_override, embeds=[embed, pick_history_embed], view=view_to_send)
+            msg = await channel.send(content=message_content_override, embeds=embeds, view=view_to_send)
             database.update_board_message_id(DATABASE_NAME, draft_id, msg.id)
     except discord.NotFound:
-        msg = await channel.send(content=message_content_override, embeds=[embed, pick_history_embed], view=view_to_send)
+        msg = await channel.send(content=message_content_override, embeds=embeds, view=view_to_send)
         database.update_board_message_id(DATABASE_NAME, draft_id, msg.id)
     except discord.Forbidden:
-        print(f"Error: Bot lacks permissions in channel {channel.id}")
-    except Exception as e:
-        print(
-            f"Error updating/sending draft board message for draft {draft_id}: {e}")
+        logger.error("Bot lacks permissions in channel %s", channel.id)
+        return
+    except Exception:
+        logger.exception("Error updating/sending draft board message for draft %s", draft_id)
+        return
+
+    # The board now carries the new view; the one it replaced stops listening
+    if view_to_send is not None:
+        live_views.register(draft_id, view_to_send)
+    else:
+        live_views.discard(draft_id)
 
 # --- Bot Events ---
 
@@ -523,23 +747,49 @@ async def update_draft_message(draft_id: str, final_update: bool = False):
 @bot.event
 async def on_ready():
     """Handle bot ready event."""
+    global metrics_server
     database.initialize_database(DATABASE_NAME)
-    print(f'{bot.user.name} has connected to Discord!')
+    logger.info("%s has connected to Discord!", bot.user.name)
+    if not draft_index.loaded:
+        draft_index.load(database.get_indexed_drafts(DATABASE_NAME, draft_index.recent_per_channel))
+        logger.info("Indexed %d drafts for autocomplete.", len(draft_index))
+    # on_ready fires again after reconnects; only start the endpoint once
+    if metrics.METRICS_PORT and metrics_server is None:
+        metrics_server = await metrics.start_http_server()
+        logger.info("Serving metrics on http://%s:%s/metrics", metrics.METRICS_HOST, metrics.METRICS_PORT)
     try:
         synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} commands.")
-    except Exception as e:
-        print(f"Failed to sync commands: {e}")
-    print("Bot ready.")
+        logger.info("Synced %d commands.", len(synced))
+    except Exception:
+        logger.exception("Failed to sync commands")
+    logger.info("Bot ready.")
 
 # --- Slash Commands ---
 
 
+def _draft_choices(interaction: discord.Interaction, current: str,
+                   active_only: bool) -> list[app_commands.Choice[str]]:
+    return [app_commands.Choice(name=draft.choice_name(), value=draft.draft_id)
+            for draft in draft_index.suggest(interaction.channel_id, interaction.user.id, current, active_only)]
+
+
+async def draft_id_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    """Suggest this channel's active and recent drafts, from the index only."""
+    return _draft_choices(interaction, current, active_only=False)
+
+
+async def active_draft_id_autocomplete(interaction: discord.Interaction,
+                                       current: str) -> list[app_commands.Choice[str]]:
+    return _draft_choices(interaction, current, active_only=True)
+
+
 @bot.tree.command(name="startdraft", description="Starts a new item draft in this channel.")
 @app_commands.describe(
     player1="First player.", player2="Second player.",
     player3="Third player (optional).", player4="Fourth player (optional)."
 )
+@metrics.timed('slash_command', 'startdraft')
+@tracing.traced('startdraft')
 async def start_draft_slash(interaction: discord.Interaction,
                             player1: discord.Member, player2: discord.Member,
                             player3: typing.Optional[discord.Member] = None,
@@ -569,29 +819,17 @@ async def start_draft_slash(interaction: discord.Interaction,
             )
             return
 
-    picks_allowed_per_cat = 2 if num_actual_players == 2 else 1
-    num_categories = len(database.INITIAL_ITEMS_BY_CATEGORY)
-    total_picks_allotted_player = picks_allowed_per_cat * num_categories
-
-    draft_order_indices = generate_global_draft_order(
-        num_actual_players, total_picks_allotted_player)
+    picks_allowed_per_cat, total_picks_allotted_player, draft_order_indices = draft_rules(
+        num_actual_players)
     total_picks_overall = len(draft_order_indices)
 
     # Get a random seed for the draft
     seed = await utils.get_random_seed()
 
     # Send initial message and get its link
-    player_names_str = ", ".join([name for _, name in players_info_for_db])
-    start_message = (
-        f"🎉 New Draft Started by {interaction.user.mention} with players: {player_names_str}!\n"
-        f"**Rules:** {picks_allowed_per_cat} pick(s) per category per player. Total {total_picks_allotted_player} picks per player.\n"
-        f"Total picks in draft: {total_picks_overall}.\n"
-    )
-
-    if seed:
-        start_message += f"**Seed:** `{seed}`\n\n"
-
-    start_message += "**Recent Picks:**\n"
+    start_message = format_start_message(
+        interaction.user, players_info_for_db, picks_allowed_per_cat,
+        total_picks_allotted_player, total_picks_overall, seed)
 
     await interaction.response.send_message(start_message, ephemeral=False)
     message = await interaction.original_response()
@@ -610,12 +848,147 @@ async def start_draft_slash(interaction: discord.Interaction,
         )
         return
 
+    draft_index.add(draft_id, interaction.channel_id, players_info_for_db,
+                    int(discord.utils.utcnow().timestamp()))
+
     # Update the message with the draft ID
-    await message.edit(content=start_message + f"\n**Draft ID: `{draft_id}`** (Use this ID for other commands like `/draftboard`, `/mydraft`)")
+    await message.edit(content=start_message + format_draft_id_line(draft_id))
+    await update_draft_message(draft_id=draft_id)
+
+
+async def post_tournament_draft(channel: discord.abc.Messageable, draft_id: str, start_message: str):
+    """Post one tournament draft's start message and board."""
+    message = await channel.send(start_message + format_draft_id_line(draft_id))
+    database.update_message_link(DATABASE_NAME, draft_id, message.jump_url)
     await update_draft_message(draft_id=draft_id)
 
 
+@bot.tree.command(name="tournament", description="Starts a draft for each group of players at once.")
+@app_commands.describe(
+    groups="Player groups separated by ';', e.g. '@a @b; @c @d @e'.",
+    name="A name for the tournament (optional)."
+)
+@metrics.timed('slash_command', 'tournament')
+@tracing.traced('tournament')
+async def tournament_slash(interaction: discord.Interaction, groups: str,
+                           name: typing.Optional[str] = None):
+    """Start every draft of a tournament round under one tournament ID."""
+    try:
+        player_groups = parse_player_groups(groups)
+    except ValueError as e:
+        await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+        return
+    if len(player_groups) > MAX_TOURNAMENT_DRAFTS:
+        await interaction.response.send_message(
+            f"❌ A tournament can start at most {MAX_TOURNAMENT_DRAFTS} drafts at once.",
+            ephemeral=True
+        )
+        return
+
+    players_by_group = []
+    for user_ids in player_groups:
+        players_info = []
+        for user_id in user_ids:
+            member = interaction.guild.get_member(user_id)
+            if member is None:
+                await interaction.response.send_message(
+                    f"❌ <@{user_id}> is not a member of this server.", ephemeral=True)
+                return
+            players_info.append((member.id, member.display_name))
+        players_by_group.append(players_info)
+
+    await interaction.response.defer(thinking=True)
+
+    # One seed list fetch and one transaction for the whole tournament
+    seeds = await utils.get_random_seeds(len(players_by_group))
+    drafts = []
+    for players_info, seed in zip(players_by_group, seeds):
+        picks_allowed_per_cat, total_picks_allotted_player, draft_order_indices = draft_rules(
+            len(players_info))
+        drafts.append({
+            'players_info': players_info,
+            'picks_allowed_per_player_per_category': picks_allowed_per_cat,
+            'total_picks_allotted_per_player': total_picks_allotted_player,
+            'draft_order_player_indices': draft_order_indices,
+            'total_picks_to_make': len(draft_order_indices),
+            'seed': seed,
+        })
+    created = database.create_tournament(
+        DATABASE_NAME, interaction.guild_id, interaction.channel_id, interaction.user.id, drafts, name)
+    if not created:
+        await interaction.followup.send("Failed to create the tournament due to a database error.")
+        return
+    tournament_id, draft_ids = created
+    created_at_utc = int(discord.utils.utcnow().timestamp())
+    for draft_id, draft in zip(draft_ids, drafts):
+        draft_index.add(draft_id, interaction.channel_id, draft['players_info'], created_at_utc)
+    logger.info("Tournament %s started with %d drafts", tournament_id, len(draft_ids))
+
+    semaphore = asyncio.Semaphore(TOURNAMENT_POST_CONCURRENCY)
+
+    async def post(draft_id: str, draft: dict):
+        start_message = format_start_message(
+            interaction.user, draft['players_info'], draft['picks_allowed_per_player_per_category'],
+            draft['total_picks_allotted_per_player'], draft['total_picks_to_make'], draft['seed'])
+        async with semaphore:
+            await post_tournament_draft(interaction.channel, draft_id, start_message)
+
+    results = await asyncio.gather(*(post(draft_id, draft) for draft_id, draft in zip(draft_ids, drafts)),
+                                   return_exceptions=True)
+    sections = []
+    for draft_id, draft, result in zip(draft_ids, drafts, results):
+        lines = [", ".join(name for _, name in draft['players_info'])]
+        if isinstance(result, Exception):
+            logger.error("Error posting tournament draft %s", draft_id, exc_info=result)
+            lines.append("⚠️ Board could not be posted; use `/draftboard` to show it.")
+        sections.append(Section(f"Draft ID: `{draft_id}`", lines))
+
+    pages = layout_pages([EmbedSpec(
+        f"🏆 Tournament {name or tournament_id} started",
+        f"**Tournament ID: `{tournament_id}`** (Use `/tournamentstatus` to follow its drafts)\n"
+        f"{len(draft_ids)} draft(s) started by {interaction.user.mention}.",
+        color=discord.Color.gold(), sections=sections)])
+    await send_pages(interaction, pages, ephemeral=False)
+
+
+@bot.tree.command(name="tournamentstatus", description="Shows the progress of every draft in a tournament.")
+@app_commands.describe(tournament_id="The ID of the tournament.")
+@metrics.timed('slash_command', 'tournamentstatus')
+@tracing.traced('tournamentstatus')
+async def tournamentstatus_slash(interaction: discord.Interaction, tournament_id: str):
+    """Show the status of each draft in a tournament."""
+    tournament_id = tournament_id.strip()
+    tournament = database.get_tournament(DATABASE_NAME, tournament_id)
+    if not tournament or tournament['channel_id'] != interaction.channel_id:
+        await interaction.response.send_message(
+            f"Tournament ID `{tournament_id}` not found in this channel.",
+            ephemeral=True
+        )
+        return
+
+    sections = []
+    for draft in tournament['drafts']:
+        status_emoji = DRAFT_STATUS_EMOJI.get(draft['status'], '❓')
+        value_lines = [
+            f"Status: {status_emoji} {draft['status'].capitalize()}",
+            f"Players: {', '.join(draft['players'])}",
+            f"Picks: {draft['current_pick_global_index']} / {draft['total_picks_to_make']}",
+        ]
+        if draft.get('message_link'):
+            value_lines.append(f"[Jump to Draft]({draft['message_link']})")
+        sections.append(Section(f"Draft ID: `{draft['draft_id']}`", value_lines))
+
+    completed = sum(draft['status'] == 'completed' for draft in tournament['drafts'])
+    pages = layout_pages([EmbedSpec(
+        f"🏆 Tournament {tournament['name'] or tournament_id}",
+        f"{completed} of {len(tournament['drafts'])} draft(s) completed. Created <t:{tournament['created_at_utc']}:R>.",
+        color=discord.Color.gold(), sections=sections)])
+    await send_pages(interaction, pages, ephemeral=True)
+
+
 @bot.tree.command(name="listdrafts", description="Lists active drafts in this channel.")
+@metrics.timed('slash_command', 'listdrafts')
+@tracing.traced('listdrafts')
 async def listdrafts_slash(interaction: discord.Interaction):
     """List active drafts in the current channel."""
     active_drafts = database.get_active_drafts_in_channel(
@@ -641,12 +1014,38 @@ async def listdrafts_slash(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
+@bot.tree.command(name="channeloverview", description="Shows the turn and progress of every active draft in this channel.")
+@metrics.timed('slash_command', 'channeloverview')
+@tracing.traced('channeloverview')
+async def channeloverview_slash(interaction: discord.Interaction):
+    """Show every active draft in the channel, from one query and the render cache."""
+    drafts = database.get_channel_overview(DATABASE_NAME, interaction.channel_id)
+    if not drafts:
+        await interaction.response.send_message("No active drafts in this channel.", ephemeral=True)
+        return
+
+    channel_name = interaction.channel.name
+    # The rows are everything the pages show, so unchanged rows mean unchanged pages
+    fingerprint = (channel_name, tuple(tuple(draft.values()) for draft in drafts))
+    pages = overview_cache.get_or_render(
+        interaction.channel_id, fingerprint, lambda: build_overview_pages(channel_name, drafts))
+    if len(pages) == 1:
+        await interaction.response.send_message(embeds=pages[0], ephemeral=True)
+        return
+    await interaction.response.send_message(embeds=pages[0], view=OverviewPagesView(pages), ephemeral=True)
+
+
 @bot.tree.command(name="draftboard", description="Shows the draft board for a specific draft.")
 @app_commands.describe(draft_id="The ID of the draft to display.")
+@app_commands.autocomplete(draft_id=draft_id_autocomplete)
+@metrics.timed('slash_command', 'draftboard')
+@tracing.traced('draftboard')
 async def draftboard_slash(interaction: discord.Interaction, draft_id: str):
     """Show the draft board for a specific draft."""
-    current_draft_state = database.get_draft_state(
-        DATABASE_NAME, draft_id.strip())
+    draft_id = draft_id.strip()
+    # Drafts the index places in another channel are turned away without a query
+    current_draft_state = None if draft_index.rules_out(draft_id, interaction.channel_id) else \
+        database.get_draft_state(DATABASE_NAME, draft_id)
     if not current_draft_state or current_draft_state['channel_id'] != interaction.channel_id:
         await interaction.response.send_message(
             f"Draft ID `{draft_id}` not found or not active in this channel.",
@@ -668,10 +1067,14 @@ async def draftboard_slash(interaction: discord.Interaction, draft_id: str):
 
 @bot.tree.command(name="mydraft", description="Shows items you drafted for a specific draft.")
 @app_commands.describe(draft_id="The ID of the draft.")
+@app_commands.autocomplete(draft_id=draft_id_autocomplete)
+@metrics.timed('slash_command', 'mydraft')
+@tracing.traced('mydraft')
 async def mydraft_slash(interaction: discord.Interaction, draft_id: str):
     """Show items drafted by the user for a specific draft."""
     draft_id = draft_id.strip()
-    current_draft_state = database.get_draft_state(DATABASE_NAME, draft_id)
+    current_draft_state = None if draft_index.rules_out(draft_id, interaction.channel_id) else \
+        database.get_draft_state(DATABASE_NAME, draft_id)
 
     if not current_draft_state or current_draft_state['channel_id'] != interaction.channel_id:
         await interaction.response.send_message(
@@ -689,11 +1092,6 @@ async def mydraft_slash(interaction: discord.Interaction, draft_id: str):
         )
         return
 
-    embed = utils.create_draft_embed(
-        title=f"📜 Your Drafted Items - {interaction.user.display_name} (Draft ID: {draft_id})",
-        color=discord.Color.green()
-    )
-
     total_items, category_lines = utils.get_player_draft_summary(
         current_draft_state, interaction.user.id)
 
@@ -705,26 +1103,35 @@ async def mydraft_slash(interaction: discord.Interaction, draft_id: str):
         desc_lines.insert(
             0, f"Total items drafted: {total_items} / {current_draft_state.get('total_picks_allotted_per_player', 'N/A')}")
 
-    embed.description = "\n".join(desc_lines)
-
+    sections = []
     for category_name in current_draft_state['categories_order']:
         items_in_category = player_draft.get(category_name, [])
         if items_in_category:
-            embed.add_field(
-                name=f"🎁 {category_name} ({len(items_in_category)} picked)",
-                value=", ".join(items_in_category),
-                inline=False
-            )
+            sections.append(Section(
+                f"🎁 {category_name} ({len(items_in_category)} picked)",
+                items_in_category, separator=", "))
 
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    pages = layout_pages([EmbedSpec(
+        f"📜 Your Drafted Items - {interaction.user.display_name} (Draft ID: {draft_id})",
+        "\n".join(desc_lines), color=discord.Color.green(), sections=sections)])
+    await send_pages(interaction, pages, ephemeral=True)
 
 
 @bot.tree.command(name="draftstatus", description="Shows all items drafted by players for a specific draft.")
 @app_commands.describe(draft_id="The ID of the draft.")
-async def _draft_status_logic(interaction: discord.Interaction, draft_id: str, ephemeral_response: bool = False):
+@app_commands.autocomplete(draft_id=draft_id_autocomplete)
+@metrics.timed('slash_command', 'draftstatus')
+@tracing.traced('draftstatus')
+async def draftstatus_slash(interaction: discord.Interaction, draft_id: str, ephemeral_response: bool = False):
     """Show the status of a specific draft."""
+    await _draft_status_logic(interaction, draft_id, ephemeral_response)
+
+
+async def _draft_status_logic(interaction: discord.Interaction, draft_id: str, ephemeral_response: bool = False):
+    """Send the full draft status; shared by /draftstatus and draft completion."""
     draft_id = draft_id.strip()
-    current_draft_state = database.get_draft_state(DATABASE_NAME, draft_id)
+    current_draft_state = None if draft_index.rules_out(draft_id, interaction.channel_id) else \
+        database.get_draft_state(DATABASE_NAME, draft_id)
 
     if not current_draft_state or current_draft_state['channel_id'] != interaction.channel_id:
         await interaction.response.send_message(
@@ -733,42 +1140,39 @@ async def _draft_status_logic(interaction: discord.Interaction, draft_id: str, e
         )
         return
 
-    embed = utils.create_draft_embed(
-        title=f" Full Draft Status (Draft ID: {draft_id})",
-        color=discord.Color.gold()
-    )
-
-    embed.description = (
+    description = (
         f"Rules: {current_draft_state.get('picks_allowed_per_player_per_category', 'N/A')} pick(s)/category/player. "
         f"Total: {current_draft_state.get('total_picks_allotted_per_player', 'N/A')} picks/player."
     )
+    if not current_draft_state['drafted_items_by_player']:
+        description += "\nNo items drafted by anyone yet."
 
+    sections = []
     for p_user_id, p_display_name in current_draft_state['players']:
         total_items, category_lines = utils.get_player_draft_summary(
             current_draft_state, p_user_id)
-        value_text = "\n".join(
-            category_lines) if category_lines else "No items drafted yet."
-        embed.add_field(
-            name=f"{p_display_name} ({total_items} / {current_draft_state.get('total_picks_allotted_per_player', 'N/A')})",
-            value=value_text,
-            inline=False
-        )
+        # Split the per-category blocks so long summaries can wrap across fields
+        lines = [line for block in category_lines for line in block.split("\n")]
+        sections.append(Section(
+            f"{p_display_name} ({total_items} / {current_draft_state.get('total_picks_allotted_per_player', 'N/A')})",
+            lines, empty_text="No items drafted yet."))
 
-    if not embed.fields:
-        embed.description += "\nNo items drafted by anyone yet."
-
-    if interaction.response.is_done():
-        await interaction.followup.send(embed=embed, ephemeral=ephemeral_response)
-    else:
-        await interaction.response.send_message(embed=embed, ephemeral=ephemeral_response)
+    pages = layout_pages([EmbedSpec(
+        f" Full Draft Status (Draft ID: {draft_id})", description,
+        color=discord.Color.gold(), sections=sections)])
+    await send_pages(interaction, pages, ephemeral=ephemeral_response)
 
 
 @bot.tree.command(name="resetdraft", description="Resets/cancels a specific draft in this channel (starter only).")
 @app_commands.describe(draft_id="The ID of the draft to reset.")
+@app_commands.autocomplete(draft_id=active_draft_id_autocomplete)
+@metrics.timed('slash_command', 'resetdraft')
+@tracing.traced('resetdraft')
 async def resetdraft_slash(interaction: discord.Interaction, draft_id: str):
     """Reset a specific draft."""
     draft_id = draft_id.strip()
-    current_draft_state = database.get_draft_state(DATABASE_NAME, draft_id)
+    current_draft_state = None if draft_index.rules_out(draft_id, interaction.channel_id, active_only=True) else \
+        database.get_draft_state(DATABASE_NAME, draft_id)
 
     if not current_draft_state or current_draft_state['channel_id'] != interaction.channel_id:
         await interaction.response.send_message(
@@ -796,6 +1200,8 @@ async def resetdraft_slash(interaction: discord.Interaction, draft_id: str):
     board_message_id = current_draft_state.get('board_message_id')
 
     if database.update_draft_status(DATABASE_NAME, draft_id, 'reset'):
+        live_views.discard(draft_id)
+        draft_index.set_status(draft_id, 'reset')
         await interaction.response.send_message(
             f"Draft ID `{draft_id}` has been reset by {interaction.user.mention}.",
             ephemeral=False
@@ -805,10 +1211,9 @@ async def resetdraft_slash(interaction: discord.Interaction, draft_id: str):
             if channel:
                 try:
                     message = await channel.fetch_message(board_message_id)
-                    await message.edit(content=f"*Draft ID `{draft_id}` has been reset.*", embed=None, view=None)
-                except Exception as e:
-                    print(
-                        f"Error clearing board message for reset draft {draft_id}: {e}")
+                    await message.edit(content=f"*Draft ID `{draft_id}` has been reset.*", embeds=[], view=None)
+                except Exception:
+                    logger.exception("Error clearing board message for reset draft %s", draft_id)
     else:
         await interaction.response.send_message(
             f"Failed to reset draft `{draft_id}` due to a database error.",
@@ -817,6 +1222,8 @@ async def resetdraft_slash(interaction: discord.Interaction, draft_id: str):
 
 
 @bot.tree.command(name="recentdrafts", description="Shows your recent draft history.")
+@metrics.timed('slash_command', 'recentdrafts')
+@tracing.traced('recentdrafts')
 async def recentdrafts_slash(interaction: discord.Interaction):
     """Show the user's recent draft history."""
     recent_drafts = database.get_user_recent_drafts(
@@ -829,12 +1236,7 @@ async def recentdrafts_slash(interaction: discord.Interaction):
         )
         return
 
-    embed = utils.create_draft_embed(
-        title=f"📜 Your Recent Drafts - {interaction.user.display_name}",
-        description=f"Showing your {len(recent_drafts)} most recent drafts:",
-        color=discord.Color.blue()
-    )
-
+    sections = []
     for draft in recent_drafts:
         # Get the channel name if possible
         channel = bot.get_channel(draft['channel_id'])
@@ -845,11 +1247,7 @@ async def recentdrafts_slash(interaction: discord.Interaction):
         admin_name = admin_user.name if admin_user else "Unknown Admin"
 
         # Format the draft info
-        status_emoji = {
-            'active': '🟢',
-            'completed': '✅',
-            'reset': '🔄'
-        }.get(draft['status'], '❓')
+        status_emoji = DRAFT_STATUS_EMOJI.get(draft['status'], '❓')
 
         value_lines = [
             f"Status: {status_emoji} {draft['status'].capitalize()}",
@@ -863,17 +1261,116 @@ async def recentdrafts_slash(interaction: discord.Interaction):
         if draft.get('message_link'):
             value_lines.append(f"[Jump to Draft]({draft['message_link']})")
 
-        embed.add_field(
-            name=f"Draft ID: `{draft['draft_id']}`",
-            value="\n".join(value_lines),
-            inline=False
-        )
+        sections.append(
+            Section(f"Draft ID: `{draft['draft_id']}`", value_lines))
 
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    pages = layout_pages([EmbedSpec(
+        f"📜 Your Recent Drafts - {interaction.user.display_name}",
+        f"Showing your {len(recent_drafts)} most recent drafts:",
+        color=discord.Color.blue(), sections=sections)])
+    await send_pages(interaction, pages, ephemeral=True)
+
+
+@bot.tree.command(name="itemstats", description="Shows how often items are picked in this server.")
+@app_commands.describe(
+    category="Only show items from this category.",
+    sort="Most picked (default), most often first pick, or earliest average pick."
+)
+@app_commands.choices(
+    category=[app_commands.Choice(name=category, value=category) for category in database.CATEGORIES_ORDER],
+    sort=[app_commands.Choice(name="Most picked", value="picks"),
+          app_commands.Choice(name="Most first picks", value="first_picks"),
+          app_commands.Choice(name="Earliest average pick", value="average_pick")]
+)
+@metrics.timed('slash_command', 'itemstats')
+@tracing.traced('itemstats')
+async def itemstats_slash(interaction: discord.Interaction,
+                          category: typing.Optional[app_commands.Choice[str]] = None,
+                          sort: typing.Optional[app_commands.Choice[str]] = None):
+    """Show item pick rates from the pick statistics counters."""
+    stats = database.get_item_stats(
+        DATABASE_NAME, interaction.guild_id, category.value if category else None,
+        sort.value if sort else 'picks', limit=ITEM_STATS_LIMIT)
+    if not stats['items']:
+        await interaction.response.send_message("No picks have been made in this server yet.", ephemeral=True)
+        return
+
+    drafts = stats['drafts_with_picks'] or 1
+    lines = []
+    for rank, item in enumerate(stats['items'], start=1):
+        lines.append(
+            f"**{rank}. {item['item_name']}** ({item['category_name']}): picked in {item['picks'] / drafts:.0%} "
+            f"of drafts, first pick {item['first_picks']}x, average pick #{item['pick_number_sum'] / item['picks']:.1f}")
+
+    pages = layout_pages([EmbedSpec(
+        "📊 Item Stats" + (f" - {category.value}" if category else ""),
+        f"{stats['picks']} picks across {stats['drafts_with_picks']} draft(s) in this server.",
+        color=discord.Color.teal(), sections=[Section(sort.name if sort else "Most picked", lines)])])
+    await send_pages(interaction, pages, ephemeral=True)
+
+
+@bot.tree.command(name="playerstats", description="Shows a player's draft history in this server.")
+@app_commands.describe(player="The player to show (default: you).")
+@metrics.timed('slash_command', 'playerstats')
+@tracing.traced('playerstats')
+async def playerstats_slash(interaction: discord.Interaction, player: typing.Optional[discord.Member] = None):
+    """Show a player's draft and pick counters."""
+    player = player or interaction.user
+    stats = database.get_player_stats(DATABASE_NAME, interaction.guild_id, player.id)
+    if not stats:
+        await interaction.response.send_message(
+            f"{player.display_name} hasn't played any drafts in this server yet.", ephemeral=True)
+        return
+
+    summary_lines = [
+        f"Drafts: {stats['drafts_started']} started, {stats['drafts_completed']} completed",
+        f"Picks: {stats['picks']} ({stats['first_picks']} draft opener(s))",
+    ]
+    if stats['last_pick_utc']:
+        summary_lines.append(f"Last pick: <t:{stats['last_pick_utc']}:R>")
+    favourite_lines = [f"{item['item_name']} ({item['category_name']}): {item['picks']}x"
+                       for item in stats['favourite_items']]
+
+    pages = layout_pages([EmbedSpec(
+        f"📈 Player Stats - {player.display_name}", "",
+        color=discord.Color.teal(),
+        sections=[Section("Summary", summary_lines),
+                  Section("Most Picked Items", favourite_lines, empty_text="No picks yet.")])])
+    await send_pages(interaction, pages, ephemeral=True)
+
+
+@bot.tree.command(name="rebuildstats", description="Recompute the pick statistics from scratch (bot owner only).")
+@metrics.timed('slash_command', 'rebuildstats')
+@tracing.traced('rebuildstats')
+async def rebuildstats_slash(interaction: discord.Interaction):
+    """Recompute every pick statistics counter from the draft history."""
+    global rebuilding_pick_stats
+    if not await ensure_owner(interaction, "rebuild the pick statistics"):
+        return
+    if rebuilding_pick_stats:
+        await interaction.response.send_message("⏳ The pick statistics are already being rebuilt.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    # Rebuilding scans every pick; keep it off the event loop, and hold
+    # picks back until its write transaction is over
+    rebuilding_pick_stats = True
+    try:
+        rebuilt = await asyncio.get_running_loop().run_in_executor(
+            None, database.rebuild_pick_stats, DATABASE_NAME)
+    finally:
+        rebuilding_pick_stats = False
+    if rebuilt:
+        logger.info("Pick statistics rebuilt")
+        await interaction.followup.send("✅ Pick statistics rebuilt.", ephemeral=True)
+    else:
+        await interaction.followup.send("❌ Failed to rebuild the pick statistics.", ephemeral=True)
 
 
 @bot.tree.command(name="link", description="Link or update your Minecraft username.")
 @app_commands.describe(minecraft_username="Your Minecraft username (3-16 characters)")
+@metrics.timed('slash_command', 'link')
+@tracing.traced('link')
 async def link_username(interaction: discord.Interaction, minecraft_username: str):
     """Link or update a user's Minecraft username."""
     # Validate username length
@@ -908,6 +1405,8 @@ async def link_username(interaction: discord.Interaction, minecraft_username: st
 
 
 @bot.tree.command(name="unlink", description="Remove your linked Minecraft username.")
+@metrics.timed('slash_command', 'unlink')
+@tracing.traced('unlink')
 async def unlink_username(interaction: discord.Interaction):
     """Remove a user's Minecraft username."""
     # Get current username if it exists
@@ -933,15 +1432,122 @@ async def unlink_username(interaction: discord.Interaction):
             ephemeral=True
         )
 
+
+@bot.tree.command(name="loglevel", description="Change the bot's log level (bot owner only).")
+@app_commands.describe(level="The new level.", logger_name="Logger to change, e.g. 'database' (default: all).")
+@app_commands.choices(level=[app_commands.Choice(name=level, value=level) for level in logs.LEVELS])
+@metrics.timed('slash_command', 'loglevel')
+@tracing.traced('loglevel')
+async def loglevel_slash(interaction: discord.Interaction, level: app_commands.Choice[str],
+                         logger_name: typing.Optional[str] = None):
+    """Change a logger's level while the bot runs."""
+    if not await ensure_owner(interaction, "change the log level"):
+        return
+
+    previous = logs.set_level(level.value, logger_name)
+    logger.info("Log level of %s changed from %s to %s", logger_name or "root", previous, level.value)
+    await interaction.response.send_message(
+        f"✅ Log level of `{logger_name or 'root'}` changed from {previous} to {level.value}.",
+        ephemeral=True
+    )
+
+
+@bot.tree.command(name="profile", description="Profile the running bot for a few seconds (bot owner only).")
+@app_commands.describe(
+    mode="cpu: cProfile of every call; sample: low-overhead stack sampling and loop lag.",
+    seconds=f"How long to profile (1-{profiling.MAX_SECONDS}).",
+    memory="Also report what allocated memory, from tracemalloc snapshots."
+)
+@app_commands.choices(mode=[app_commands.Choice(name="cpu", value="cpu"),
+                            app_commands.Choice(name="sample", value="sample")])
+@metrics.timed('slash_command', 'profile')
+@tracing.traced('profile')
+async def profile_slash(interaction: discord.Interaction, mode: app_commands.Choice[str],
+                        seconds: app_commands.Range[int, 1, profiling.MAX_SECONDS] = 10,
+                        memory: bool = False):
+    """Profile the bot while it keeps running and send the report as a file."""
+    if not await ensure_owner(interaction, "profile the bot"):
+        return
+    if profiling.is_running():
+        await interaction.response.send_message("❌ A profile is already running.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    logger.info("Profiling (%s) for %ss", mode.value, seconds)
+    try:
+        report = await profiling.run_profile(mode.value, seconds, memory)
+    except profiling.ProfilerBusy:
+        await interaction.followup.send("❌ A profile is already running.", ephemeral=True)
+        return
+    filename = f"profile-{mode.value}-{int(discord.utils.utcnow().timestamp())}.txt"
+    await interaction.followup.send(
+        f"📈 {mode.value} profile over {seconds}s" + (" with memory snapshots" if memory else "") + ".",
+        file=discord.File(BytesIO(report.encode('utf-8')), filename=filename),
+        ephemeral=True
+    )
+
+
+@bot.tree.command(name="exportdrafts", description="Export completed drafts and their picks (bot owner only).")
+@app_commands.describe(
+    format="ndjson: one JSON object per draft; csv: one row per pick.",
+    since="First day to include, YYYY-MM-DD (UTC).",
+    until="Last day to include, YYYY-MM-DD (UTC).",
+    all_guilds="Export drafts from every server instead of just this one.",
+    compress="Gzip the file, for exports too large to attach otherwise."
+)
+@app_commands.choices(format=[app_commands.Choice(name=fmt, value=fmt) for fmt in export.FORMATS])
+@metrics.timed('slash_command', 'exportdrafts')
+@tracing.traced('exportdrafts')
+async def exportdrafts_slash(interaction: discord.Interaction, format: app_commands.Choice[str],
+                             since: typing.Optional[str] = None, until: typing.Optional[str] = None,
+                             all_guilds: bool = False, compress: bool = False):
+    """Stream completed drafts into a file and send it as an attachment."""
+    if not await ensure_owner(interaction, "export drafts"):
+        return
+    try:
+        since_utc = export.parse_date(since) if since else None
+        until_utc = export.parse_date(until, end_of_day=True) if until else None
+    except ValueError:
+        await interaction.response.send_message("❌ Dates must be given as YYYY-MM-DD.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    guild_id = None if all_guilds else interaction.guild_id
+    filename = f"drafts-{int(discord.utils.utcnow().timestamp())}.{format.value}" + (".gz" if compress else "")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, filename)
+        # The export reads the whole history; keep it off the event loop
+        count = await asyncio.get_running_loop().run_in_executor(
+            None, export.export_to_path, DATABASE_NAME, path, format.value, guild_id,
+            since_utc, until_utc, compress)
+        size = os.path.getsize(path)
+        limit = interaction.guild.filesize_limit if interaction.guild else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+        if size > limit:
+            await interaction.followup.send(
+                f"❌ The export is {size / 2**20:.1f} MiB, over the {limit / 2**20:.0f} MiB attachment limit. "
+                f"Narrow the date range, turn on compress, or run `python export.py` on the host.",
+                ephemeral=True
+            )
+            return
+        unit = 'draft(s)' if format.value == 'ndjson' else 'row(s)'
+        logger.info("Exported %d %s to %s (%d bytes)", count, unit, filename, size)
+        await interaction.followup.send(
+            f"📤 Exported {count} {unit}.", file=discord.File(path, filename=filename), ephemeral=True)
+
 # --- Run the Bot ---
 if __name__ == "__main__":
-    if not BOT_TOKEN:
-        print("CRITICAL ERROR: DISCORD_BOT_TOKEN environment variable is not set.")
-    else:
-        try:
-            database.initialize_database(DATABASE_NAME)
-            bot.run(BOT_TOKEN)
-        except discord.LoginFailure:
-            print("Login Failure: Invalid bot token.")
-        except Exception as e:
-            print(f"Bot run error: {e}")
+    logs.setup_logging()
+    try:
+        if not BOT_TOKEN:
+            logger.critical("DISCORD_BOT_TOKEN environment variable is not set.")
+        else:
+            try:
+                database.initialize_database(DATABASE_NAME)
+                # Our queue handler is already installed; don't let discord.py add its own
+                bot.run(BOT_TOKEN, log_handler=None)
+            except discord.LoginFailure:
+                logger.critical("Login Failure: Invalid bot token.")
+            except Exception:
+                logger.exception("Bot run error")
+    finally:
+        logs.stop_logging()
@@ -2,29 +2,63 @@
 import sqlite3
 import json  # For storing lists like draft order
 import uuid
-from typing import List, Tuple, Dict, Optional, Any
+from typing import Callable, List, Tuple, Dict, Optional, Any
 import copy  # For deepcopying INITIAL_ITEMS_BY_CATEGORY
+import logging
 from datetime import datetime, timezone
 from items import pools
+import metrics
+
+logger = logging.getLogger(__name__)
 
 # --- Constants ---
 INITIAL_ITEMS_BY_CATEGORY = {
     pool[1]: [item.pretty_name for item in pool[2]] for pool in pools
 }
 CATEGORIES_ORDER = list(INITIAL_ITEMS_BY_CATEGORY.keys())
+# Seconds a connection waits for another's write lock before giving up
+BUSY_TIMEOUT = 5.0
+# rebuild_pick_stats waits longer, for writes already under way to finish
+REBUILD_BUSY_TIMEOUT = 60.0
+
+
+# Called with the SQL of every statement run while any are registered
+_query_listeners: List[Callable[[str], None]] = []
+
+
+def add_query_listener(listener: Callable[[str], None]):
+    """Observe every SQL statement executed on connections opened from now on."""
+    _query_listeners.append(listener)
+
+
+def remove_query_listener(listener: Callable[[str], None]):
+    _query_listeners.remove(listener)
+
+
+def _notify_query_listeners(statement: str):
+    for listener in list(_query_listeners):
+        listener(statement)
 
 
 # --- Database Setup ---
-def get_db_connection(db_name: str):
-    conn = sqlite3.connect(db_name)
+def get_db_connection(db_name: str, timeout: float = BUSY_TIMEOUT):
+    conn = sqlite3.connect(db_name, timeout=timeout)
     conn.row_factory = sqlite3.Row  # Access columns by name
+    if _query_listeners:
+        conn.set_trace_callback(_notify_query_listeners)
     return conn
 
 
+@metrics.timed('database')
 def initialize_database(db_name: str):
     conn = get_db_connection(db_name)
     cursor = conn.cursor()
 
+    # Write-ahead logging, so long reads such as exports don't block pick
+    # commits. The mode is stored in the database file, so setting it here
+    # covers every later connection.
+    cursor.execute("PRAGMA journal_mode=WAL")
+
     # Minecraft Usernames Table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS minecraft_usernames (
@@ -53,7 +87,24 @@ def initialize_database(db_name: str):
             last_event_message TEXT,
             created_at_utc INTEGER NOT NULL, -- Store as UTC timestamp
             message_link TEXT, -- Store the link to the original draft message
-            seed TEXT -- Store the random seed for the draft
+            seed TEXT, -- Store the random seed for the draft
+            tournament_id TEXT -- Set when the draft was started as part of a tournament
+        )
+    ''')
+    # Databases created before tournaments existed lack the column
+    _add_column(cursor, 'drafts', 'tournament_id', 'TEXT')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_drafts_tournament ON drafts (tournament_id)")
+
+    # Tournaments Table: Groups the drafts started together by /tournament
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tournaments (
+            tournament_id TEXT PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            admin_user_id INTEGER NOT NULL,
+            name TEXT,
+            created_at_utc INTEGER NOT NULL
         )
     ''')
 
@@ -96,13 +147,128 @@ def initialize_database(db_name: str):
             FOREIGN KEY (draft_id) REFERENCES drafts (draft_id) ON DELETE CASCADE
         )
     ''')
+
+    # Exports filter completed drafts by guild and creation time, and read
+    # each draft's picks in the order they were made
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_drafts_status_guild_created ON drafts (status, guild_id, created_at_utc)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_drafts_status_created ON drafts (status, created_at_utc)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_picks_draft ON player_picked_items (draft_id, id)")
+    # Channel listings read a channel's active drafts, newest first
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_drafts_channel_status ON drafts (channel_id, status, created_at_utc)")
+
+    # Pick statistics: counters kept up to date by create_draft, record_pick
+    # and update_draft_status, so the stats commands never scan the picks
+    stats_missing = not _table_exists(cursor, 'guild_pick_stats')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS guild_pick_stats (
+            guild_id INTEGER PRIMARY KEY,
+            drafts_started INTEGER NOT NULL DEFAULT 0,
+            drafts_with_picks INTEGER NOT NULL DEFAULT 0,
+            picks INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS item_pick_stats (
+            guild_id INTEGER NOT NULL,
+            category_name TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            picks INTEGER NOT NULL DEFAULT 0,
+            first_picks INTEGER NOT NULL DEFAULT 0, -- Times it was the first pick of a draft
+            pick_number_sum INTEGER NOT NULL DEFAULT 0, -- Sum of the 1-based pick numbers it went at
+            PRIMARY KEY (guild_id, category_name, item_name)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_pick_stats (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            drafts_started INTEGER NOT NULL DEFAULT 0,
+            drafts_completed INTEGER NOT NULL DEFAULT 0,
+            picks INTEGER NOT NULL DEFAULT 0,
+            first_picks INTEGER NOT NULL DEFAULT 0,
+            last_pick_utc INTEGER,
+            PRIMARY KEY (guild_id, user_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_item_stats (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            category_name TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            picks INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id, category_name, item_name)
+        )
+    ''')
+    # Start the counters from the history of databases that predate them
+    if stats_missing:
+        _rebuild_pick_stats(cursor)
     conn.commit()
     conn.close()
-    print(f"Database '{db_name}' initialized successfully.")
+    logger.info("Database '%s' initialized successfully.", db_name)
+
+
+def _add_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+    """Add a column that an older version of the table was created without."""
+    columns = {row['name'] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _table_exists(cursor: sqlite3.Cursor, table: str) -> bool:
+    return cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
 
 # --- Draft Creation and Management ---
 
 
+# (category, item) for every item a new draft starts with
+_INITIAL_ITEM_ROWS = [(category, item_name)
+                      for category, items in INITIAL_ITEMS_BY_CATEGORY.items()
+                      for item_name in items]
+
+
+def _insert_drafts(cursor: sqlite3.Cursor, guild_id: int, channel_id: int, admin_user_id: int,
+                   drafts: List[Dict[str, Any]], created_at_utc: int,
+                   tournament_id: Optional[str] = None):
+    """Insert drafts with their players and item pools, one batched statement per table.
+
+    Each entry of drafts holds its draft_id and create_draft's per-draft
+    arguments, by the same names.
+    """
+    cursor.executemany('''
+        INSERT INTO drafts (draft_id, guild_id, channel_id, admin_user_id, num_players,
+                            picks_allowed_per_player_per_category, total_picks_allotted_per_player,
+                            draft_order_player_indices_json, total_picks_to_make, created_at_utc,
+                            message_link, seed, tournament_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(draft['draft_id'], guild_id, channel_id, admin_user_id, len(draft['players_info']),
+           draft['picks_allowed_per_player_per_category'], draft['total_picks_allotted_per_player'],
+           json.dumps(draft['draft_order_player_indices']), draft['total_picks_to_make'],
+           created_at_utc, draft.get('message_link'), draft.get('seed'), tournament_id)
+          for draft in drafts])
+
+    cursor.executemany('''
+        INSERT INTO draft_players (draft_id, user_id, display_name, player_slot_index)
+        VALUES (?, ?, ?, ?)
+    ''', [(draft['draft_id'], user_id, display_name, i)
+          for draft in drafts
+          for i, (user_id, display_name) in enumerate(draft['players_info'])])
+
+    cursor.executemany('''
+        INSERT INTO draft_items (draft_id, category_name, item_name, is_available)
+        VALUES (?, ?, ?, 1)
+    ''', [(draft['draft_id'], category, item_name)
+          for draft in drafts
+          for category, item_name in _INITIAL_ITEM_ROWS])
+    _count_draft_players(cursor, guild_id, drafts)
+
+
+@metrics.timed('database')
 def create_draft(db_name: str, guild_id: int, channel_id: int, admin_user_id: int,
                  players_info: List[Tuple[int, str]],
                  picks_allowed_per_player_per_category: int,
@@ -117,42 +283,94 @@ def create_draft(db_name: str, guild_id: int, channel_id: int, admin_user_id: in
     try:
         # Get current UTC timestamp
         current_utc_timestamp = int(datetime.now(timezone.utc).timestamp())
+        _insert_drafts(cursor, guild_id, channel_id, admin_user_id, [{
+            'draft_id': draft_id,
+            'players_info': players_info,
+            'picks_allowed_per_player_per_category': picks_allowed_per_player_per_category,
+            'total_picks_allotted_per_player': total_picks_allotted_per_player,
+            'draft_order_player_indices': draft_order_player_indices,
+            'total_picks_to_make': total_picks_to_make,
+            'message_link': message_link,
+            'seed': seed,
+        }], current_utc_timestamp)
+        conn.commit()
+        return draft_id
+    except sqlite3.Error as e:
+        logger.error("Database error creating draft: %s", e)
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
 
-        cursor.execute('''
-            INSERT INTO drafts (draft_id, guild_id, channel_id, admin_user_id, num_players,
-                                picks_allowed_per_player_per_category, total_picks_allotted_per_player,
-                                draft_order_player_indices_json, total_picks_to_make, created_at_utc,
-                                message_link, seed)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (draft_id, guild_id, channel_id, admin_user_id, len(players_info),
-              picks_allowed_per_player_per_category, total_picks_allotted_per_player,
-              json.dumps(
-                  draft_order_player_indices), total_picks_to_make, current_utc_timestamp,
-              message_link, seed))
-
-        for i, (user_id, display_name) in enumerate(players_info):
-            cursor.execute('''
-                INSERT INTO draft_players (draft_id, user_id, display_name, player_slot_index)
-                VALUES (?, ?, ?, ?)
-            ''', (draft_id, user_id, display_name, i))
 
-        for category, items in INITIAL_ITEMS_BY_CATEGORY.items():
-            for item_name in items:
-                cursor.execute('''
-                    INSERT INTO draft_items (draft_id, category_name, item_name, is_available)
-                    VALUES (?, ?, ?, 1)
-                ''', (draft_id, category, item_name))
+@metrics.timed('database')
+def create_tournament(db_name: str, guild_id: int, channel_id: int, admin_user_id: int,
+                      drafts: List[Dict[str, Any]],
+                      name: Optional[str] = None) -> Optional[Tuple[str, List[str]]]:
+    """Create a tournament and all of its drafts in one transaction.
 
+    Each entry of drafts holds create_draft's per-draft arguments by name
+    (players_info, picks_allowed_per_player_per_category, ...). Returns the
+    tournament ID and the draft IDs in the order given, or None if nothing
+    was created.
+    """
+    tournament_id = uuid.uuid4().hex[:10]
+    drafts = [dict(draft, draft_id=uuid.uuid4().hex[:10]) for draft in drafts]
+    conn = get_db_connection(db_name)
+    cursor = conn.cursor()
+    try:
+        current_utc_timestamp = int(datetime.now(timezone.utc).timestamp())
+        cursor.execute('''
+            INSERT INTO tournaments (tournament_id, guild_id, channel_id, admin_user_id, name, created_at_utc)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (tournament_id, guild_id, channel_id, admin_user_id, name, current_utc_timestamp))
+        _insert_drafts(cursor, guild_id, channel_id, admin_user_id, drafts,
+                       current_utc_timestamp, tournament_id)
         conn.commit()
-        return draft_id
+        return tournament_id, [draft['draft_id'] for draft in drafts]
     except sqlite3.Error as e:
-        print(f"Database error creating draft: {e}")
+        logger.error("Database error creating tournament: %s", e)
         conn.rollback()
         return None
     finally:
         conn.close()
 
 
+@metrics.timed('database')
+def get_tournament(db_name: str, tournament_id: str) -> Optional[Dict[str, Any]]:
+    """A tournament with the progress and players of each of its drafts."""
+    conn = get_db_connection(db_name)
+    cursor = conn.cursor()
+    try:
+        row = cursor.execute(
+            "SELECT * FROM tournaments WHERE tournament_id = ?", (tournament_id,)).fetchone()
+        if not row:
+            return None
+        tournament = dict(row)
+
+        draft_rows = cursor.execute('''
+            SELECT draft_id, status, num_players, current_pick_global_index, total_picks_to_make,
+                   message_link
+            FROM drafts WHERE tournament_id = ? ORDER BY rowid
+        ''', (tournament_id,)).fetchall()
+        drafts = {row['draft_id']: dict(row, players=[]) for row in draft_rows}
+
+        player_rows = cursor.execute('''
+            SELECT dp.draft_id, dp.display_name
+            FROM draft_players dp JOIN drafts d ON d.draft_id = dp.draft_id
+            WHERE d.tournament_id = ?
+            ORDER BY dp.player_slot_index
+        ''', (tournament_id,)).fetchall()
+        for row in player_rows:
+            drafts[row['draft_id']]['players'].append(row['display_name'])
+
+        tournament['drafts'] = list(drafts.values())
+        return tournament
+    finally:
+        conn.close()
+
+
+@metrics.timed('database')
 def get_draft_state(db_name: str, draft_id: str) -> Optional[Dict[str, Any]]:
     conn = get_db_connection(db_name)
     cursor = conn.cursor()
@@ -203,6 +421,7 @@ def get_draft_state(db_name: str, draft_id: str) -> Optional[Dict[str, Any]]:
     return draft_state
 
 
+@metrics.timed('database')
 def record_pick(db_name: str, draft_id: str, user_id: int, category_name: str, item_name: str) -> bool:
     conn = get_db_connection(db_name)
     cursor = conn.cursor()
@@ -218,8 +437,7 @@ def record_pick(db_name: str, draft_id: str, user_id: int, category_name: str, i
 
         if cursor.rowcount == 0:  # Item was already unavailable or doesn't exist for this draft
             conn.rollback()
-            print(
-                f"Failed to mark item as unavailable (draft_id: {draft_id}, item: {item_name})")
+            logger.warning("Failed to mark item as unavailable (draft_id: %s, item: %s)", draft_id, item_name)
             return False
 
         # Record the pick
@@ -229,36 +447,51 @@ def record_pick(db_name: str, draft_id: str, user_id: int, category_name: str, i
         ''', (draft_id, user_id, category_name, item_name, current_utc_timestamp))
 
         # Advance draft turn
-        cursor.execute('''
+        draft_row = cursor.execute('''
             UPDATE drafts SET current_pick_global_index = current_pick_global_index + 1, last_event_message = NULL
             WHERE draft_id = ?
-        ''', (draft_id,))
+            RETURNING guild_id, current_pick_global_index
+        ''', (draft_id,)).fetchall()[0]
+
+        # The advanced index is this pick's 1-based number
+        _count_pick(cursor, draft_row['guild_id'], user_id, category_name, item_name,
+                    draft_row['current_pick_global_index'], current_utc_timestamp)
 
         conn.commit()
         return True
     except sqlite3.Error as e:
-        print(f"Database error recording pick: {e}")
+        logger.error("Database error recording pick: %s", e)
         conn.rollback()
         return False
     finally:
         conn.close()
 
 
+@metrics.timed('database')
 def update_draft_status(db_name: str, draft_id: str, status: str) -> bool:
+    """Set a draft's status; True only if it changed, so a repeated completion counts once."""
     conn = get_db_connection(db_name)
     cursor = conn.cursor()
     try:
         cursor.execute(
-            "UPDATE drafts SET status = ? WHERE draft_id = ?", (status, draft_id))
+            "UPDATE drafts SET status = ? WHERE draft_id = ? AND status != ?", (status, draft_id, status))
+        updated = cursor.rowcount > 0
+        if updated and status == 'completed':
+            cursor.execute('''
+                UPDATE player_pick_stats SET drafts_completed = drafts_completed + 1
+                WHERE guild_id = (SELECT guild_id FROM drafts WHERE draft_id = ?)
+                  AND user_id IN (SELECT user_id FROM draft_players WHERE draft_id = ?)
+            ''', (draft_id, draft_id))
         conn.commit()
-        return cursor.rowcount > 0
+        return updated
     except sqlite3.Error as e:
-        print(f"Database error updating draft status: {e}")
+        logger.error("Database error updating draft status: %s", e)
         return False
     finally:
         conn.close()
 
 
+@metrics.timed('database')
 def update_board_message_id(db_name: str, draft_id: str, message_id: Optional[int]):
     conn = get_db_connection(db_name)
     cursor = conn.cursor()
@@ -267,11 +500,12 @@ def update_board_message_id(db_name: str, draft_id: str, message_id: Optional[in
             "UPDATE drafts SET board_message_id = ? WHERE draft_id = ?", (message_id, draft_id))
         conn.commit()
     except sqlite3.Error as e:
-        print(f"DB error updating board message ID: {e}")
+        logger.error("DB error updating board message ID: %s", e)
     finally:
         conn.close()
 
 
+@metrics.timed('database')
 def update_last_event_message(db_name: str, draft_id: str, event_message: Optional[str]):
     conn = get_db_connection(db_name)
     cursor = conn.cursor()
@@ -280,11 +514,12 @@ def update_last_event_message(db_name: str, draft_id: str, event_message: Option
             "UPDATE drafts SET last_event_message = ? WHERE draft_id = ?", (event_message, draft_id))
         conn.commit()
     except sqlite3.Error as e:
-        print(f"DB error updating last event message: {e}")
+        logger.error("DB error updating last event message: %s", e)
     finally:
         conn.close()
 
 
+@metrics.timed('database')
 def get_active_drafts_in_channel(db_name: str, channel_id: int) -> List[Dict[str, Any]]:
     conn = get_db_connection(db_name)
     cursor = conn.cursor()
@@ -296,6 +531,74 @@ def get_active_drafts_in_channel(db_name: str, channel_id: int) -> List[Dict[str
     return [dict(row) for row in draft_rows]
 
 
+@metrics.timed('database')
+def get_channel_overview(db_name: str, channel_id: int) -> List[Dict[str, Any]]:
+    """Every active draft in the channel with its current turn, pick count and last pick.
+
+    One query, newest draft first. current_user_id is the player whose turn
+    it is; the last_pick_* columns are None before the first pick.
+    """
+    conn = get_db_connection(db_name)
+    cursor = conn.cursor()
+    try:
+        rows = cursor.execute('''
+            SELECT d.draft_id, d.admin_user_id, d.num_players, d.created_at_utc, d.message_link,
+                   d.tournament_id, d.current_pick_global_index, d.total_picks_to_make,
+                   current.user_id AS current_user_id, current.display_name AS current_player,
+                   last.user_id AS last_pick_user_id, last_player.display_name AS last_pick_player,
+                   last.category_name AS last_pick_category, last.item_name AS last_pick_item,
+                   last.pick_timestamp AS last_pick_utc
+            FROM drafts d
+            LEFT JOIN draft_players current
+                ON current.draft_id = d.draft_id
+               AND current.player_slot_index = json_extract(
+                       d.draft_order_player_indices_json, '$[' || d.current_pick_global_index || ']')
+            LEFT JOIN player_picked_items last
+                ON last.id = (SELECT MAX(id) FROM player_picked_items WHERE draft_id = d.draft_id)
+            LEFT JOIN draft_players last_player
+                ON last_player.draft_id = d.draft_id AND last_player.user_id = last.user_id
+            WHERE d.channel_id = ? AND d.status = 'active'
+            ORDER BY d.created_at_utc DESC
+        ''', (channel_id,)).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+@metrics.timed('database')
+def get_indexed_drafts(db_name: str, recent_per_channel: int) -> List[Dict[str, Any]]:
+    """Every active draft and each channel's most recent finished ones, with their players.
+
+    Loads the draft_id autocomplete index in one query at start-up.
+    """
+    conn = get_db_connection(db_name)
+    cursor = conn.cursor()
+    try:
+        rows = cursor.execute('''
+            WITH ranked AS (
+                SELECT draft_id, channel_id, status, created_at_utc,
+                       ROW_NUMBER() OVER (PARTITION BY channel_id, status = 'active'
+                                          ORDER BY created_at_utc DESC) AS recency
+                FROM drafts
+            )
+            SELECT r.draft_id, r.channel_id, r.status, r.created_at_utc, dp.user_id, dp.display_name
+            FROM ranked r
+            JOIN draft_players dp ON dp.draft_id = r.draft_id
+            WHERE r.status = 'active' OR r.recency <= ?
+            ORDER BY r.draft_id, dp.player_slot_index
+        ''', (recent_per_channel,)).fetchall()
+        drafts: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            draft = drafts.setdefault(row['draft_id'], {
+                'draft_id': row['draft_id'], 'channel_id': row['channel_id'], 'status': row['status'],
+                'created_at_utc': row['created_at_utc'], 'players': []})
+            draft['players'].append((row['user_id'], row['display_name']))
+        return list(drafts.values())
+    finally:
+        conn.close()
+
+
+@metrics.timed('database')
 def get_player_name_by_id(db_name: str, draft_id: str, user_id: int) -> Optional[str]:
     """Helper to get a player's display name for a specific draft."""
     conn = get_db_connection(db_name)
@@ -306,6 +609,7 @@ def get_player_name_by_id(db_name: str, draft_id: str, user_id: int) -> Optional
     return row['display_name'] if row else None
 
 
+@metrics.timed('database')
 def get_user_recent_drafts(db_name: str, user_id: int, limit: int = 5) -> List[Dict[str, Any]]:
     """Get a user's recent drafts, ordered by most recent first."""
     conn = get_db_connection(db_name)
@@ -327,6 +631,7 @@ def get_user_recent_drafts(db_name: str, user_id: int, limit: int = 5) -> List[D
     return drafts
 
 
+@metrics.timed('database')
 def update_message_link(db_name: str, draft_id: str, message_link: Optional[str]) -> bool:
     """Update the message link for a draft."""
     conn = get_db_connection(db_name)
@@ -339,12 +644,13 @@ def update_message_link(db_name: str, draft_id: str, message_link: Optional[str]
         conn.commit()
         return cursor.rowcount > 0
     except sqlite3.Error as e:
-        print(f"Database error updating message link: {e}")
+        logger.error("Database error updating message link: %s", e)
         return False
     finally:
         conn.close()
 
 
+@metrics.timed('database')
 def get_recent_picks(db_name: str, draft_id: str, limit: int = 10) -> list:
     """Get the most recent picks for a draft."""
     conn = get_db_connection(db_name)
@@ -372,6 +678,7 @@ def get_recent_picks(db_name: str, draft_id: str, limit: int = 10) -> list:
         conn.close()
 
 
+@metrics.timed('database')
 def get_minecraft_username(db_name: str, discord_id: int) -> Optional[str]:
     """Get a user's Minecraft username."""
     conn = get_db_connection(db_name)
@@ -387,6 +694,7 @@ def get_minecraft_username(db_name: str, discord_id: int) -> Optional[str]:
         conn.close()
 
 
+@metrics.timed('database')
 def set_minecraft_username(db_name: str, discord_id: int, minecraft_username: Optional[str]) -> bool:
     """Set, update, or remove a user's Minecraft username."""
     conn = get_db_connection(db_name)
@@ -411,7 +719,188 @@ def set_minecraft_username(db_name: str, discord_id: int, minecraft_username: Op
         conn.commit()
         return True
     except sqlite3.Error as e:
-        print(f"Database error setting Minecraft username: {e}")
+        logger.error("Database error setting Minecraft username: %s", e)
+        return False
+    finally:
+        conn.close()
+
+
+# --- Pick Statistics ---
+
+
+def _count_draft_players(cursor: sqlite3.Cursor, guild_id: int, drafts: List[Dict[str, Any]]):
+    """Count newly created drafts, and each of their players, as started."""
+    cursor.execute('''
+        INSERT INTO guild_pick_stats (guild_id, drafts_started) VALUES (?, ?)
+        ON CONFLICT(guild_id) DO UPDATE SET drafts_started = drafts_started + excluded.drafts_started
+    ''', (guild_id, len(drafts)))
+    cursor.executemany('''
+        INSERT INTO player_pick_stats (guild_id, user_id, drafts_started) VALUES (?, ?, 1)
+        ON CONFLICT(guild_id, user_id) DO UPDATE SET drafts_started = drafts_started + 1
+    ''', [(guild_id, user_id) for draft in drafts for user_id, _ in draft['players_info']])
+
+
+def _count_pick(cursor: sqlite3.Cursor, guild_id: int, user_id: int, category_name: str,
+                item_name: str, pick_number: int, pick_timestamp: int):
+    """Add one pick, the pick_number'th of its draft, to the counters."""
+    first_pick = 1 if pick_number == 1 else 0
+    cursor.execute('''
+        INSERT INTO item_pick_stats (guild_id, category_name, item_name, picks, first_picks, pick_number_sum)
+        VALUES (?, ?, ?, 1, ?, ?)
+        ON CONFLICT(guild_id, category_name, item_name) DO UPDATE SET
+            picks = picks + 1,
+            first_picks = first_picks + excluded.first_picks,
+            pick_number_sum = pick_number_sum + excluded.pick_number_sum
+    ''', (guild_id, category_name, item_name, first_pick, pick_number))
+    cursor.execute('''
+        INSERT INTO player_pick_stats (guild_id, user_id, picks, first_picks, last_pick_utc)
+        VALUES (?, ?, 1, ?, ?)
+        ON CONFLICT(guild_id, user_id) DO UPDATE SET
+            picks = picks + 1,
+            first_picks = first_picks + excluded.first_picks,
+            last_pick_utc = excluded.last_pick_utc
+    ''', (guild_id, user_id, first_pick, pick_timestamp))
+    cursor.execute('''
+        INSERT INTO player_item_stats (guild_id, user_id, category_name, item_name, picks)
+        VALUES (?, ?, ?, ?, 1)
+        ON CONFLICT(guild_id, user_id, category_name, item_name) DO UPDATE SET picks = picks + 1
+    ''', (guild_id, user_id, category_name, item_name))
+    cursor.execute('''
+        INSERT INTO guild_pick_stats (guild_id, drafts_with_picks, picks) VALUES (?, ?, 1)
+        ON CONFLICT(guild_id) DO UPDATE SET
+            drafts_with_picks = drafts_with_picks + excluded.drafts_with_picks,
+            picks = picks + 1
+    ''', (guild_id, first_pick))
+
+
+def _rebuild_pick_stats(cursor: sqlite3.Cursor):
+    """Recompute every counter from the drafts, players and picks tables."""
+    for table in ('guild_pick_stats', 'item_pick_stats', 'player_pick_stats', 'player_item_stats'):
+        cursor.execute(f"DELETE FROM {table}")
+
+    numbered_picks = '''
+        WITH numbered AS (
+            SELECT d.guild_id, p.user_id, p.category_name, p.item_name, p.pick_timestamp,
+                   ROW_NUMBER() OVER (PARTITION BY p.draft_id ORDER BY p.id) AS pick_number
+            FROM player_picked_items p JOIN drafts d ON d.draft_id = p.draft_id
+        )
+    '''
+    cursor.execute('''
+        INSERT INTO guild_pick_stats (guild_id, drafts_started, drafts_with_picks, picks)
+        SELECT d.guild_id, COUNT(*), COUNT(counts.draft_id), COALESCE(SUM(counts.picks), 0)
+        FROM drafts d
+        LEFT JOIN (SELECT draft_id, COUNT(*) AS picks FROM player_picked_items GROUP BY draft_id) counts
+            ON counts.draft_id = d.draft_id
+        GROUP BY d.guild_id
+    ''')
+    cursor.execute(numbered_picks + '''
+        INSERT INTO item_pick_stats (guild_id, category_name, item_name, picks, first_picks, pick_number_sum)
+        SELECT guild_id, category_name, item_name, COUNT(*), SUM(pick_number = 1), SUM(pick_number)
+        FROM numbered GROUP BY guild_id, category_name, item_name
+    ''')
+    cursor.execute('''
+        INSERT INTO player_pick_stats (guild_id, user_id, drafts_started, drafts_completed)
+        SELECT d.guild_id, dp.user_id, COUNT(*), SUM(d.status = 'completed')
+        FROM draft_players dp JOIN drafts d ON d.draft_id = dp.draft_id
+        GROUP BY d.guild_id, dp.user_id
+    ''')
+    # "WHERE true" keeps SQLite from reading ON CONFLICT as a join constraint
+    cursor.execute(numbered_picks + '''
+        INSERT INTO player_pick_stats (guild_id, user_id, picks, first_picks, last_pick_utc)
+        SELECT guild_id, user_id, COUNT(*), SUM(pick_number = 1), MAX(pick_timestamp)
+        FROM numbered WHERE true GROUP BY guild_id, user_id
+        ON CONFLICT(guild_id, user_id) DO UPDATE SET
+            picks = excluded.picks,
+            first_picks = excluded.first_picks,
+            last_pick_utc = excluded.last_pick_utc
+    ''')
+    cursor.execute(numbered_picks + '''
+        INSERT INTO player_item_stats (guild_id, user_id, category_name, item_name, picks)
+        SELECT guild_id, user_id, category_name, item_name, COUNT(*)
+        FROM numbered GROUP BY guild_id, user_id, category_name, item_name
+    ''')
+
+
+@metrics.timed('database')
+def rebuild_pick_stats(db_name: str) -> bool:
+    """Recompute the pick statistics from scratch, in one transaction.
+
+    Holds the write lock throughout; other writes wait for it up to their
+    busy timeout, so the bot stops taking picks while this runs.
+    """
+    conn = get_db_connection(db_name, timeout=REBUILD_BUSY_TIMEOUT)
+    cursor = conn.cursor()
+    try:
+        _rebuild_pick_stats(cursor)
+        conn.commit()
+        return True
+    except sqlite3.Error as e:
+        logger.error("Database error rebuilding pick stats: %s", e)
+        conn.rollback()
         return False
     finally:
         conn.close()
+
+
+# Orderings offered by get_item_stats
+ITEM_STATS_ORDERS = {
+    'picks': "picks DESC",
+    'first_picks': "first_picks DESC, picks DESC",
+    'average_pick': "CAST(pick_number_sum AS REAL) / picks ASC, picks DESC",
+}
+
+
+@metrics.timed('database')
+def get_item_stats(db_name: str, guild_id: int, category_name: Optional[str] = None,
+                   order: str = 'picks', limit: int = 10) -> Dict[str, Any]:
+    """The guild's most picked items (or by first picks, or earliest average pick).
+
+    Returns the number of drafts with at least one pick, the denominator of
+    each item's pick rate, and the items.
+    """
+    conn = get_db_connection(db_name)
+    cursor = conn.cursor()
+    try:
+        totals = cursor.execute(
+            "SELECT drafts_with_picks, picks FROM guild_pick_stats WHERE guild_id = ?", (guild_id,)).fetchone()
+        conditions, params = ["guild_id = ?"], [guild_id]
+        if category_name:
+            conditions.append("category_name = ?")
+            params.append(category_name)
+        rows = cursor.execute(f'''
+            SELECT category_name, item_name, picks, first_picks, pick_number_sum
+            FROM item_pick_stats WHERE {" AND ".join(conditions)}
+            ORDER BY {ITEM_STATS_ORDERS[order]}, category_name, item_name
+            LIMIT ?
+        ''', (*params, limit)).fetchall()
+        return {
+            'drafts_with_picks': totals['drafts_with_picks'] if totals else 0,
+            'picks': totals['picks'] if totals else 0,
+            'items': [dict(row) for row in rows],
+        }
+    finally:
+        conn.close()
+
+
+@metrics.timed('database')
+def get_player_stats(db_name: str, guild_id: int, user_id: int,
+                     favourite_limit: int = 5) -> Optional[Dict[str, Any]]:
+    """A player's draft and pick counters in a guild, with their most picked items."""
+    conn = get_db_connection(db_name)
+    cursor = conn.cursor()
+    try:
+        row = cursor.execute(
+            "SELECT * FROM player_pick_stats WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)).fetchone()
+        if not row:
+            return None
+        stats = dict(row)
+        favourites = cursor.execute('''
+            SELECT category_name, item_name, picks FROM player_item_stats
+            WHERE guild_id = ? AND user_id = ?
+            ORDER BY picks DESC, category_name, item_name
+            LIMIT ?
+        ''', (guild_id, user_id, favourite_limit)).fetchall()
+        stats['favourite_items'] = [dict(favourite) for favourite in favourites]
+        return stats
+    finally:
+        conn.close()
@@ -0,0 +1,193 @@
+"""In-memory cache of finished datapack archives.
+
+A datapack only depends on which items went into it and on the upstream asset
+index, so archives are keyed by a fingerprint of the sorted item ids plus the
+index version. Players who end up with the same item set share one archive,
+however many drafts they come from.
+"""
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from items import DraftItem, get_draft_item_by_name
+
+if TYPE_CHECKING:
+    import aiohttp
+
+DEFAULT_MAX_BYTES = int(os.getenv('DRAAFT_DATAPACK_CACHE_MAX_MB', '32')) * 1024 * 1024
+
+_default_cache = None
+
+
+def item_set_fingerprint(items: Iterable[DraftItem], index_version: str, variant: str = "") -> str:
+    """Identify the datapack for a set of items built from one index version.
+
+    variant distinguishes builds of the same items that produce different
+    bytes, such as other compression settings.
+    """
+    ids = sorted(item.id for item in items)
+    key = ",".join(str(item_id) for item_id in ids) + "@" + index_version + variant
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def canonical_items(items: Iterable[DraftItem]) -> List[DraftItem]:
+    """Items in catalog order, so the same set always produces the same archive."""
+    return sorted(set(items), key=lambda item: item.id)
+
+
+def player_items(draft_state: Dict[str, Any], player_id: int) -> List[DraftItem]:
+    """The catalog items a player picked in a draft."""
+    picks = draft_state['drafted_items_by_player'].get(player_id, {})
+    drafted = []
+    for category_name in draft_state['categories_order']:
+        for item_name in picks.get(category_name, []):
+            item = get_draft_item_by_name(item_name)
+            if item is None:
+                raise ValueError(f"Unknown item '{item_name}' in draft {draft_state['draft_id']}")
+            drafted.append(item)
+    return drafted
+
+
+class DatapackCache:
+    """Finished archives with a total size budget and least-recently-used eviction."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Builds in progress, so concurrent misses for one key build once
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self.entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Store an archive; archives larger than the whole budget are not kept."""
+        if key in self.entries:
+            self.total_bytes -= len(self.entries.pop(key))
+        if len(data) > self.max_bytes:
+            return
+        self.entries[key] = data
+        self.total_bytes += len(data)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    async def get_or_build(self, items: Iterable[DraftItem],
+                           session: Optional['aiohttp.ClientSession'] = None,
+                           **generator_kwargs) -> bytes:
+        """Return the archive for an item set, building it on a miss.
+
+        The upstream index is fetched first (from the asset cache while it is
+        fresh) since its version is part of the key; a miss reuses it for the
+        build. generator_kwargs are passed on to DatapackGenerator.
+        """
+        import aiohttp
+
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.get_or_build(items, session, **generator_kwargs)
+
+        from datapack_generator import DatapackGenerator
+
+        drafted = canonical_items(items)
+        generator = DatapackGenerator("cached", drafted, **generator_kwargs)
+        key = item_set_fingerprint(drafted, await generator.fetch_index_version(session),
+                                   repr((tuple(generator.compression), generator.normalize)))
+
+        data = self.get(key)
+        if data is not None:
+            return data
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            data = await generator.generate_datapack(session)
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+        self.put(key, data)
+        future.set_result(data)
+        return data
+
+
+def get_default_datapack_cache() -> DatapackCache:
+    """The process-wide cache sized from DRAAFT_DATAPACK_CACHE_MAX_MB."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DatapackCache()
+    return _default_cache
+
+
+async def get_player_datapack(draft_state: Dict[str, Any], player_id: int,
+                              cache: Optional[DatapackCache] = None,
+                              session: Optional['aiohttp.ClientSession'] = None,
+                              **generator_kwargs) -> Tuple[str, bytes]:
+    """Look up or generate a player's datapack for a completed draft.
+
+    Returns the archive's filename and contents.
+    """
+    if draft_state['status'] != 'completed':
+        raise ValueError(f"Draft {draft_state['draft_id']} is not completed")
+    player_name = next((name for p_id, name in draft_state['players'] if p_id == player_id), None)
+    if player_name is None:
+        raise ValueError(f"Player {player_id} is not part of draft {draft_state['draft_id']}")
+
+    cache = cache or get_default_datapack_cache()
+    data = await cache.get_or_build(player_items(draft_state, player_id), session, **generator_kwargs)
+    safe_name = re.sub(r'[^A-Za-z0-9_-]+', '_', player_name)
+    return f"draaft_{draft_state['draft_id']}_{safe_name}.zip", data
+
+
+async def build_draft_datapacks(draft_state: Dict[str, Any],
+                                cache: Optional[DatapackCache] = None,
+                                **generator_kwargs) -> Dict[int, Tuple[str, bytes]]:
+    """Build every player's datapack for a completed draft in parallel.
+
+    The builds share one HTTP session and one SharedDownloads, so the index
+    and every asset are fetched once however many players there are, and
+    compression runs in the generator's executor. Returns player id ->
+    (filename, contents).
+    """
+    import aiohttp
+    from datapack_generator import SharedDownloads
+
+    generator_kwargs.setdefault('shared_downloads', SharedDownloads())
+    player_ids = [player_id for player_id, _ in draft_state['players']]
+    async with aiohttp.ClientSession() as session:
+        packs = await asyncio.gather(*[
+            get_player_datapack(draft_state, player_id, cache, session, **generator_kwargs)
+            for player_id in player_ids])
+    return dict(zip(player_ids, packs))
@@ -1,103 +1,373 @@
-import aiohttp
 import asyncio
+import inspect
+import os
 import zipfile
+from collections import deque
+from concurrent.futures import Executor
 from io import BytesIO
-from datetime import datetime
-from typing import List, Dict, Any, Optional
-import os
-from items import DraftItem
+from tempfile import SpooledTemporaryFile
+from typing import (List, Dict, Any, Optional, Tuple, Mapping, AsyncIterator, Awaitable, BinaryIO,
+                    Callable, Deque, Hashable, Union, TYPE_CHECKING)
+from items import DraftItem, all_items
+from datapack_ops import compile_plan
+from asset_cache import AssetCache
+from normalize import normalize_file
+from base_pack import (BasePack, CompressionSettings, DEFAULT_COMPRESSION, PrecompressedEntry, compress_entry,
+                       content_digest, write_precompressed, index_version, is_overlay_file,
+                       catalog_file_queries, get_or_create_base_pack)
+
+if TYPE_CHECKING:
+    import aiohttp
+
+DEFAULT_BASE_URL = os.getenv('DRAAFT_ASSET_BASE_URL', "https://disrespec.tech")
+MAX_CONCURRENT_DOWNLOADS = 8
+DOWNLOAD_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+# Statuses worth retrying; anything else non-200 fails the build immediately
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+# Spooled builds stay in memory up to this size, then move to a temp file
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+# Pluggable transport: (url, request headers) -> (status, body, response headers).
+# Lets builds run against fixtures without HTTP; raise aiohttp.ClientError or
+# asyncio.TimeoutError for failures that should be retried.
+Fetcher = Callable[[str, Dict[str, str]], Awaitable[Tuple[int, bytes, Mapping[str, str]]]]
+
+
+class _RetryableDownloadError(Exception):
+    pass
+
+
+def _index_filename(line: str) -> str:
+    """The path inside the datapack of an index line, without its top-level folder."""
+    return line[line.find('/') + 1:] if '/' in line else line
+
+
+class SharedDownloads:
+    """Downloads and base pack entries shared by the builds of one batch.
+
+    The first build to ask for a key starts the work; the others await the
+    same task. Tasks are shielded so one build being cancelled does not fail
+    the rest.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+
+    async def get(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(factory())
+        return await asyncio.shield(task)
 
 
 class DatapackGenerator:
-    def __init__(self, draft_name: str, drafted_items: List[DraftItem]):
+    def __init__(self, draft_name: str, drafted_items: List[DraftItem],
+                 base_url: str = DEFAULT_BASE_URL,
+                 max_concurrency: int = MAX_CONCURRENT_DOWNLOADS,
+                 retries: int = DOWNLOAD_RETRIES,
+                 retry_backoff: float = RETRY_BACKOFF_SECONDS,
+                 asset_cache: Optional[AssetCache] = None,
+                 shared_downloads: Optional[SharedDownloads] = None,
+                 executor: Optional[Executor] = None,
+                 compression: CompressionSettings = DEFAULT_COMPRESSION,
+                 fetcher: Optional[Fetcher] = None,
+                 normalize: bool = True):
         self.draft_name = draft_name
         self.drafted_items = drafted_items
-        self.base_url = "https://disrespec.tech"
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.asset_cache = asset_cache
+        self.shared_downloads = shared_downloads
+        # Compression runs here (None: the loop's default thread pool)
+        self.executor = executor
+        self.compression = compression
+        # Replaces the aiohttp session for every request when set
+        self.fetcher = fetcher
+        # Minify and validate files before they are zipped
+        self.normalize = normalize
+        # Whether cached assets must be revalidated for the current build
+        self._revalidate_assets = True
+        # Index fetched ahead of the build by fetch_index_version()
+        self._index_content: Optional[str] = None
+        # Compiled once per item set; loads the item payloads on first use
+        self.plan = compile_plan(drafted_items)
+        # filename -> text the plan appends to it, built from each build's index
+        self._dispatch: Optional[Dict[str, str]] = None
+        # Files matching any of these may differ between drafts
+        self.catalog_queries = catalog_file_queries(all_items)
+
+    async def _fetch_once(self, session: Optional['aiohttp.ClientSession'], url: str,
+                          headers: Dict[str, str]) -> Tuple[int, bytes, Mapping[str, str]]:
+        if self.fetcher is not None:
+            return await self.fetcher(url, headers)
+        async with session.get(url, headers=headers) as response:
+            body = await response.read() if response.status == 200 else b''
+            return response.status, body, response.headers
+
+    async def _get(self, session: Optional['aiohttp.ClientSession'], url: str,
+                   headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes, Mapping[str, str]]:
+        """GET a URL, retrying transient failures with backoff. Returns 200 or 304 responses."""
+        import aiohttp
+
+        for attempt in range(self.retries + 1):
+            try:
+                status, body, response_headers = await self._fetch_once(session, url, headers or {})
+                if status in (200, 304):
+                    return status, body, response_headers
+                if status not in RETRYABLE_STATUSES:
+                    raise Exception(f"Failed to download {url}: HTTP {status}")
+                raise _RetryableDownloadError(f"Failed to download {url}: HTTP {status}")
+            except (_RetryableDownloadError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise Exception(
+                        f"{e} (gave up after {attempt + 1} attempts)") from e
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+    async def download_file(self, session: 'aiohttp.ClientSession', url: str, revalidate: bool = True) -> bytes:
+        """Download a file from the given URL, going through the asset cache if there is one."""
+        if self.shared_downloads is not None:
+            return await self.shared_downloads.get(
+                ('file', url), lambda: self._download_file(session, url, revalidate))
+        return await self._download_file(session, url, revalidate)
 
-    async def download_file(self, session: aiohttp.ClientSession, url: str) -> bytes:
-        """Download a file from the given URL."""
-        async with session.get(url) as response:
-            if response.status == 200:
-                return await response.read()
-            raise Exception(
-                f"Failed to download {url}: HTTP {response.status}")
+    async def _download_file(self, session: 'aiohttp.ClientSession', url: str, revalidate: bool) -> bytes:
+        cache = self.asset_cache
+        if cache is None:
+            _, body, _ = await self._get(session, url)
+            return body
 
-    async def download_mcfunction(self, session: aiohttp.ClientSession, url: str, filename: str) -> bytes:
+        if cache.offline or (not revalidate and cache.has(url)):
+            return cache.read(url)
+
+        status, body, headers = await self._get(session, url, cache.conditional_headers(url))
+        if status == 304:
+            cache.mark_validated(url)
+            return cache.read(url)
+        cache.store(url, body, headers)
+        return body
+
+    async def download_index(self, session: 'aiohttp.ClientSession') -> str:
+        """Download the asset index and decide whether cached assets need revalidating."""
+        index_url = f"{self.base_url}/assets/draaft/index.txt"
+        cache = self.asset_cache
+        if cache is None:
+            return (await self.download_file(session, index_url)).decode('utf-8')
+
+        # While the index is fresh the whole tree is served from disk; once it
+        # is stale every cached file is revalidated with a conditional request
+        fresh = cache.is_fresh(index_url, cache.index_max_age)
+        self._revalidate_assets = not fresh
+        content = await self.download_file(session, index_url, revalidate=not fresh)
+        return content.decode('utf-8')
+
+    async def fetch_index_version(self, session: 'aiohttp.ClientSession') -> str:
+        """Download the index ahead of the build and return its version."""
+        self._index_content = await self.download_index(session)
+        return index_version(self._index_content)
+
+    async def download_mcfunction(self, session: 'aiohttp.ClientSession', url: str, filename: str) -> bytes:
         """Download and process an mcfunction file."""
-        content = await self.download_file(session, url)
+        content = await self.download_file(session, url, self._revalidate_assets)
         return self.update_file(content.decode('utf-8'), filename)
 
     def update_file(self, content: str, filename: str) -> bytes:
         """Update the content of an mcfunction file based on drafted items."""
-        for item in self.drafted_items:
-            if filename == "on_load.mcfunction":
-                if item.file_query is None:
-                    content = item.datapack_modifier(content)
-            elif item.file_query is not None and item.file_query in filename:
-                content = item.datapack_modifier(content)
+        return self.plan.apply(content, filename, self._dispatch).encode('utf-8')
 
-        return content.encode('utf-8')
+    def prepare(self, filename: str, content: bytes) -> bytes:
+        """Normalize and validate a file's final contents; raises DatapackValidationError."""
+        if not self.normalize:
+            return content
+        return normalize_file(filename, content)
 
-    async def generate_datapack(self) -> bytes:
-        """Generate the datapack ZIP file."""
-        async with aiohttp.ClientSession() as session:
-            # Get the index file
-            index_url = f"{self.base_url}/assets/draaft/index.txt"
-            async with session.get(index_url) as response:
-                if response.status != 200:
-                    raise Exception(
-                        f"Failed to download index: HTTP {response.status}")
-                index_content = await response.text()
+    async def compress(self, filename: str, content: bytes) -> PrecompressedEntry:
+        """Deflate one file off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, compress_entry, filename, content, self.compression)
 
-            # Process all files from the index
-            all_files = []
-            for line in index_content.split('\n'):
-                if not line.strip():
-                    continue
+    async def _download_entry(self, session: 'aiohttp.ClientSession', line: str,
+                              base_pack: BasePack, trust_base_pack: bool) -> Dict[str, Any]:
+        """Produce one index entry as a pre-compressed entry ready to copy into the ZIP.
 
-                file_url = f"{self.base_url}/assets/draaft/{line}"
-                filename = line[line.find('/') + 1:] if '/' in line else line
+        Draft-independent files come from the base pack and are only
+        (re)compressed when missing or when upstream content changed since
+        they were added; files a draft can change are downloaded and
+        processed for this draft.
+        """
+        filename = _index_filename(line)
+        file_url = f"{self.base_url}/assets/draaft/{line}"
 
-                if filename.endswith('.mcfunction'):
-                    content = await self.download_mcfunction(session, file_url, filename)
+        if not is_overlay_file(filename, self.catalog_queries):
+            entry = base_pack.get(filename)
+            if entry is None or not trust_base_pack:
+                if self.shared_downloads is not None:
+                    entry = await self.shared_downloads.get(
+                        ('entry', file_url), lambda: self._base_entry(session, file_url, filename, base_pack))
                 else:
-                    content = await self.download_file(session, file_url)
-
-                all_files.append({
-                    'name': filename,
-                    'last_modified': datetime.now(),
-                    'content': content
-                })
-
-            # Add files for drafted items
-            for item in self.drafted_items:
-                if item.file_query and item.file_query.startswith('draaftpack/'):
-                    filename = item.file_query[item.file_query.find('/') + 1:]
-                    content = item.datapack_modifier('').encode('utf-8')
-                    all_files.append({
-                        'name': filename,
-                        'last_modified': datetime.now(),
-                        'content': content
-                    })
-
-            # Create ZIP file in memory
-            zip_buffer = BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for file_data in all_files:
-                    zip_file.writestr(file_data['name'], file_data['content'])
-
-            return zip_buffer.getvalue()
+                    entry = await self._base_entry(session, file_url, filename, base_pack)
+            return {'name': filename, 'entry': entry}
+
+        if filename.endswith('.mcfunction'):
+            content = await self.download_mcfunction(session, file_url, filename)
+        else:
+            content = await self.download_file(session, file_url, self._revalidate_assets)
+        content = self.prepare(filename, content)
+        return {'name': filename, 'entry': await self.compress(filename, content)}
+
+    async def _base_entry(self, session: 'aiohttp.ClientSession', file_url: str, filename: str,
+                          base_pack: BasePack) -> PrecompressedEntry:
+        content = self.prepare(filename, await self.download_file(session, file_url, self._revalidate_assets))
+        entry = base_pack.get(filename)
+        if entry is None or entry.source_digest != content_digest(content):
+            entry = base_pack.add(await self.compress(filename, content))
+        return entry
+
+    async def iter_files(self, session: 'aiohttp.ClientSession') -> AsyncIterator[Dict[str, Any]]:
+        """Yield every file of the datapack as a pre-compressed entry as soon as it is ready.
+
+        Entries come in a fixed order: the index's files in index order, then
+        the files generated for drafted items sorted by name.
+
+        Downloads run in a sliding window of max_concurrency requests, so at
+        most that many finished files are held in memory waiting for their
+        turn, however large the pack is.
+        """
+        index_content = self._index_content
+        if index_content is None:
+            index_content = await self.download_index(session)
+        self._index_content = None
+        lines = [line for line in index_content.split('\n') if line.strip()]
+        self._dispatch = self.plan.dispatch(_index_filename(line) for line in lines)
+
+        # Files no draft changes are compressed once per index version. The
+        # index only lists paths, so a complete base pack is only used as is
+        # while the asset cache vouches for the files behind it; otherwise
+        # every file is downloaded again and only changed files are
+        # recompressed.
+        base_pack = get_or_create_base_pack(
+            (self.base_url, index_version(index_content), self.compression, self.normalize))
+        trust_base_pack = (base_pack.complete and self.asset_cache is not None
+                           and not self._revalidate_assets)
+
+        window: Deque[asyncio.Task] = deque()
+        try:
+            for line in lines:
+                window.append(asyncio.ensure_future(
+                    self._download_entry(session, line, base_pack, trust_base_pack)))
+                if len(window) >= self.max_concurrency:
+                    yield await window.popleft()
+            while window:
+                yield await window.popleft()
+            base_pack.complete = True
+        finally:
+            for task in window:
+                task.cancel()
+            # Wait for the cancelled downloads to stop, and retrieve the
+            # exceptions of any that had already failed
+            await asyncio.gather(*window, return_exceptions=True)
+            if self.asset_cache is not None:
+                self.asset_cache.save()
+
+        # Add files for drafted items
+        for filename, content in sorted(self.plan.generated_files):
+            content = self.prepare(filename, content.encode('utf-8'))
+            yield {'name': filename, 'entry': await self.compress(filename, content)}
+
+    async def stream_datapack(self, target: Union[str, BinaryIO, Any],
+                              session: Optional['aiohttp.ClientSession'] = None) -> None:
+        """Write the datapack ZIP into target entry by entry as files arrive.
+
+        target may be a file path, a binary file object (regular, spooled or
+        non-seekable) or an async stream: either an asyncio-style writer with
+        write()/drain() or an object whose write() is a coroutine. A session
+        can be passed in to share its connections between builds.
+        """
+        import aiohttp
+
+        if isinstance(target, str):
+            # Write next to the destination and move into place once complete
+            tmp_path = target + '.part'
+            try:
+                with open(tmp_path, 'wb') as f:
+                    await self.stream_datapack(f, session)
+                os.replace(tmp_path, target)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return
+
+        if session is None and self.fetcher is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.stream_datapack(target, session)
+
+        sink = _AsyncSink(target) if _is_async_stream(target) else None
+        with zipfile.ZipFile(sink or target, 'w') as zip_file:
+            async for file_data in self.iter_files(session):
+                write_precompressed(zip_file, file_data['entry'])
+                if sink:
+                    await sink.drain()
+        if sink:
+            # The central directory is written when the ZipFile closes
+            await sink.drain()
+
+    async def generate_datapack(self, session: Optional['aiohttp.ClientSession'] = None) -> bytes:
+        """Generate the datapack ZIP file."""
+        zip_buffer = BytesIO()
+        await self.stream_datapack(zip_buffer, session)
+        return zip_buffer.getvalue()
+
+    async def generate_datapack_spooled(self, max_memory: int = SPOOL_MAX_MEMORY) -> SpooledTemporaryFile:
+        """Generate the datapack into a spooled temp file, rewound and ready to read."""
+        spooled = SpooledTemporaryFile(max_size=max_memory)
+        await self.stream_datapack(spooled)
+        spooled.seek(0)
+        return spooled
 
     async def save_datapack(self, output_dir: str = '.') -> str:
         """Generate and save the datapack to a file."""
-        zip_data = await self.generate_datapack()
         output_filename = f"draaft_{self.draft_name}.zip"
         output_path = os.path.join(output_dir, output_filename)
+        await self.stream_datapack(output_path)
+        return output_path
 
-        with open(output_path, 'wb') as f:
-            f.write(zip_data)
 
-        return output_path
+def _is_async_stream(target: Any) -> bool:
+    return hasattr(target, 'drain') or inspect.iscoroutinefunction(getattr(target, 'write', None))
+
+
+class _AsyncSink:
+    """A write-only file object zipfile can write into, drained to an async stream."""
+
+    def __init__(self, stream: Any):
+        self.stream = stream
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    async def drain(self):
+        if not self.chunks:
+            return
+        data = b''.join(self.chunks)
+        self.chunks = []
+        if hasattr(self.stream, 'drain'):
+            self.stream.write(data)
+            await self.stream.drain()
+        else:
+            await self.stream.write(data)
 
 # Example usage:
 # generator = DatapackGenerator("my_draft", [draft_item1, draft_item2, draft_item3])
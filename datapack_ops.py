@@ -0,0 +1,172 @@
+"""Declarative datapack operations and the plan compiled from them.
+
+Items describe what they add to a datapack as a list of operations instead of
+string-building callables. A set of drafted items is compiled once into a
+DatapackPlan, which assembles every output file with a single join.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from items import DraftItem
+
+ON_LOAD_FILENAME = "on_load.mcfunction"
+GENERATED_PREFIX = "draaftpack/"
+
+
+class DatapackOp:
+    """A single declarative change an item makes to the datapack."""
+
+    def lines(self) -> List[str]:
+        """The mcfunction lines this operation appends."""
+        raise NotImplementedError
+
+
+class AppendLines(DatapackOp):
+    """Append raw mcfunction lines."""
+
+    def __init__(self, *lines: str):
+        self._lines = list(lines)
+
+    def lines(self) -> List[str]:
+        return self._lines
+
+
+class GiveItem(DatapackOp):
+    """Give every player an item, optionally with a count."""
+
+    def __init__(self, item: str, count: Optional[int] = None):
+        self.item = item
+        self.count = count
+
+    def lines(self) -> List[str]:
+        if self.count is None:
+            return [f"give @a minecraft:{self.item}"]
+        return [f"give @a minecraft:{self.item} {self.count}"]
+
+
+class GrantAdvancement(DatapackOp):
+    """Grant an advancement, or a single criterion of it, to every player."""
+
+    def __init__(self, advancement: str, criterion: Optional[str] = None):
+        self.advancement = advancement
+        self.criterion = criterion
+
+    def lines(self) -> List[str]:
+        if self.criterion is None:
+            return [f"advancement grant @a only minecraft:{self.advancement}"]
+        return [f"advancement grant @a only minecraft:{self.advancement} {self.criterion}"]
+
+
+class WriteFile(DatapackOp):
+    """Provide the full contents of a file generated for the item."""
+
+    def __init__(self, content: str):
+        self.content = content
+
+    def lines(self) -> List[str]:
+        return self.content.splitlines()
+
+
+def grants(advancement: str, *criteria: str) -> List[GrantAdvancement]:
+    """Grant several criteria of the same advancement."""
+    return [GrantAdvancement(advancement, criterion) for criterion in criteria]
+
+
+def render_ops(ops: Sequence[DatapackOp]) -> str:
+    """Render an item's operations into the text it contributes to a file."""
+    parts = []
+    pending: List[str] = []
+    for op in ops:
+        if isinstance(op, WriteFile):
+            if pending:
+                parts.append("\n" + "\n".join(pending) + "\n")
+                pending = []
+            parts.append(op.content)
+        else:
+            pending.extend(op.lines())
+    if pending:
+        parts.append("\n" + "\n".join(pending) + "\n")
+    return "".join(parts)
+
+
+class DatapackPlan:
+    """The output plan for one set of drafted items."""
+
+    def __init__(self, on_load: List[str], queried: List[Tuple[str, str]],
+                 generated_files: List[Tuple[str, str]]):
+        # Fragments appended to on_load.mcfunction, in draft order
+        self.on_load = on_load
+        # (file_query, fragment) appended to downloaded files whose name contains the query
+        self.queried = queried
+        # (filename, content) for files that only exist because of an item
+        self.generated_files = generated_files
+
+        # Dispatch index: each distinct query with the draft positions and
+        # fragments of its items, so a file is matched once per query rather
+        # than once per item
+        self._by_query: Dict[str, List[Tuple[int, str]]] = {}
+        for position, (query, fragment) in enumerate(queried):
+            self._by_query.setdefault(query, []).append((position, fragment))
+
+    def fragments_for(self, filename: str) -> List[str]:
+        """The fragments to append to a downloaded file, in draft order."""
+        if filename == ON_LOAD_FILENAME:
+            return self.on_load
+        matches = [entry for query, entries in self._by_query.items()
+                   if query in filename for entry in entries]
+        # Several queries can hit one file; restore the original draft order
+        matches.sort()
+        return [fragment for _, fragment in matches]
+
+    def suffix_for(self, filename: str) -> str:
+        """Everything appended to a downloaded file."""
+        return "".join(self.fragments_for(filename))
+
+    def dispatch(self, filenames: Iterable[str]) -> Dict[str, str]:
+        """Map each file of an index that the plan changes to the text appended to it.
+
+        Built once per build, when the index is known, so files are then
+        resolved with a dict lookup; files missing from the map are copied
+        unchanged.
+        """
+        dispatch = {}
+        for filename in filenames:
+            suffix = self.suffix_for(filename)
+            if suffix:
+                dispatch[filename] = suffix
+        return dispatch
+
+    def apply(self, content: str, filename: str, dispatch: Optional[Dict[str, str]] = None) -> str:
+        """Assemble the final contents of a downloaded file.
+
+        dispatch is the map from dispatch() for the current index; without
+        it the suffix is resolved from the queries.
+        """
+        suffix = dispatch.get(filename, "") if dispatch is not None else self.suffix_for(filename)
+        return content + suffix if suffix else content
+
+
+def compile_plan(items: Sequence['DraftItem']) -> DatapackPlan:
+    """Compile the operations of a set of drafted items into a DatapackPlan."""
+    return _compile_plan(tuple(items))
+
+
+@lru_cache(maxsize=256)
+def _compile_plan(items: Tuple['DraftItem', ...]) -> DatapackPlan:
+    on_load = []
+    queried = []
+    generated: Dict[str, List[str]] = {}
+    for item in items:
+        fragment = render_ops(item.datapack_ops)
+        if item.file_query is None:
+            on_load.append(fragment)
+        elif item.file_query.startswith(GENERATED_PREFIX):
+            filename = item.file_query[item.file_query.find('/') + 1:]
+            generated.setdefault(filename, []).append(fragment)
+        else:
+            queried.append((item.file_query, fragment))
+
+    generated_files = [(filename, "".join(fragments))
+                       for filename, fragments in generated.items()]
+    return DatapackPlan(on_load, queried, generated_files)
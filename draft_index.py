@@ -0,0 +1,123 @@
+"""In-memory index of active and recent drafts, for draft_id autocomplete.
+
+Discord sends an autocomplete request on every keystroke and drops answers
+that take longer than three seconds. Suggestions therefore come from this
+index, never from the database. It is loaded once at start-up with
+database.get_indexed_drafts(), then kept current by the bot: add() when a
+draft is created, set_status() when one completes or is reset.
+
+Every active draft is indexed, plus the RECENT_PER_CHANNEL most recent
+finished drafts of each channel. Drafts are kept by channel, which is what
+commands accept, and by user, so a user's own drafts are suggested first.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+RECENT_PER_CHANNEL = 25
+# Discord shows at most 25 choices, each name at most 100 characters
+MAX_CHOICES = 25
+MAX_CHOICE_NAME = 100
+
+
+class IndexedDraft:
+    __slots__ = ('draft_id', 'channel_id', 'status', 'created_at_utc', 'player_ids', 'players', 'search_text')
+
+    def __init__(self, draft_id: str, channel_id: int, status: str, created_at_utc: int,
+                 players: Iterable[Tuple[int, str]]):
+        self.draft_id = draft_id
+        self.channel_id = channel_id
+        self.status = status
+        self.created_at_utc = created_at_utc
+        players = list(players)
+        self.player_ids = frozenset(user_id for user_id, _ in players)
+        self.players = ", ".join(name for _, name in players)
+        self.search_text = f"{draft_id} {self.players}".lower()
+
+    def choice_name(self) -> str:
+        name = f"{self.draft_id} · {self.status} · {self.players}"
+        return name if len(name) <= MAX_CHOICE_NAME else name[:MAX_CHOICE_NAME - 1] + "…"
+
+
+class DraftIndex:
+    def __init__(self, recent_per_channel: int = RECENT_PER_CHANNEL):
+        self.recent_per_channel = recent_per_channel
+        # False until load(); before then nothing can be ruled out
+        self.loaded = False
+        self._drafts: Dict[str, IndexedDraft] = {}
+        # Each channel's drafts, oldest first
+        self._by_channel: Dict[int, Dict[str, IndexedDraft]] = {}
+        self._by_user: Dict[int, Set[str]] = {}
+
+    def load(self, drafts: Iterable[dict]):
+        """Replace the contents with drafts from database.get_indexed_drafts()."""
+        self._drafts.clear()
+        self._by_channel.clear()
+        self._by_user.clear()
+        for draft in sorted(drafts, key=lambda draft: draft['created_at_utc']):
+            self._insert(IndexedDraft(draft['draft_id'], draft['channel_id'], draft['status'],
+                                      draft['created_at_utc'], draft['players']))
+        for channel_id in list(self._by_channel):
+            self._trim(channel_id)
+        self.loaded = True
+
+    def add(self, draft_id: str, channel_id: int, players: Iterable[Tuple[int, str]],
+            created_at_utc: int, status: str = 'active'):
+        self._insert(IndexedDraft(draft_id, channel_id, status, created_at_utc, players))
+        self._trim(channel_id)
+
+    def set_status(self, draft_id: str, status: str):
+        draft = self._drafts.get(draft_id)
+        if draft is None:
+            return
+        draft.status = status
+        self._trim(draft.channel_id)
+
+    def get(self, draft_id: str) -> Optional[IndexedDraft]:
+        return self._drafts.get(draft_id)
+
+    def __len__(self) -> int:
+        return len(self._drafts)
+
+    def rules_out(self, draft_id: str, channel_id: int, active_only: bool = False) -> bool:
+        """Whether the index alone shows draft_id can't be used in channel_id.
+
+        A draft the index doesn't hold may still be an old finished one, so
+        it is only ruled out when active_only is set: every active draft is
+        indexed.
+        """
+        draft = self._drafts.get(draft_id)
+        if draft is None:
+            return self.loaded and active_only
+        return draft.channel_id != channel_id or (active_only and draft.status != 'active')
+
+    def suggest(self, channel_id: int, user_id: int, current: str,
+                active_only: bool = False) -> List[IndexedDraft]:
+        """Drafts of the channel whose ID or player names contain current.
+
+        The user's own active drafts come first, then other active drafts,
+        then finished ones, newest first within each group.
+        """
+        current = current.strip().lower()
+        own = self._by_user.get(user_id, ())
+        matches = [draft for draft in reversed(self._by_channel.get(channel_id, {}).values())
+                   if current in draft.search_text and (draft.status == 'active' or not active_only)]
+        matches.sort(key=lambda draft: (draft.status != 'active', draft.draft_id not in own))
+        return matches[:MAX_CHOICES]
+
+    def _insert(self, draft: IndexedDraft):
+        self._drafts[draft.draft_id] = draft
+        self._by_channel.setdefault(draft.channel_id, {})[draft.draft_id] = draft
+        for user_id in draft.player_ids:
+            self._by_user.setdefault(user_id, set()).add(draft.draft_id)
+
+    def _trim(self, channel_id: int):
+        """Forget the channel's oldest finished drafts beyond recent_per_channel."""
+        channel = self._by_channel.get(channel_id, {})
+        finished = [draft for draft in channel.values() if draft.status != 'active']
+        for draft in finished[:max(0, len(finished) - self.recent_per_channel)]:
+            del self._drafts[draft.draft_id]
+            del channel[draft.draft_id]
+            for user_id in draft.player_ids:
+                user_drafts = self._by_user[user_id]
+                user_drafts.discard(draft.draft_id)
+                if not user_drafts:
+                    del self._by_user[user_id]
@@ -0,0 +1,176 @@
+from typing import List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import discord
+
+# --- Discord Limits ---
+# https://discord.com/developers/docs/resources/message#embed-object-embed-limits
+TITLE_LIMIT = 256
+DESCRIPTION_LIMIT = 4096
+FIELD_COUNT_LIMIT = 25
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+FOOTER_LIMIT = 2048
+EMBEDS_PER_MESSAGE = 10
+MESSAGE_TOTAL_LIMIT = 6000
+
+# Room kept free on the last page for the "N more lines" notice
+TRUNCATION_NOTICE_RESERVE = 64
+CONTINUED_SUFFIX = " (cont.)"
+ELLIPSIS = "…"
+
+
+def clip(text: str, limit: int) -> str:
+    """Clip text to a Discord limit, marking the cut with an ellipsis."""
+    if len(text) <= limit:
+        return text
+    return text[:limit - len(ELLIPSIS)] + ELLIPSIS
+
+
+class Section:
+    """A logical block of lines that renders as one or more embed fields.
+
+    Line lengths are computed once here so packing never re-measures text.
+    """
+
+    def __init__(self, name: str, lines: List[str], inline: bool = False,
+                 separator: str = "\n", empty_text: str = "\u200b"):
+        self.name = clip(name, FIELD_NAME_LIMIT - len(CONTINUED_SUFFIX))
+        self.lines = [clip(line, FIELD_VALUE_LIMIT)
+                      for line in lines] or [empty_text]
+        self.lengths = [len(line) for line in self.lines]
+        self.inline = inline
+        self.separator = separator
+
+    def fields(self) -> List[tuple]:
+        """Split the section into (name, value, size, line_count) field chunks."""
+        fields = []
+        sep_len = len(self.separator)
+        start = 0
+        size = 0
+        for i, length in enumerate(self.lengths):
+            extra = length if i == start else sep_len + length
+            if size + extra > FIELD_VALUE_LIMIT:
+                fields.append(self._field(start, i, size, bool(fields)))
+                start, size = i, length
+            else:
+                size += extra
+        fields.append(self._field(start, len(self.lines), size, bool(fields)))
+        return fields
+
+    def _field(self, start: int, end: int, size: int, continued: bool) -> tuple:
+        name = self.name + CONTINUED_SUFFIX if continued else self.name
+        value = self.separator.join(self.lines[start:end])
+        return name, value, len(name) + size, end - start
+
+
+class EmbedSpec:
+    """Header of one logical embed plus the sections laid out beneath it."""
+
+    def __init__(self, title: str, description: Optional[str] = None,
+                 color: Optional['discord.Color'] = None, footer: Optional[str] = None,
+                 sections: Optional[List[Section]] = None):
+        self.title = clip(title, TITLE_LIMIT - len(CONTINUED_SUFFIX))
+        self.footer = clip(footer, FOOTER_LIMIT) if footer else None
+        header = len(self.title) + (len(self.footer) if self.footer else 0)
+        self.description = clip(description, min(
+            DESCRIPTION_LIMIT, MESSAGE_TOTAL_LIMIT - TRUNCATION_NOTICE_RESERVE - header)) if description else None
+        self.color = color
+        self.sections = sections or []
+
+    def header_size(self, continued: bool) -> int:
+        size = len(self.title) + (len(self.footer) if self.footer else 0)
+        if continued:
+            return size + len(CONTINUED_SUFFIX)
+        return size + (len(self.description) if self.description else 0)
+
+    def build(self, continued: bool) -> 'discord.Embed':
+        import discord
+
+        embed = discord.Embed(
+            title=self.title + CONTINUED_SUFFIX if continued else self.title,
+            description=None if continued else self.description,
+            color=self.color if self.color is not None else discord.Color.blue())
+        if self.footer:
+            embed.set_footer(text=self.footer)
+        return embed
+
+
+def layout_pages(specs: List[EmbedSpec], max_pages: Optional[int] = None) -> List[List['discord.Embed']]:
+    """Pack embed specs into pages (one message each) within every Discord limit.
+
+    Sections are split into fields, fields into embeds and embeds into pages in
+    a single greedy pass. When max_pages is reached the remaining lines are
+    dropped and a notice is added to the footer of the last embed.
+    """
+    budget = MESSAGE_TOTAL_LIMIT
+    if max_pages is not None:
+        budget -= TRUNCATION_NOTICE_RESERVE
+
+    pages: List[List['discord.Embed']] = []
+    page: List['discord.Embed'] = []
+    page_size = 0
+    dropped_lines = 0
+
+    for spec in specs:
+        embed = None
+        embed_fields = 0
+        for section in spec.sections:
+            for name, value, size, line_count in section.fields():
+                if max_pages is not None and len(pages) == max_pages:
+                    dropped_lines += line_count
+                    continue
+
+                needs_embed = embed is None or embed_fields == FIELD_COUNT_LIMIT
+                header = spec.header_size(continued=embed is not None) if needs_embed else 0
+                if page and (page_size + header + size > budget
+                             or (needs_embed and len(page) == EMBEDS_PER_MESSAGE)):
+                    pages.append(page)
+                    page, page_size = [], 0
+                    needs_embed = True
+                    header = spec.header_size(continued=embed is not None)
+                    if max_pages is not None and len(pages) == max_pages:
+                        dropped_lines += line_count
+                        continue
+
+                if needs_embed:
+                    embed = spec.build(continued=embed is not None)
+                    embed_fields = 0
+                    page.append(embed)
+                    page_size += header
+                embed.add_field(name=name, value=value, inline=section.inline)
+                embed_fields += 1
+                page_size += size
+
+        if embed is None and (max_pages is None or len(pages) < max_pages):
+            # Header-only embed (no sections, or all were empty)
+            header = spec.header_size(continued=False)
+            if page and (page_size + header > budget or len(page) == EMBEDS_PER_MESSAGE):
+                pages.append(page)
+                page, page_size = [], 0
+            if max_pages is None or len(pages) < max_pages:
+                page.append(spec.build(continued=False))
+                page_size += header
+
+    if page:
+        pages.append(page)
+
+    if dropped_lines and pages:
+        last = pages[-1][-1]
+        notice = f"{ELLIPSIS} {dropped_lines} more line(s) not shown"
+        footer = f"{last.footer.text} | {notice}" if last.footer and last.footer.text else notice
+        last.set_footer(text=clip(footer, FOOTER_LIMIT))
+
+    return pages
+
+
+def embed_size(embed: 'discord.Embed') -> int:
+    """Count the characters of an embed the way Discord does for the 6000 limit."""
+    size = len(embed.title or "") + len(embed.description or "")
+    if embed.footer and embed.footer.text:
+        size += len(embed.footer.text)
+    if embed.author and embed.author.name:
+        size += len(embed.author.name)
+    for field in embed.fields:
+        size += len(field.name) + len(field.value)
+    return size
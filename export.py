@@ -0,0 +1,192 @@
+"""Streaming export of completed drafts for analysis.
+
+Completed drafts, their players and their picks are read through a single
+cursor, chunk_size rows at a time, and written out a draft at a time.
+Memory use stays flat however much history is exported. The database is in
+write-ahead logging mode, so the export reads one consistent snapshot and
+picks keep committing while it runs.
+
+Two formats:
+
+- ndjson: one JSON object per draft, with its players and ordered picks.
+- csv: one row per pick, with the draft's columns repeated on each row,
+  plus a row with empty pick columns for each player who made no picks.
+
+Drafts can be filtered by guild and by a creation time range. Both filters
+are served by the (status, guild_id, created_at_utc) and
+(status, created_at_utc) indexes on drafts. Backs the /exportdrafts
+command; it can also be run directly:
+
+    python export.py DATABASE [--format ndjson|csv] [--guild ID]
+                     [--since YYYY-MM-DD] [--until YYYY-MM-DD] [--output PATH] [--gzip]
+"""
+import argparse
+import csv
+import gzip
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+import database
+
+FORMATS = ('ndjson', 'csv')
+CHUNK_SIZE = 500
+CSV_COLUMNS = ('draft_id', 'guild_id', 'channel_id', 'admin_user_id', 'created_at_utc', 'num_players',
+               'seed', 'tournament_id', 'pick_number', 'user_id', 'display_name', 'player_slot_index',
+               'category_name', 'item_name', 'pick_timestamp')
+_DRAFT_COLUMNS = CSV_COLUMNS[:8]
+
+
+def _draft_query(guild_id: Optional[int], since: Optional[int],
+                 until: Optional[int]) -> Tuple[str, List[Any]]:
+    conditions, params = ["d.status = 'completed'"], []
+    if guild_id is not None:
+        conditions.append("d.guild_id = ?")
+        params.append(guild_id)
+    if since is not None:
+        conditions.append("d.created_at_utc >= ?")
+        params.append(since)
+    if until is not None:
+        conditions.append("d.created_at_utc < ?")
+        params.append(until)
+    # Drafts come off the index in (created_at_utc, rowid) order, their
+    # players off the (draft_id, player_slot_index) key and each player's
+    # picks off idx_picks_draft, so nothing has to be sorted first. Picks
+    # are LEFT JOINed so players, and drafts, without picks still appear.
+    query = f'''
+        SELECT d.draft_id, d.guild_id, d.channel_id, d.admin_user_id, d.created_at_utc, d.num_players,
+               d.seed, d.tournament_id, dp.user_id, dp.display_name, dp.player_slot_index,
+               p.id AS pick_id, p.category_name, p.item_name, p.pick_timestamp
+        FROM drafts d
+        JOIN draft_players dp ON dp.draft_id = d.draft_id
+        LEFT JOIN player_picked_items p ON p.draft_id = dp.draft_id AND p.user_id = dp.user_id
+        WHERE {" AND ".join(conditions)}
+        ORDER BY d.created_at_utc, d.rowid, dp.player_slot_index, p.id
+    '''
+    return query, params
+
+
+def iter_rows(db_name: str, guild_id: Optional[int] = None, since: Optional[int] = None,
+              until: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """The players and picks of the matching completed drafts, draft by draft.
+
+    Each draft's rows are ordered by player slot, then pick; a player
+    without picks has one row with empty pick columns. Rows are fetched
+    chunk_size at a time from one open cursor. since and until are UTC
+    timestamps; until is exclusive.
+    """
+    conn = database.get_db_connection(db_name)
+    try:
+        cursor = conn.execute(*_draft_query(guild_id, since, until))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+    finally:
+        conn.close()
+
+
+def iter_draft_records(rows: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Group consecutive rows into one record per draft, with its players and picks in pick order."""
+    for _, draft_rows in groupby(rows, key=lambda row: row['draft_id']):
+        draft_rows = list(draft_rows)
+        record = {column: draft_rows[0][column] for column in _DRAFT_COLUMNS}
+        players: Dict[int, Dict[str, Any]] = {}
+        for row in draft_rows:
+            players.setdefault(row['user_id'], {
+                'user_id': row['user_id'], 'display_name': row['display_name'],
+                'player_slot_index': row['player_slot_index']})
+        picks = sorted((row for row in draft_rows if row['pick_id'] is not None), key=lambda row: row['pick_id'])
+        record['players'] = list(players.values())
+        record['picks'] = [{'pick_number': number, 'user_id': row['user_id'],
+                            'category_name': row['category_name'], 'item_name': row['item_name'],
+                            'pick_timestamp': row['pick_timestamp']}
+                           for number, row in enumerate(picks, 1)]
+        yield record
+
+
+def write_ndjson(records: Iterator[Dict[str, Any]], out: TextIO) -> int:
+    """Write one line per draft; returns the number of drafts written."""
+    count = 0
+    for record in records:
+        out.write(json.dumps(record, separators=(',', ':')) + "\n")
+        count += 1
+    return count
+
+
+def write_csv(records: Iterator[Dict[str, Any]], out: TextIO) -> int:
+    """Write a header and one line per pick, then one per player without picks; returns the lines written."""
+    writer = csv.DictWriter(out, CSV_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for record in records:
+        draft = {column: record[column] for column in _DRAFT_COLUMNS}
+        players = {player['user_id']: player for player in record['players']}
+        for pick in record['picks']:
+            writer.writerow({**draft, **players[pick['user_id']], **pick})
+            count += 1
+        picked = {pick['user_id'] for pick in record['picks']}
+        for player in record['players']:
+            if player['user_id'] not in picked:
+                writer.writerow({**draft, **player})
+                count += 1
+    return count
+
+
+def export_drafts(db_name: str, out: TextIO, fmt: str = 'ndjson', guild_id: Optional[int] = None,
+                  since: Optional[int] = None, until: Optional[int] = None,
+                  chunk_size: int = CHUNK_SIZE) -> int:
+    """Stream the matching completed drafts to out; returns drafts (ndjson) or lines (csv) written."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    records = iter_draft_records(iter_rows(db_name, guild_id, since, until, chunk_size))
+    return write_ndjson(records, out) if fmt == 'ndjson' else write_csv(records, out)
+
+
+def export_to_path(db_name: str, path: str, fmt: str = 'ndjson', guild_id: Optional[int] = None,
+                   since: Optional[int] = None, until: Optional[int] = None,
+                   compress: bool = False) -> int:
+    """export_drafts into a file, gzipped if compress is set."""
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', encoding='utf-8', newline='') as out:
+        return export_drafts(db_name, out, fmt, guild_id, since, until)
+
+
+def parse_date(text: str, end_of_day: bool = False) -> int:
+    """UTC timestamp of the start of a YYYY-MM-DD day, or of the next day with end_of_day.
+
+    Raises ValueError for anything else.
+    """
+    day = datetime.strptime(text.strip(), '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    if end_of_day:
+        day += timedelta(days=1)
+    return int(day.timestamp())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('database')
+    parser.add_argument('--format', choices=FORMATS, default='ndjson')
+    parser.add_argument('--guild', type=int)
+    parser.add_argument('--since', help="First day to include, YYYY-MM-DD (UTC).")
+    parser.add_argument('--until', help="Last day to include, YYYY-MM-DD (UTC).")
+    parser.add_argument('--output', help="File to write (default: stdout).")
+    parser.add_argument('--gzip', action='store_true', help="Compress the output file.")
+    args = parser.parse_args()
+
+    since = parse_date(args.since) if args.since else None
+    until = parse_date(args.until, end_of_day=True) if args.until else None
+    if args.output:
+        count = export_to_path(args.database, args.output, args.format, args.guild, since, until, args.gzip)
+    else:
+        count = export_drafts(args.database, sys.stdout, args.format, args.guild, since, until)
+    unit = 'drafts' if args.format == 'ndjson' else 'rows'
+    print(f"Exported {count} {unit}.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
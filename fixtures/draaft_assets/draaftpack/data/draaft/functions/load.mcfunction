@@ -0,0 +1,2 @@
+scoreboard objectives add draaft.loaded dummy
+execute unless score #done draaft.loaded matches 1 run function draaft:reset
@@ -0,0 +1 @@
+scoreboard players set #done draaft.loaded 1
@@ -0,0 +1,2 @@
+# Runs every tick
+execute as @a[tag=!draaft.seen] run tag @s add draaft.seen
@@ -0,0 +1,2 @@
+# Runs once when a player first joins the world
+tellraw @a {"text":"draaft loaded","color":"green"}
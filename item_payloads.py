@@ -0,0 +1,201 @@
+"""Datapack payloads for the item catalog.
+
+Kept apart from items.py so that importing the catalog stays cheap; this module
+is imported by items.load_datapack_payloads() on the first datapack build.
+"""
+from typing import Dict, List
+import random
+from datapack_ops import (DatapackOp, AppendLines, GiveItem, GrantAdvancement,
+                          WriteFile, grants)
+
+SHULKER_COLOUR = random.randint(0, 16)
+
+BLAZE_LOOT_TABLE = """{
+  "type": "minecraft:entity",
+  "pools": [
+    {
+      "rolls": 1,
+      "entries": [
+        {
+          "type": "minecraft:item",
+          "functions": [
+            {
+              "function": "minecraft:set_count",
+              "count": {
+                "min": 1.0,
+                "max": 1.0,
+                "type": "minecraft:uniform"
+              }
+            },
+            {
+              "function": "minecraft:looting_enchant",
+              "count": {
+                "min": 0.0,
+                "max": 1.0
+              }
+            }
+          ],
+          "name": "minecraft:blaze_rod"
+        }
+      ],
+      "conditions": [
+        {
+          "condition": "minecraft:killed_by_player"
+        }
+      ]
+    }
+  ]
+}
+"""
+
+# Keyed by DraftItem.pretty_name
+DATAPACK_OPS: Dict[str, List[DatapackOp]] = {
+    # Pool: Biomes
+    "Mesa": [
+        *grants("adventure/adventuring_time", "minecraft:badlands",
+                "minecraft:badlands_plateau", "minecraft:wooded_badlands_plateau"),
+        GrantAdvancement("adventure/kill_all_mobs", "minecraft:cave_spider"),
+    ],
+    "Jungle": [
+        *grants("adventure/adventuring_time", "minecraft:bamboo_jungle",
+                "minecraft:bamboo_jungle_hills", "minecraft:jungle_hills",
+                "minecraft:jungle_edge", "minecraft:jungle"),
+        *grants("husbandry/bred_all_animals", "minecraft:panda", "minecraft:ocelot"),
+        *grants("husbandry/balanced_diet", "melon_slice", "cookie"),
+    ],
+    "Snowy": [
+        *grants("adventure/adventuring_time", "minecraft:snowy_tundra",
+                "minecraft:snowy_taiga", "minecraft:snowy_taiga_hills",
+                "minecraft:snowy_mountains", "minecraft:snowy_beach", "minecraft:frozen_river"),
+        GrantAdvancement("adventure/kill_all_mobs", "minecraft:stray"),
+        GrantAdvancement("story/cure_zombie_villager"),
+    ],
+    "Mega Taiga": [
+        *grants("adventure/adventuring_time", "minecraft:giant_tree_taiga",
+                "minecraft:giant_tree_taiga_hills"),
+        GrantAdvancement("husbandry/balanced_diet", "sweet_berries"),
+        GrantAdvancement("husbandry/bred_all_animals", "minecraft:fox"),
+    ],
+    "Mushroom Island": [
+        *grants("adventure/adventuring_time", "minecraft:mushroom_fields",
+                "minecraft:mushroom_field_shore"),
+        GrantAdvancement("husbandry/bred_all_animals", "minecraft:mooshroom"),
+    ],
+    # Pool: Armour
+    "Helmet": [
+        GiveItem('diamond_helmet{Enchantments:[{id:"minecraft:protection",lvl:5},{id:"minecraft:unbreaking",lvl:3},{id:"minecraft:respiration",lvl:3},{id:"minecraft:aqua_affinity",lvl:1}]}'),
+    ],
+    "Chestplate": [
+        GiveItem('diamond_chestplate{Enchantments:[{id:"minecraft:protection",lvl:5},{id:"minecraft:unbreaking",lvl:3}]}'),
+    ],
+    "Leggings": [
+        GiveItem('diamond_leggings{Enchantments:[{id:"minecraft:protection",lvl:5},{id:"minecraft:unbreaking",lvl:3}]}'),
+    ],
+    "Boots": [
+        GiveItem('diamond_boots{Enchantments:[{id:"minecraft:protection",lvl:5},{id:"minecraft:unbreaking",lvl:3},{id:"minecraft:depth_strider",lvl:3}]}'),
+    ],
+    "Bucket": [
+        GiveItem("bucket{Enchantments:[{}]}"),
+    ],
+    # Pool: Tools
+    "Sword": [
+        GiveItem('diamond_sword{Enchantments:[{id:"minecraft:smite",lvl:5},{id:"minecraft:looting",lvl:3},{id:"minecraft:unbreaking",lvl:3}]}'),
+    ],
+    "Pickaxe": [
+        GiveItem('diamond_pickaxe{Enchantments:[{id:"minecraft:efficiency",lvl:5},{id:"minecraft:fortune",lvl:3},{id:"minecraft:unbreaking",lvl:3}]}'),
+    ],
+    "Shovel": [
+        GiveItem('diamond_shovel{Enchantments:[{id:"minecraft:efficiency",lvl:5},{id:"minecraft:fortune",lvl:3},{id:"minecraft:unbreaking",lvl:3}]}'),
+    ],
+    "Hoe": [
+        GiveItem('netherite_hoe{Enchantments:[{id:"minecraft:efficiency",lvl:5},{id:"minecraft:silk_touch",lvl:1},{id:"minecraft:unbreaking",lvl:3}]}'),
+    ],
+    "Axe": [
+        GiveItem('diamond_axe{Enchantments:[{id:"minecraft:efficiency",lvl:5},{id:"minecraft:silk_touch",lvl:1},{id:"minecraft:unbreaking",lvl:3}]}'),
+    ],
+    "Trident": [
+        GiveItem('trident{Enchantments:[{id:"minecraft:channeling",lvl:1},{id:"minecraft:loyalty",lvl:3},{id:"minecraft:impaling",lvl:5}]}'),
+    ],
+    # Pool: Big
+    "A Complete Catalogue": [
+        GrantAdvancement("husbandry/complete_catalogue"),
+    ],
+    "Adventuring Time": [
+        GrantAdvancement("adventure/adventuring_time"),
+    ],
+    "Two by Two": [
+        GrantAdvancement("husbandry/bred_all_animals"),
+    ],
+    "Monsters Hunted": [
+        GrantAdvancement("adventure/kill_all_mobs"),
+    ],
+    "A Balanced Diet": [
+        GrantAdvancement("husbandry/balanced_diet"),
+    ],
+    # Pool: Collectors
+    "Netherite": [
+        GiveItem("netherite_ingot", 4),
+    ],
+    "Shells": [
+        GiveItem("nautilus_shell", 7),
+    ],
+    "Skulls": [
+        GiveItem("wither_skeleton_skull", 2),
+    ],
+    "Breeds": [
+        *grants("husbandry/bred_all_animals", "minecraft:horse", "minecraft:donkey",
+                "minecraft:mule", "minecraft:llama", "minecraft:wolf", "minecraft:fox",
+                "minecraft:turtle"),
+    ],
+    "Shulker Box": [
+        GiveItem("shulker_box"),
+    ],
+    "Bees": [
+        GrantAdvancement("husbandry/safely_harvest_honey"),
+        GrantAdvancement("husbandry/silk_touch_nest"),
+        GrantAdvancement("adventure/honey_block_slide"),
+        GrantAdvancement("husbandry/bred_all_animals", "minecraft:bee"),
+        GrantAdvancement("husbandry/balanced_diet", "honey_bottle"),
+    ],
+    "Hives": [
+        GiveItem('bee_nest{BlockEntityTag:{Bees:[{MinOccupationTicks:600,TicksInHive:500,EntityData:{Brain:{memories:{}},HurtByTimestamp:0,HasStung:0b,Attributes:[],Invulnerable:0b,FallFlying:0b,ForcedAge:0,PortalCooldown:0,AbsorptionAmount:0.0f,FallDistance:0.0f,InLove:0,DeathTime:0s,HandDropChances:[0.085f,0.085f],CannotEnterHiveTicks:0,PersistenceRequired:0b,id:"minecraft:bee",Age:0,TicksSincePollination:0,AngerTime:0,Motion:[0.0d,0.0d,0.0d],Health:10.0f,HasNectar:0b,LeftHanded:0b,Air:300s,OnGround:0b,Rotation:[1.2499212f,0.0f],HandItems:[{},{}],ArmorDropChances:[0.085f,0.085f,0.085f,0.085f],Pos:[0.0d,0.0d,0.0d],Fire:-1s,ArmorItems:[{},{},{},{}],CropsGrownSincePollination:0,CanPickUpLoot:0b,HurtTime:0s}},{MinOccupationTicks:600,TicksInHive:500,EntityData:{Brain:{memories:{}},HurtByTimestamp:0,HasStung:0b,Attributes:[],Invulnerable:0b,FallFlying:0b,ForcedAge:0,PortalCooldown:0,AbsorptionAmount:0.0f,FallDistance:0.0f,InLove:0,DeathTime:0s,HandDropChances:[0.085f,0.085f],CannotEnterHiveTicks:0,PersistenceRequired:0b,id:"minecraft:bee",Age:0,TicksSincePollination:0,AngerTime:0,Motion:[0.0d,0.0d,0.0d],Health:10.0f,HasNectar:0b,LeftHanded:0b,Air:300s,OnGround:0b,Rotation:[1.2499212f,0.0f],HandItems:[{},{}],ArmorDropChances:[0.085f,0.085f,0.085f,0.085f],Pos:[0.0d,0.0d,0.0d],Fire:-1s,ArmorItems:[{},{},{},{}],CropsGrownSincePollination:0,CanPickUpLoot:0b,HurtTime:0s}},{MinOccupationTicks:600,TicksInHive:500,EntityData:{Brain:{memories:{}},HurtByTimestamp:0,HasStung:0b,Attributes:[],Invulnerable:0b,FallFlying:0b,ForcedAge:0,PortalCooldown:0,AbsorptionAmount:0.0f,FallDistance:0.0f,InLove:0,DeathTime:0s,HandDropChances:[0.085f,0.085f],CannotEnterHiveTicks:0,PersistenceRequired:0b,id:"minecraft:bee",Age:0,TicksSincePollination:0,AngerTime:0,Motion:[0.0d,0.0d,0.0d],Health:10.0f,HasNectar:0b,LeftHanded:0b,Air:300s,OnGround:0b,Rotation:[1.2499212f,0.0f],HandItems:[{},{}],ArmorDropChances:[0.085f,0.085f,0.085f,0.085f],Pos:[0.0d,0.0d,0.0d],Fire:-1s,ArmorItems:[{},{},{},{}],CropsGrownSincePollination:0,CanPickUpLoot:0b,HurtTime:0s}}]}}', 2),
+    ],
+    # Pool: Misc
+    "Totem": [
+        GiveItem("totem_of_undying"),
+        *grants("adventure/kill_all_mobs", "minecraft:evoker", "minecraft:vex"),
+    ],
+    "Fireworks": [
+        GiveItem("gunpowder", 23),
+        GiveItem("paper", 23),
+    ],
+    "Dolphin's Grace": [
+        AppendLines("effect give @a minecraft:dolphins_grace 3600"),
+    ],
+    "Leads": [
+        GrantAdvancement("adventure/kill_all_mobs", "minecraft:slime"),
+        GiveItem("lead", 23),
+    ],
+    "Fire Resistance": [
+        AppendLines("effect give @a minecraft:fire_resistance 3600"),
+    ],
+    "Obsidian": [
+        GiveItem("obsidian", 10),
+    ],
+    "Logs": [
+        GiveItem("acacia_log", 64),
+    ],
+    "Eyes": [
+        GiveItem("ender_eye", 2),
+    ],
+    "Crossbow": [
+        GiveItem('crossbow{Enchantments:[{id:"minecraft:piercing",lvl:4s}]}', 1),
+    ],
+    "Shulker": [
+        AppendLines(
+            f"execute at @a run summon minecraft:boat ~ ~2 ~ {{Passengers:[{{id:shulker,Color:{SHULKER_COLOUR}}}]}}"),
+    ],
+    "Rod Rates": [
+        WriteFile(BLAZE_LOOT_TABLE),
+    ],
+}
@@ -0,0 +1,477 @@
+"""Synthetic load generator for the draft flow.
+
+Drives the real command and view handlers in bot.py (/startdraft, pick
+selects, /draftboard and /mydraft) with fake interactions, channels and
+messages against a temporary database, so hundreds of drafts can run
+concurrently without Discord. Each simulated player waits a configurable
+think time before picking; every fake Discord call waits a configurable
+REST latency.
+
+Reports handler latency, pick throughput against the offered load,
+event-loop lag and time spent in database.py. SQLite calls run on the event
+loop, so database time is the main source of contention between drafts.
+Give several draft counts to step the load up and find where throughput
+stops keeping up. Run with:
+
+    python load_test.py [--drafts 50,100,200] [--think 1.0] [--rest-latency 0.05]
+                        [--view-rate 0.2] [--channels 20] [--datapacks]
+"""
+import argparse
+import asyncio
+import functools
+import itertools
+import os
+import random
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import bot
+import database
+import logs
+import tracing
+import utils
+from profiling import percentile, sample_loop_lag
+from draft_index import DraftIndex
+from render_cache import RenderCache
+from view_registry import ViewRegistry
+
+USERS = 1000
+_DRAFT_ID = re.compile(r"Draft ID: `(\w+)`")
+_MISSING = object()
+
+
+# --- Fake Discord objects ---
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.name = self.display_name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, world: 'FakeDiscord'):
+        self.id = guild_id
+        self.world = world
+
+    def get_member(self, user_id: int) -> Optional[FakeUser]:
+        return self.world.users.get(user_id)
+
+
+class FakeMessage:
+    def __init__(self, channel: 'FakeChannel', message_id: int, content: Optional[str] = None,
+                 embeds=None, view=None):
+        self.channel = channel
+        self.id = message_id
+        self.content = content
+        self.embeds = embeds or []
+        self.view = view
+        self.jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{message_id}"
+
+    async def edit(self, **fields):
+        await self.channel.world.rest_call("PATCH /channels/{channel_id}/messages/{message_id}")
+        for name in ('content', 'embeds', 'view'):
+            if name in fields:
+                setattr(self, name, fields[name])
+        return self
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild: FakeGuild, world: 'FakeDiscord'):
+        self.id = channel_id
+        self.name = f"draft-{channel_id}"
+        self.guild = guild
+        self.world = world
+        self.messages: Dict[int, FakeMessage] = {}
+
+    def add_message(self, content=None, embeds=None, view=None) -> FakeMessage:
+        message = FakeMessage(self, next(self.world.ids), content, embeds, view)
+        self.messages[message.id] = message
+        return message
+
+    async def send(self, content: Optional[str] = None, *, embeds=None, view=None, **fields) -> FakeMessage:
+        await self.world.rest_call("POST /channels/{channel_id}/messages")
+        return self.add_message(content, embeds, view)
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        await self.world.rest_call("GET /channels/{channel_id}/messages/{message_id}")
+        return self.messages[message_id]
+
+
+class FakeResponse:
+    def __init__(self, interaction: 'FakeInteraction'):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, content: Optional[str] = None, *, embed=None, embeds=None,
+                           ephemeral: bool = False, view=None, **fields):
+        await self._respond()
+        if not ephemeral:
+            self.interaction.original = self.interaction.channel.add_message(
+                content, embeds or ([embed] if embed else None), view)
+
+    async def edit_message(self, **fields):
+        await self._respond()
+        await self.interaction.message.edit(**fields)
+
+    async def defer(self, **fields):
+        await self._respond()
+
+    async def send_modal(self, modal):
+        await self._respond()
+
+    async def _respond(self):
+        if self._done:
+            raise RuntimeError("This interaction has already been responded to")
+        self._done = True
+        await self.interaction.world.rest_call("POST /interactions/{interaction_id}/{interaction_token}/callback")
+
+
+class FakeFollowup:
+    def __init__(self, interaction: 'FakeInteraction'):
+        self.interaction = interaction
+
+    async def send(self, content: Optional[str] = None, *, ephemeral: bool = False, **fields):
+        await self.interaction.world.rest_call("POST /webhooks/{webhook_id}/{webhook_token}")
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the handlers in bot.py."""
+
+    def __init__(self, world: 'FakeDiscord', user: FakeUser, channel: FakeChannel,
+                 message: Optional[FakeMessage] = None, data: Optional[Dict[str, Any]] = None):
+        self.world = world
+        self.user = user
+        self.channel = channel
+        self.channel_id = channel.id
+        self.guild = channel.guild
+        self.guild_id = channel.guild.id
+        self.message = message
+        self.data = data or {}
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.original: Optional[FakeMessage] = None
+
+    async def original_response(self) -> FakeMessage:
+        await self.world.rest_call("GET /webhooks/{webhook_id}/{webhook_token}/messages/@original")
+        return self.original
+
+    async def edit_original_response(self, **fields):
+        if self.original:
+            await self.original.edit(**fields)
+
+
+class FakeDiscord:
+    """Guilds, channels and users standing in for the gateway cache and REST API."""
+
+    def __init__(self, channels: int, rest_latency: float):
+        self.rest_latency = rest_latency
+        self.rest_calls = 0
+        self.ids = itertools.count(10 ** 17)
+        self.users = {user_id: FakeUser(user_id) for user_id in range(1, USERS + 1)}
+        self.guild = FakeGuild(next(self.ids), self)
+        self.channels = {}
+        for _ in range(channels):
+            channel = FakeChannel(next(self.ids), self.guild, self)
+            self.channels[channel.id] = channel
+
+    async def rest_call(self, route: str):
+        self.rest_calls += 1
+        tracing.record_rest_call(route)
+        await asyncio.sleep(self.rest_latency)
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self.guild if guild_id == self.guild.id else None
+
+    async def fetch_user(self, user_id: int) -> Optional[FakeUser]:
+        await self.rest_call("GET /users/{user_id}")
+        return self.users.get(user_id)
+
+
+# --- Instrumentation ---
+
+
+class DatabaseProbe:
+    """Wraps database.py's functions to time them and count their SQL statements."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.seconds = 0.0
+        self.statements = 0
+        self.longest = 0.0
+
+    def __call__(self, statement: str):
+        self.statements += 1
+
+    def wrap(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            self.calls += 1
+            self.seconds += elapsed
+            self.longest = max(self.longest, elapsed)
+            # The data functions report SQLite errors by returning False
+            if result is False:
+                self.failures += 1
+            return result
+        return wrapper
+
+
+DATABASE_FUNCTIONS = [
+    'create_draft', 'get_draft_state', 'record_pick', 'update_draft_status',
+    'update_board_message_id', 'update_last_event_message', 'get_active_drafts_in_channel',
+    'get_player_name_by_id', 'get_recent_picks', 'get_user_recent_drafts',
+    'get_minecraft_username', 'set_minecraft_username',
+]
+
+
+@contextmanager
+def patched(target: Any, **attributes) -> Iterator[None]:
+    """Set attributes on target for the duration of the block."""
+    # Methods are shadowed on the instance and the shadow removed afterwards
+    originals = {name: vars(target).get(name, _MISSING) for name in attributes}
+    for name, value in attributes.items():
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            if value is _MISSING:
+                delattr(target, name)
+            else:
+                setattr(target, name, value)
+
+
+# --- Simulation ---
+
+
+class LoadRun:
+    def __init__(self, world: FakeDiscord, think: float, view_rate: float, rng: random.Random):
+        self.world = world
+        self.think = think
+        self.view_rate = view_rate
+        self.rng = rng
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.picks = 0
+        self.completed = 0
+
+    async def timed(self, kind: str, coro) -> Any:
+        start = time.perf_counter()
+        try:
+            return await coro
+        except Exception as e:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+            print(f"{kind} failed: {e!r}")
+        finally:
+            self.latencies.setdefault(kind, []).append(time.perf_counter() - start)
+
+    async def think_time(self):
+        # Exponential think times give the bursty arrivals real players produce
+        if self.think:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think))
+
+    async def run_draft(self, channel: FakeChannel):
+        players = [self.world.users[user_id]
+                   for user_id in self.rng.sample(sorted(self.world.users), self.rng.randint(2, 4))]
+        start = FakeInteraction(self.world, players[0], channel)
+        await self.timed('startdraft', bot.start_draft_slash.callback(start, *players))
+        match = _DRAFT_ID.search(start.original.content if start.original else "")
+        if not match:
+            return
+        draft_id = match.group(1)
+
+        board = None
+        while True:
+            await self.think_time()
+            if self.rng.random() < self.view_rate:
+                await self.view_draft(draft_id, channel, self.rng.choice(players))
+
+            board = board or find_board(channel, draft_id)
+            view = board.view if board else None
+            if not isinstance(view, bot.DraftPickView):
+                break
+            options = [option.value for child in view.children if not child.disabled
+                       for option in getattr(child, 'options', [])]
+            if not options:
+                break
+            pick = FakeInteraction(self.world, self.world.users[view.current_player_id], channel,
+                                   message=board, data={'values': [self.rng.choice(options)]})
+            if await self.timed('pick', dispatch_pick(view, pick)):
+                self.picks += 1
+            if board.view is view:
+                # The pick did not move the draft on; a finished draft drops its view
+                break
+        if board and board.view is None:
+            self.completed += 1
+
+    async def view_draft(self, draft_id: str, channel: FakeChannel, user: FakeUser):
+        interaction = FakeInteraction(self.world, user, channel)
+        if self.rng.random() < 0.5:
+            await self.timed('draftboard', bot.draftboard_slash.callback(interaction, draft_id))
+        else:
+            await self.timed('mydraft', bot.mydraft_slash.callback(interaction, draft_id))
+
+
+def find_board(channel: FakeChannel, draft_id: str) -> Optional[FakeMessage]:
+    """The board message of a draft, found by the view the bot attached to it."""
+    return next((message for message in channel.messages.values()
+                 if getattr(message.view, 'draft_id', None) == draft_id), None)
+
+
+async def dispatch_pick(view: 'bot.DraftPickView', interaction: FakeInteraction) -> bool:
+    """Dispatch a select interaction the way discord.py does."""
+    if not await view.interaction_check(interaction):
+        return False
+    await view.select_callback(interaction)
+    return True
+
+
+async def _offline_datapacks(draft_state, **kwargs):
+    from asset_server import FixtureFetcher, load_fixture
+    from datapack_cache import build_draft_datapacks
+
+    fetcher = FixtureFetcher(load_fixture())
+    kwargs.update(fetcher=fetcher, base_url=fetcher.url, asset_cache=None)
+    return await build_draft_datapacks(draft_state, **kwargs)
+
+
+async def _skip_datapacks(channel, draft_id: str):
+    pass
+
+
+@contextmanager
+def simulated_bot(world: FakeDiscord, rng: random.Random, datapacks: bool = False,
+                  db_name: Optional[str] = None) -> Iterator[str]:
+    """Point bot.py at the fake world and a fresh database; yields the database path.
+
+    Every simulated user has a linked Minecraft username, so drafts go
+    straight to the pick view. Completed drafts skip their datapacks unless
+    datapacks is set, in which case they are built from the offline fixture.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = db_name or os.path.join(tmp, 'load_test.db')
+        database.initialize_database(db_name)
+        for user_id in world.users:
+            database.set_minecraft_username(db_name, user_id, f"mc{user_id}")
+
+        async def random_seed():
+            return str(rng.getrandbits(63))
+
+        async def random_seeds(count):
+            return [str(rng.getrandbits(63)) for _ in range(count)]
+
+        datapack_patch = ({'build_draft_datapacks': _offline_datapacks} if datapacks
+                          else {'post_draft_datapacks': _skip_datapacks})
+        index = DraftIndex()
+        index.load(database.get_indexed_drafts(db_name, index.recent_per_channel))
+        with patched(bot, DATABASE_NAME=db_name, live_views=ViewRegistry(), draft_index=index,
+                     overview_cache=RenderCache(), **datapack_patch), \
+                patched(bot.bot, get_channel=world.get_channel, get_guild=world.get_guild,
+                        fetch_user=world.fetch_user), \
+                patched(utils, get_random_seed=random_seed, get_random_seeds=random_seeds):
+            yield db_name
+
+
+async def run_load(num_drafts: int, think: float = 1.0, rest_latency: float = 0.05,
+                   view_rate: float = 0.2, channels: int = 20, datapacks: bool = False,
+                   seed: int = 1234, db_name: Optional[str] = None) -> Dict[str, Any]:
+    """Run num_drafts concurrent drafts to completion and return the measurements."""
+    rng = random.Random(seed)
+    world = FakeDiscord(channels, rest_latency)
+    probe = DatabaseProbe()
+    run = LoadRun(world, think, view_rate, rng)
+    lag: List[float] = []
+
+    with simulated_bot(world, rng, datapacks, db_name):
+        wrapped = {name: probe.wrap(getattr(database, name)) for name in DATABASE_FUNCTIONS}
+        with patched(database, **wrapped):
+            database.add_query_listener(probe)
+            sampler = asyncio.create_task(sample_loop_lag(lag))
+            start = time.perf_counter()
+            try:
+                channel_list = list(world.channels.values())
+                await asyncio.gather(*[run.run_draft(channel_list[i % len(channel_list)])
+                                       for i in range(num_drafts)])
+                if bot.background_tasks:
+                    await asyncio.gather(*bot.background_tasks)
+            finally:
+                elapsed = time.perf_counter() - start
+                sampler.cancel()
+                database.remove_query_listener(probe)
+
+    return {
+        'drafts': num_drafts,
+        'completed': run.completed,
+        'picks': run.picks,
+        'elapsed': elapsed,
+        'think': think,
+        'latencies': run.latencies,
+        'errors': run.errors,
+        'loop_lag': lag,
+        'rest_calls': world.rest_calls,
+        'database': probe,
+    }
+
+
+def print_report(result: Dict[str, Any]):
+    elapsed = result['elapsed']
+    probe: DatabaseProbe = result['database']
+    print(f"\n== {result['drafts']} concurrent drafts: {result['completed']} completed, "
+          f"{result['picks']} picks in {elapsed:.1f}s ==")
+    print(f"  throughput     {result['picks'] / elapsed:7.1f} picks/s, "
+          f"{result['rest_calls'] / elapsed:7.1f} REST calls/s")
+    if result['think']:
+        # Each active draft offers roughly one pick per think time
+        print(f"  offered load   {result['drafts'] / result['think']:7.1f} picks/s at the start")
+    print(f"  {'handler':12} {'calls':>7} {'p50':>9} {'p99':>9} {'errors':>7}")
+    for kind, samples in sorted(result['latencies'].items()):
+        print(f"  {kind:12} {len(samples):7} {percentile(samples, 0.5) * 1000:7.1f}ms "
+              f"{percentile(samples, 0.99) * 1000:7.1f}ms {result['errors'].get(kind, 0):7}")
+    lag = result['loop_lag']
+    print(f"  loop lag       p50 {percentile(lag, 0.5) * 1000:.1f}ms  p99 {percentile(lag, 0.99) * 1000:.1f}ms  "
+          f"max {max(lag, default=0.0) * 1000:.1f}ms")
+    print(f"  database       {probe.calls} calls, {probe.statements} statements, "
+          f"{probe.seconds:.2f}s on the loop ({probe.seconds / elapsed:.0%} of wall time), "
+          f"longest {probe.longest * 1000:.1f}ms, {probe.failures} failed writes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--drafts', default='50,100,200',
+                        help="comma-separated concurrent draft counts to step through")
+    parser.add_argument('--think', type=float, default=1.0, help="mean seconds a player takes per pick")
+    parser.add_argument('--rest-latency', type=float, default=0.05, help="seconds per fake Discord call")
+    parser.add_argument('--view-rate', type=float, default=0.2,
+                        help="chance of a /draftboard or /mydraft before each pick")
+    parser.add_argument('--channels', type=int, default=20)
+    parser.add_argument('--datapacks', action='store_true',
+                        help="build datapacks for completed drafts, from the offline fixture")
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+
+    logs.setup_logging()
+    try:
+        for num_drafts in [int(n) for n in args.drafts.split(',')]:
+            result = asyncio.run(run_load(num_drafts, args.think, args.rest_latency, args.view_rate,
+                                          args.channels, args.datapacks, args.seed))
+            print_report(result)
+    finally:
+        logs.stop_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Structured, non-blocking logging for the bot.
+
+Modules log through the standard logging module. setup_logging() routes
+every record through a QueueHandler to a QueueListener, which writes on a
+background thread, so a slow terminal or disk never stalls the event loop.
+
+Records carry the draft, guild, channel and user of the interaction being
+handled. These are bound once per interaction with bind_interaction().
+Each interaction runs in its own task, so the fields stay with that task
+and any tasks it starts.
+
+Noisy call sites pass extra=sample(n) so only every nth occurrence is
+written. Levels can be changed while the bot runs with set_level(), which
+backs the /loglevel command.
+
+Configured by DRAAFT_LOG_LEVEL (default INFO), DRAAFT_LOG_FORMAT ("text" or
+"json") and DRAAFT_LOG_FILE (stderr when unset).
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+LOG_LEVEL = os.getenv('DRAAFT_LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('DRAAFT_LOG_FORMAT', 'text')
+LOG_FILE = os.getenv('DRAAFT_LOG_FILE')
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+CONTEXT_FIELDS = ('draft_id', 'guild_id', 'channel_id', 'user_id')
+
+_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar('draaft_log_context', default={})
+_listener: Optional[logging.handlers.QueueListener] = None
+# Root handlers and level in place before setup_logging(), restored by stop_logging()
+_previous: Optional[Tuple[List[logging.Handler], int]] = None
+
+
+def bind(**fields: Any):
+    """Attach fields to every record logged from the current task and the tasks it starts."""
+    context = dict(_context.get())
+    context.update((key, value) for key, value in fields.items() if value is not None)
+    _context.set(context)
+
+
+def bind_interaction(interaction: Any, draft_id: Optional[str] = None):
+    """Bind the guild, channel and user of an interaction, and its draft if known.
+
+    Without an explicit draft_id, a slash command's draft_id option is used.
+    """
+    if draft_id is None:
+        options = (getattr(interaction, 'data', None) or {}).get('options', [])
+        draft_id = next((option.get('value') for option in options
+                         if option.get('name') == 'draft_id'), None)
+    bind(guild_id=interaction.guild_id, channel_id=interaction.channel_id,
+         user_id=interaction.user.id, draft_id=draft_id)
+
+
+def current_context() -> Dict[str, Any]:
+    return dict(_context.get())
+
+
+def sample(every: int) -> Dict[str, int]:
+    """extra= for a noisy log call: write the first occurrence and then every nth."""
+    return {'sample_every': every}
+
+
+class ContextFilter(logging.Filter):
+    """Copies the bound context onto records, in the task that logs them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Drops all but every nth record from call sites that asked to be sampled.
+
+    Occurrences are counted per logger and message template, so the same
+    warning for different drafts shares one counter.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.counts: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = getattr(record, 'sample_every', None)
+        if not every or every <= 1:
+            return True
+        key = (record.name, str(record.msg))
+        with self._lock:
+            count = self.counts[key] = self.counts.get(key, 0) + 1
+        if (count - 1) % every:
+            return False
+        record.occurrences = count
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """One line per record: text with key=value context, or a JSON object."""
+
+    def __init__(self, json_lines: bool = False):
+        super().__init__()
+        self.json_lines = json_lines
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {key: getattr(record, key) for key in CONTEXT_FIELDS + ('occurrences',)
+                  if getattr(record, key, None) is not None}
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            message = f"{message}\n{record.exc_text}"
+        if self.json_lines:
+            return json.dumps({'time': self.formatTime(record), 'level': record.levelname,
+                               'logger': record.name, 'message': message, **fields}, default=str)
+        context = "".join(f" {key}={value}" for key, value in fields.items())
+        return f"{self.formatTime(record)} {record.levelname:<8} {record.name}: {message}{context}"
+
+
+def setup_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT, path: Optional[str] = LOG_FILE,
+                  stream: Optional[TextIO] = None) -> logging.handlers.QueueListener:
+    """Send every record through a queue to a background writer. Idempotent."""
+    global _listener, _previous
+    if _listener is not None:
+        return _listener
+
+    if path:
+        output: logging.Handler = logging.FileHandler(path, encoding='utf-8')
+    else:
+        output = logging.StreamHandler(stream)
+    output.setFormatter(StructuredFormatter(json_lines=log_format == 'json'))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    # Filters run in the logging task, where the context is bound
+    handler.addFilter(SamplingFilter())
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    _previous = (root.handlers[:], root.level)
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper())
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Write out queued records and restore the logging setup from before setup_logging()."""
+    global _listener, _previous
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    root = logging.getLogger()
+    root.handlers[:], level = _previous
+    root.setLevel(level)
+    _previous = None
+
+
+def set_level(level: str, logger_name: Optional[str] = None) -> str:
+    """Change a logger's level (the root logger's by default); returns the old level."""
+    level = level.upper()
+    if level not in LEVELS:
+        raise ValueError(f"Unknown log level {level!r}")
+    target = logging.getLogger(logger_name)
+    previous = logging.getLevelName(target.getEffectiveLevel())
+    target.setLevel(level)
+    return previous
@@ -0,0 +1,199 @@
+"""Latency histograms, call counts and error counts for the bot's hot paths.
+
+Slash commands, view callbacks, database functions and Discord REST calls are
+wrapped with timed(), which records every call into a histogram labelled by
+kind and name. Gauges read current state, such as live views, when scraped.
+Metrics are rendered in the Prometheus text format and can be served on a
+local HTTP endpoint for scraping.
+
+Collection is switched on with DRAAFT_METRICS=1 (or by setting
+DRAAFT_METRICS_PORT). It is decided when a function is decorated: while
+disabled, timed() returns the function unchanged, so there is no overhead
+at all.
+"""
+import functools
+import inspect
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+METRICS_PORT = int(os.getenv('DRAAFT_METRICS_PORT', '0'))
+ENABLED = os.getenv('DRAAFT_METRICS', '').lower() in ('1', 'true', 'yes') or METRICS_PORT > 0
+# Only listen on loopback unless told otherwise
+METRICS_HOST = os.getenv('DRAAFT_METRICS_HOST', '127.0.0.1')
+
+# Upper bounds in seconds, from fast SQLite lookups to slow Discord calls
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with a count of failed calls."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float, error: bool = False):
+        self.count += 1
+        self.total += seconds
+        if error:
+            self.errors += 1
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def cumulative_counts(self) -> List[int]:
+        counts, running = [], 0
+        for count in self.bucket_counts:
+            running += count
+            counts.append(running)
+        return counts
+
+
+# Reads a gauge's current values, as (labels, value) pairs
+GaugeCollector = Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+
+
+class Registry:
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.gauges: Dict[str, Tuple[str, GaugeCollector]] = {}
+
+    def histogram(self, kind: str, name: str) -> Histogram:
+        key = (kind, name)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        return histogram
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool = False):
+        self.histogram(kind, name).observe(seconds, error)
+
+    def add_gauge(self, name: str, help_text: str, collect: GaugeCollector):
+        """Register a gauge whose values are read by collect() at every render."""
+        self.gauges[name] = (help_text, collect)
+
+    def clear(self):
+        """Forget recorded calls; gauges stay registered."""
+        self.histograms.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        latency = ["# HELP draaft_latency_seconds Call latency by kind and name.",
+                   "# TYPE draaft_latency_seconds histogram"]
+        calls = ["# HELP draaft_calls_total Calls by kind and name.",
+                 "# TYPE draaft_calls_total counter"]
+        errors = ["# HELP draaft_errors_total Calls that raised, by kind and name.",
+                  "# TYPE draaft_errors_total counter"]
+        for (kind, name), histogram in sorted(self.histograms.items()):
+            labels = f'kind="{_escape(kind)}",name="{_escape(name)}"'
+            for bound, count in zip(histogram.buckets, histogram.cumulative_counts()):
+                latency.append(f'draaft_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            latency.append(f'draaft_latency_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            latency.append(f'draaft_latency_seconds_sum{{{labels}}} {histogram.total:.6f}')
+            latency.append(f'draaft_latency_seconds_count{{{labels}}} {histogram.count}')
+            calls.append(f'draaft_calls_total{{{labels}}} {histogram.count}')
+            errors.append(f'draaft_errors_total{{{labels}}} {histogram.errors}')
+        gauges = []
+        for name, (help_text, collect) in sorted(self.gauges.items()):
+            gauges += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for labels, value in collect():
+                label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+                gauges.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(latency + calls + errors + gauges) + "\n"
+
+
+registry = Registry()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def timed(kind: str, name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Record the latency and outcome of every call to the decorated function.
+
+    Works on plain functions and coroutine functions; name defaults to the
+    function's qualified name.
+    """
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        label = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                error = False
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    registry.observe(kind, label, time.perf_counter() - start, error)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            error = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                error = True
+                raise
+            finally:
+                registry.observe(kind, label, time.perf_counter() - start, error)
+        return wrapper
+
+    return decorator
+
+
+def instrument_http(http_client: Any):
+    """Time every Discord REST call made through a discord.py HTTPClient.
+
+    Calls are labelled by method and route template (e.g.
+    "PATCH /channels/{channel_id}/messages/{message_id}"), which keeps the
+    number of series bounded.
+    """
+    if not ENABLED or getattr(http_client, '_draaft_instrumented', False):
+        return
+    request = http_client.request
+
+    @functools.wraps(request)
+    async def timed_request(route, *args, **kwargs):
+        start = time.perf_counter()
+        error = False
+        try:
+            return await request(route, *args, **kwargs)
+        except BaseException:
+            error = True
+            raise
+        finally:
+            registry.observe('discord_rest', f"{route.method} {route.path}",
+                             time.perf_counter() - start, error)
+
+    http_client.request = timed_request
+    http_client._draaft_instrumented = True
+
+
+async def start_http_server(port: int = METRICS_PORT, host: str = METRICS_HOST):
+    """Serve GET /metrics on host:port; returns the aiohttp AppRunner to clean up."""
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(body=registry.render().encode('utf-8'),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,189 @@
+"""Normalization and validation of datapack files before they are zipped.
+
+JSON files are parsed and re-serialized without whitespace. mcfunction files
+lose blank lines and trailing whitespace, repeated `give` lines for the same
+item are merged into one with the summed count, and `advancement grant`
+lines that are duplicates (or covered by a grant of the whole advancement)
+are dropped. Both only happen within a run of consecutive give and grant
+lines, so commands such as clear and revoke keep their effect. Every file
+is validated on the way, so a pack that would not load never ships.
+Results are cached by content hash, since the same upstream files and item
+fragments come back build after build.
+"""
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+NORMALIZE_CACHE_SIZE = 2048
+JSON_SUFFIXES = ('.json', '.mcmeta')
+
+_GIVE = re.compile(r'^give @a (minecraft:[a-z0-9_./-]+)(?: (\d+))?$')
+_GRANT = re.compile(r'^advancement grant @a only (minecraft:[a-z0-9_./-]+)(?: (\S+))?$')
+_BRACKETS = {'{': '}', '[': ']', '(': ')'}
+# Commands whose arguments are free text, where brackets need not balance
+_FREE_TEXT_COMMANDS = {'say', 'me', 'msg', 'tell', 'w', 'teammsg', 'tm'}
+
+_cache: 'OrderedDict[Tuple[str, str], bytes]' = OrderedDict()
+
+
+class DatapackValidationError(Exception):
+    """Raised when a file that would go into a datapack is malformed."""
+
+
+def normalize_file(filename: str, content: bytes) -> bytes:
+    """Return the normalized, validated contents of a datapack file."""
+    if filename.endswith(JSON_SUFFIXES):
+        kind = 'json'
+    elif filename.endswith('.mcfunction'):
+        kind = 'mcfunction'
+    else:
+        return content
+
+    key = (kind, hashlib.sha256(content).hexdigest())
+    normalized = _cache.get(key)
+    if normalized is not None:
+        _cache.move_to_end(key)
+        return normalized
+
+    if kind == 'json':
+        normalized = normalize_json(filename, content)
+    else:
+        normalized = normalize_mcfunction(filename, content)
+    _cache[key] = normalized
+    if len(_cache) > NORMALIZE_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return normalized
+
+
+def clear_normalize_cache():
+    _cache.clear()
+
+
+def normalize_json(filename: str, content: bytes) -> bytes:
+    try:
+        data = json.loads(content.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise DatapackValidationError(f"{filename}: invalid JSON: {e}") from e
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def normalize_mcfunction(filename: str, content: bytes) -> bytes:
+    try:
+        text = content.decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise DatapackValidationError(f"{filename}: not valid UTF-8: {e}") from e
+
+    lines: List[str] = []
+    # Gives and grants are only merged within a run of consecutive give and
+    # grant lines: any other command, such as clear or revoke, may depend on
+    # the order, so it starts a new run
+    run_start = 0
+    # give target -> index in lines of the merged give
+    gives: Dict[str, int] = {}
+    give_counts: Dict[str, int] = {}
+    whole_grants = set()
+    criterion_grants = set()
+
+    for number, raw_line in enumerate(text.splitlines(), 1):
+        line = raw_line.strip()
+        if not line:
+            continue
+        validate_command(filename, number, line)
+
+        give = _GIVE.match(line)
+        grant = _GRANT.match(line)
+        if not (give or grant or line.startswith('#')):
+            _drop_covered_grants(lines, run_start, whole_grants)
+            run_start = len(lines) + 1
+            gives.clear()
+            give_counts.clear()
+            whole_grants.clear()
+            criterion_grants.clear()
+
+        if give:
+            item, count = give.group(1), int(give.group(2) or 1)
+            if item in gives:
+                give_counts[item] += count
+                lines[gives[item]] = f"give @a {item} {give_counts[item]}"
+                continue
+            gives[item] = len(lines)
+            give_counts[item] = count
+
+        if grant:
+            advancement, criterion = grant.groups()
+            if advancement in whole_grants or (advancement, criterion) in criterion_grants:
+                continue
+            if criterion is None:
+                whole_grants.add(advancement)
+            else:
+                criterion_grants.add((advancement, criterion))
+        lines.append(line)
+
+    _drop_covered_grants(lines, run_start, whole_grants)
+    return ("\n".join(lines) + "\n").encode('utf-8') if lines else b''
+
+
+def _drop_covered_grants(lines: List[str], start: int, whole_grants: set):
+    """Drop grants of single criteria in lines[start:] covered by a grant of the whole advancement."""
+    if whole_grants:
+        lines[start:] = [line for line in lines[start:] if not _covered_grant(line, whole_grants)]
+
+
+def _covered_grant(line: str, whole_grants: set) -> bool:
+    grant = _GRANT.match(line)
+    return bool(grant and grant.group(2) is not None and grant.group(1) in whole_grants)
+
+
+def validate_command(filename: str, number: int, line: str):
+    """Check one mcfunction line for mistakes that stop the whole function loading."""
+    if line.startswith('#'):
+        return
+    if line.startswith('/'):
+        raise DatapackValidationError(
+            f"{filename}:{number}: commands in functions must not start with '/'")
+    if _command_name(line) in _FREE_TEXT_COMMANDS:
+        return
+    error = _bracket_error(line)
+    if error:
+        raise DatapackValidationError(f"{filename}:{number}: {error}")
+
+
+def _command_name(line: str) -> str:
+    """The command a line runs, following `execute ... run` to the command at the end."""
+    while True:
+        name, _, rest = line.partition(' ')
+        run = f" {rest}".find(' run ') if name == 'execute' else -1
+        if run == -1:
+            return name
+        line = rest[run + len('run '):]
+
+
+def _bracket_error(line: str) -> Optional[str]:
+    stack = []
+    quote = None
+    escaped = False
+    previous = ' '
+    for char in line:
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char == '"' or (char == "'" and not previous.isalnum()):
+            # An apostrophe inside a word, as in `it's`, doesn't open a string
+            quote = char
+        elif char in _BRACKETS:
+            stack.append(_BRACKETS[char])
+        elif char in _BRACKETS.values():
+            if not stack or stack.pop() != char:
+                return f"unexpected '{char}'"
+        previous = char
+    if quote:
+        return "unterminated string"
+    if stack:
+        return f"missing '{stack[-1]}'"
+    return None
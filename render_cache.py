@@ -0,0 +1,43 @@
+"""Cache of rendered embeds, reused while the data behind them is unchanged.
+
+Each entry is stored under a key, such as a channel ID, together with a
+fingerprint of the data it was rendered from. get_or_render() returns the
+cached render while the fingerprint matches and renders again when it
+doesn't, so entries never need explicit invalidation. The least recently
+used entries are dropped beyond max_entries.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar('T')
+
+MAX_ENTRIES = 256
+
+
+class RenderCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Tuple[Hashable, Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Hashable, fingerprint: Hashable, render: Callable[[], T]) -> T:
+        """The render cached under key if it came from the same fingerprint, else render()."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = render()
+        self._entries[key] = (fingerprint, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,107 @@
+import asyncio
+import random
+
+import bot
+import database
+import tracing
+from load_test import _DRAFT_ID, FakeDiscord, FakeInteraction, dispatch_pick, find_board, simulated_bot
+from render_cache import RenderCache
+
+
+def test_render_cache_reuses_renders_until_the_fingerprint_changes():
+    cache = RenderCache(max_entries=2)
+    renders = []
+
+    def render(value):
+        return lambda: renders.append(value) or [value]
+
+    first = cache.get_or_render('a', 1, render('a1'))
+    assert cache.get_or_render('a', 1, render('unused')) is first
+    assert cache.get_or_render('a', 2, render('a2')) == ['a2']
+    cache.get_or_render('b', 1, render('b1'))
+    cache.get_or_render('c', 1, render('c1'))
+    # 'a' was least recently used, so it was dropped
+    cache.get_or_render('a', 2, render('a2 again'))
+    assert renders == ['a1', 'a2', 'b1', 'c1', 'a2 again']
+    assert cache.stats() == {'entries': 2, 'hits': 1, 'misses': 5}
+
+
+async def start_drafts(world, channel, count):
+    draft_ids = []
+    for n in range(count):
+        players = [world.users[2 * n + 1], world.users[2 * n + 2]]
+        start = FakeInteraction(world, players[0], channel)
+        await bot.start_draft_slash.callback(start, *players)
+        draft_ids.append(_DRAFT_ID.search(start.original.content).group(1))
+    return draft_ids
+
+
+def test_overview_loads_every_draft_in_one_query():
+    async def scenario():
+        world = FakeDiscord(channels=2, rest_latency=0)
+        channel, other = world.channels.values()
+        with simulated_bot(world, random.Random(0)):
+            draft_ids = await start_drafts(world, channel, 3)
+            await start_drafts(world, other, 1)
+            board = find_board(channel, draft_ids[0])
+            view = board.view
+            value = next(option.value for child in view.children for option in child.options)
+            await dispatch_pick(view, FakeInteraction(world, world.users[view.current_player_id], channel,
+                                                      message=board, data={'values': [value]}))
+            database.update_draft_status(bot.DATABASE_NAME, draft_ids[2], 'reset')
+
+            with tracing.assert_max_queries(1, name='overview'):
+                drafts = database.get_channel_overview(bot.DATABASE_NAME, channel.id)
+            assert {draft['draft_id'] for draft in drafts} == set(draft_ids[:2])
+            by_id = {draft['draft_id']: draft for draft in drafts}
+            picked, untouched = by_id[draft_ids[0]], by_id[draft_ids[1]]
+            assert picked['current_pick_global_index'] == 1
+            assert (picked['last_pick_user_id'], picked['last_pick_player']) == (1, "user1")
+            assert f"{picked['last_pick_category']}|{picked['last_pick_item']}" == value
+            # Two-player snake order: the second pick is the second player's
+            assert picked['current_user_id'] == 2
+            assert untouched['current_user_id'] == 3 and untouched['last_pick_item'] is None
+    asyncio.run(scenario())
+
+
+def test_overview_pages_come_from_the_render_cache():
+    async def scenario():
+        world = FakeDiscord(channels=1, rest_latency=0)
+        channel = next(iter(world.channels.values()))
+        with simulated_bot(world, random.Random(0)):
+            draft_ids = await start_drafts(world, channel, bot.OVERVIEW_DRAFTS_PER_PAGE + 2)
+            for _ in range(2):
+                await bot.channeloverview_slash.callback(FakeInteraction(world, world.users[1], channel))
+            assert bot.overview_cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+            # A pick changes the rows, so the pages are rendered again
+            board = find_board(channel, draft_ids[0])
+            value = next(option.value for child in board.view.children for option in child.options)
+            await dispatch_pick(board.view, FakeInteraction(world, world.users[board.view.current_player_id], channel,
+                                                            message=board, data={'values': [value]}))
+            await bot.channeloverview_slash.callback(FakeInteraction(world, world.users[1], channel))
+            assert bot.overview_cache.stats() == {'entries': 1, 'hits': 1, 'misses': 2}
+
+            drafts = database.get_channel_overview(bot.DATABASE_NAME, channel.id)
+            pages = bot.build_overview_pages(channel.name, drafts)
+            assert len(pages) == 2
+            assert "Page 2 of 2" in pages[1][0].footer.text
+            assert sum(len(page[0].fields) for page in pages) == len(draft_ids)
+
+            # A chunk too long for one message is split, and the pages are
+            # numbered after the split
+            long = [dict(drafts[0], draft_id=f"{n:06}", message_link="https://discord.com/" + "x" * 900)
+                    for n in range(bot.OVERVIEW_DRAFTS_PER_PAGE)]
+            split = bot.build_overview_pages(channel.name, long)
+            assert len(split) > 1
+            assert [page[0].footer.text for page in split] == [
+                f"Page {n} of {len(split)}" for n in range(1, len(split) + 1)]
+
+            # Flipping pages edits the message with the rendered pages, no queries
+            message = channel.add_message(embeds=pages[0])
+            view = bot.OverviewPagesView(pages)
+            message.view = view
+            assert view.previous_button.disabled and not view.next_button.disabled
+            with tracing.assert_max_queries(0, name='next_page'):
+                await view.next_page(FakeInteraction(world, world.users[1], channel, message=message))
+            assert message.embeds == pages[1] and view.next_button.disabled
+    asyncio.run(scenario())
@@ -1,21 +1,502 @@
+import argparse
 import asyncio
+import io
+import os
+import time
+import tracemalloc
+import zipfile
+
+import pytest
+
+from asset_server import FixtureFetcher, load_fixture, serve_assets
+from asset_cache import AssetCache, AssetCacheMiss, get_default_asset_cache
+from base_pack import CompressionSettings, clear_base_packs
+from datapack_cache import DatapackCache, build_draft_datapacks, get_player_datapack
 from datapack_generator import DatapackGenerator
+from datapack_ops import AppendLines, GiveItem, GrantAdvancement, WriteFile, compile_plan, render_ops
 from items import pools, DraftItem
+from normalize import DatapackValidationError, normalize_file
+import items
+
+
+def test_render_ops_groups_lines_into_one_block():
+    ops = [GiveItem("lead", 23), GrantAdvancement("adventure/kill_all_mobs", "minecraft:slime"),
+           GrantAdvancement("husbandry/balanced_diet")]
+    assert render_ops(ops) == (
+        "\ngive @a minecraft:lead 23"
+        "\nadvancement grant @a only minecraft:adventure/kill_all_mobs minecraft:slime"
+        "\nadvancement grant @a only minecraft:husbandry/balanced_diet\n")
+    assert render_ops([WriteFile("{}")]) == "{}"
+
+
+def test_plan_routes_items_in_draft_order():
+    drafted = [items.d_fire_res, items.d_mesa, items.d_grace, items.d_rods, items.d_obi]
+    plan = compile_plan(drafted)
+    assert compile_plan(list(drafted)) is plan
+
+    on_load = plan.apply("base", "on_load.mcfunction")
+    assert on_load.startswith("base\n")
+    assert on_load.index("minecraft:badlands") < on_load.index("minecraft:obsidian 10")
+
+    tick = plan.apply("tick", "data/draaft/functions/tick.mcfunction")
+    assert tick.index("fire_resistance") < tick.index("dolphins_grace")
+    assert "badlands" not in tick
+
+    assert plan.apply("untouched", "pack.mcmeta") == "untouched"
+    assert [name for name, _ in plan.generated_files] == [
+        "data/minecraft/loot_tables/entities/blaze.json"]
+
+
+class _QueriedItem:
+    """Stand-in item that isn't registered in the catalog."""
+
+    def __init__(self, file_query, line):
+        self.file_query = file_query
+        self.datapack_ops = [AppendLines(line)]
+
+
+def test_dispatch_index_matches_per_item_scan():
+    from bench_datapack import scan_apply, synthetic_index
+
+    drafted = [_QueriedItem("tick.mcfunction", "say a"), _QueriedItem(None, "say b"),
+               _QueriedItem("functions/tick.mcfunction", "say c"), _QueriedItem("tick.mcfunction", "say d"),
+               *items.all_items]
+    plan = compile_plan(drafted)
+    filenames = synthetic_index(50) + ["tick.mcfunction", "other/tick.mcfunction"]
+    dispatch = plan.dispatch(filenames)
+    # Only the files the plan changes are dispatched
+    assert sorted(dispatch) == ["data/draaft/functions/tick.mcfunction", "on_load.mcfunction",
+                                "other/tick.mcfunction", "tick.mcfunction"]
+    for filename in filenames:
+        expected = scan_apply(drafted, "base", filename)
+        assert plan.apply("base", filename) == expected, filename
+        assert plan.apply("base", filename, dispatch) == expected, filename
+    assert plan.apply("", "data/draaft/functions/tick.mcfunction").startswith("\nsay a\n\nsay c\n\nsay d\n")
+
+
+SAMPLE_FILES = {
+    "draaftpack/on_load.mcfunction": "say loaded",
+    "draaftpack/pack.mcmeta": '{"pack": {"pack_format": 6, "description": "draaft"}}',
+    **{f"draaftpack/data/draaft/functions/part_{i:02}.mcfunction": f"say part {i}" for i in range(24)},
+}
+
+
+def _zip_names(data: bytes):
+    with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+        return zip_file.namelist()
+
+
+def test_concurrent_download_speedup_and_order():
+    async def build(max_concurrency):
+        async with serve_assets(SAMPLE_FILES, latency=0.05) as server:
+            generator = DatapackGenerator(
+                "bench", [items.d_mesa], base_url=server.url, max_concurrency=max_concurrency)
+            start = time.perf_counter()
+            data = await generator.generate_datapack()
+            return time.perf_counter() - start, data
+
+    sequential_time, sequential_data = asyncio.run(build(1))
+    concurrent_time, concurrent_data = asyncio.run(build(8))
+    print(f"sequential {sequential_time:.2f}s, concurrent {concurrent_time:.2f}s, "
+          f"speedup {sequential_time / concurrent_time:.1f}x")
+
+    expected = [path[path.find('/') + 1:] for path in SAMPLE_FILES]
+    assert _zip_names(sequential_data) == expected
+    assert _zip_names(concurrent_data) == expected
+    assert concurrent_time * 3 < sequential_time
+
+
+def test_transient_failures_are_retried():
+    async def build():
+        async with serve_assets(SAMPLE_FILES, fail_first={"index.txt", "draaftpack/pack.mcmeta"}) as server:
+            generator = DatapackGenerator(
+                "retry", [items.d_mesa], base_url=server.url, retry_backoff=0.01)
+            return await generator.generate_datapack()
+
+    assert "pack.mcmeta" in _zip_names(asyncio.run(build()))
+
+
+def test_failed_build_stops_its_other_downloads():
+    index = "\n".join(SAMPLE_FILES).encode('utf-8')
+    in_flight = set()
+
+    async def fetcher(url, headers):
+        if url.endswith("/index.txt"):
+            return 200, index, {}
+        if url.endswith("/on_load.mcfunction"):
+            return 200, b'say loaded', {}
+        if url.endswith("/pack.mcmeta"):
+            await asyncio.sleep(0.01)
+            return 404, b'', {}
+        in_flight.add(url)
+        try:
+            await asyncio.sleep(1)
+        finally:
+            in_flight.discard(url)
+        return 200, b'say hi', {}
+
+    async def scenario():
+        clear_base_packs()
+        generator = DatapackGenerator("fail", [], base_url="http://fixture", fetcher=fetcher, max_concurrency=4)
+        with pytest.raises(Exception, match="HTTP 404"):
+            await generator.generate_datapack()
+        # Nothing from the window is left running once the build has failed
+        assert in_flight == set()
+
+    asyncio.run(scenario())
+
+
+def test_fixture_builds_offline_through_fetcher_and_server():
+    fixture = load_fixture()
+    assert "draaftpack/on_load.mcfunction" in fixture
+    drafted = [items.d_mesa, items.d_grace, items.d_rods]
+
+    async def scenario():
+        # Flaky fetcher: every request has a 30% chance of a 503
+        fetcher = FixtureFetcher(fixture, latency=0.001, failure_rate=0.3, seed=7)
+        via_fetcher = await DatapackGenerator("fixture", drafted, base_url=fetcher.url, fetcher=fetcher,
+                                              retries=8, retry_backoff=0).generate_datapack()
+        async with serve_assets(fixture) as server:
+            via_server = await DatapackGenerator("fixture", drafted, base_url=server.url).generate_datapack()
+        return via_fetcher, via_server, fetcher.requests
+
+    via_fetcher, via_server, requests = asyncio.run(scenario())
+    assert any(status == 503 for _, status in requests)
+    assert via_fetcher == via_server
+    with zipfile.ZipFile(io.BytesIO(via_fetcher)) as zip_file:
+        assert "minecraft:badlands" in zip_file.read("on_load.mcfunction").decode('utf-8')
+        assert b"dolphins_grace" in zip_file.read("data/draaft/functions/tick.mcfunction")
+
+
+def test_normalize_merges_grants_and_gives():
+    content = b"""
+give @a minecraft:paper 23
+advancement grant @a only minecraft:adventure/kill_all_mobs minecraft:slime
+advancement grant @a only minecraft:husbandry/balanced_diet minecraft:apple   
+give @a minecraft:paper
+advancement grant @a only minecraft:adventure/kill_all_mobs minecraft:slime
+
+advancement grant @a only minecraft:husbandry/balanced_diet
+say what's up [
+"""
+    assert normalize_file("on_load.mcfunction", content) == (
+        b"give @a minecraft:paper 24\n"
+        b"advancement grant @a only minecraft:adventure/kill_all_mobs minecraft:slime\n"
+        b"advancement grant @a only minecraft:husbandry/balanced_diet\n"
+        b"say what's up [\n")
+    # clear and revoke depend on what came before, so nothing moves across them
+    content = b"""give @a minecraft:stone
+clear @a minecraft:stone
+give @a minecraft:stone
+advancement grant @a only minecraft:story/mine_stone
+advancement revoke @a only minecraft:story/mine_stone
+advancement grant @a only minecraft:story/mine_stone
+advancement grant @a only minecraft:story/mine_stone
+"""
+    assert normalize_file("on_load.mcfunction", content) == (
+        b"give @a minecraft:stone\n"
+        b"clear @a minecraft:stone\n"
+        b"give @a minecraft:stone\n"
+        b"advancement grant @a only minecraft:story/mine_stone\n"
+        b"advancement revoke @a only minecraft:story/mine_stone\n"
+        b"advancement grant @a only minecraft:story/mine_stone\n")
+    assert normalize_file("f.mcfunction", b"data modify storage x:y t set value '['") == (
+        b"data modify storage x:y t set value '['\n")
+    for line in (b"execute as @a run say it's fine [", b"execute run execute at @s run me can't stop",
+                 b'tellraw @a {"text":"it\'s fine"}', b"scoreboard players set @s[tag=it's] x 1"):
+        assert normalize_file("f.mcfunction", line) == line + b"\n"
+    assert normalize_file("a.json", b'{\n  "a": [1, 2]\n}') == b'{"a":[1,2]}'
+    assert normalize_file("a.bin", b"\x00 {") == b"\x00 {"
+
+    for filename, bad in [("a.json", b'{"a": }'), ("f.mcfunction", b"/give @a minecraft:paper"),
+                          ("f.mcfunction", b'summon minecraft:boat ~ ~ ~ {Passengers:[{id:"shulker"}}'),
+                          ("f.mcfunction", b'tellraw @a {"text":"oops}'),
+                          ("f.mcfunction", b"execute as @a run tellraw @a {'text':'oops}")]:
+        with pytest.raises(DatapackValidationError):
+            normalize_file(filename, bad)
+
+
+def test_normalized_packs_are_smaller_and_invalid_packs_never_ship(tmp_path):
+    drafted = [item for pool in pools for item in pool[2]]
+    broken = {**load_fixture(), "draaftpack/data/draaft/advancements/root.json": b'{"criteria": '}
+
+    async def scenario():
+        fetcher = FixtureFetcher(load_fixture())
+        normalized, raw = [await DatapackGenerator("n", drafted, base_url=fetcher.url, fetcher=fetcher,
+                                                   normalize=normalize).generate_datapack()
+                           for normalize in (True, False)]
+        broken_fetcher = FixtureFetcher(broken, base_url="http://broken-fixture")
+        with pytest.raises(DatapackValidationError):
+            await DatapackGenerator("broken", drafted, base_url=broken_fetcher.url,
+                                    fetcher=broken_fetcher).save_datapack(str(tmp_path))
+        return normalized, raw
+
+    normalized, raw = asyncio.run(scenario())
+    assert len(normalized) < len(raw)
+    assert os.listdir(tmp_path) == []
+    with zipfile.ZipFile(io.BytesIO(normalized)) as zip_file:
+        loot_table = zip_file.read("data/minecraft/loot_tables/entities/blaze.json")
+    assert b"\n" not in loot_table and b": " not in loot_table
+
+
+def test_asset_cache_skips_network_when_upstream_unchanged(tmp_path):
+    async def build(server, **cache_options):
+        cache = AssetCache(str(tmp_path / "cache"), **cache_options)
+        generator = DatapackGenerator("cached", [items.d_mesa], base_url=server.url, asset_cache=cache)
+        return await generator.generate_datapack()
+
+    async def scenario():
+        async with serve_assets(dict(SAMPLE_FILES)) as server:
+            cold = await build(server)
+            assert len(server.requests) == len(SAMPLE_FILES) + 1
+
+            # Index still fresh: no requests at all
+            server.requests.clear()
+            assert await build(server) == cold
+            assert server.requests == []
+
+            # Index stale: everything is revalidated, nothing is re-sent
+            assert await build(server, index_max_age=0) == cold
+            assert len(server.requests) == len(SAMPLE_FILES) + 1
+            assert {status for _, status in server.requests} == {304}
+
+            # Upstream changed: only the changed file is re-sent
+            server.requests.clear()
+            server.files["draaftpack/pack.mcmeta"] = '{"pack": {"pack_format": 7}}'
+            await build(server, index_max_age=0)
+            assert [path for path, status in server.requests if status == 200] == [
+                "draaftpack/pack.mcmeta"]
+
+        # Server gone: offline mode builds from the cache alone
+        return await build(server, offline=True)
+
+    assert "pack.mcmeta" in _zip_names(asyncio.run(scenario()))
+
+
+def test_asset_cache_evicts_least_recently_used(tmp_path):
+    cache = AssetCache(str(tmp_path / "cache"), max_bytes=250)
+    cache.store("a", b"a" * 100)
+    cache.store("b", b"b" * 100)
+    cache.read("a")
+    cache.store("c", b"c" * 100)
+    assert cache.has("a") and cache.has("c") and not cache.has("b")
+    assert cache.total_bytes() == 200
+    cache.save()
+
+    reloaded = AssetCache(str(tmp_path / "cache"), offline=True)
+    assert reloaded.read("a") == b"a" * 100
+    with pytest.raises(AssetCacheMiss):
+        reloaded.read("b")
+
+
+def test_streaming_targets_produce_identical_archives(tmp_path):
+    class AsyncUpload:
+        def __init__(self):
+            self.received = bytearray()
+
+        async def write(self, data):
+            self.received += data
+
+    async def scenario():
+        async with serve_assets(SAMPLE_FILES) as server:
+            def generator():
+                return DatapackGenerator("stream", [items.d_mesa, items.d_rods], base_url=server.url)
+
+            in_memory = await generator().generate_datapack()
+            path = await generator().save_datapack(str(tmp_path))
+            spooled = await generator().generate_datapack_spooled()
+            upload = AsyncUpload()
+            await generator().stream_datapack(upload)
+            return in_memory, open(path, 'rb').read(), spooled.read(), bytes(upload.received)
+
+    in_memory, saved, spooled, uploaded = asyncio.run(scenario())
+    assert _zip_names(in_memory)[-1] == "data/minecraft/loot_tables/entities/blaze.json"
+    for data in (saved, spooled, uploaded):
+        assert data == in_memory
+    assert os.listdir(tmp_path) == ["draaft_stream.zip"]
+
+
+def test_archives_are_reproducible_and_compression_is_tunable():
+    settings = {
+        "deflate": CompressionSettings(),
+        "fast": CompressionSettings(level=1),
+        "stored": CompressionSettings(method=zipfile.ZIP_STORED),
+        "threshold": CompressionSettings(store_below=20),
+    }
+
+    async def scenario():
+        async with serve_assets(SAMPLE_FILES) as server:
+            builds = {}
+            for attempt in range(2):
+                if attempt:
+                    # ZIP timestamps have two-second resolution
+                    await asyncio.sleep(2.1)
+                for name, compression in settings.items():
+                    # Start from scratch so nothing is shared between the two builds
+                    clear_base_packs()
+                    generator = DatapackGenerator("repro", [items.d_mesa, items.d_rods],
+                                                  base_url=server.url, compression=compression)
+                    builds.setdefault(name, []).append(await generator.generate_datapack())
+            return builds
+
+    builds = asyncio.run(scenario())
+    for first, second in builds.values():
+        assert first == second
+    assert len(builds["stored"][0]) > len(builds["deflate"][0])
+
+    def compress_types(data):
+        with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+            assert zip_file.testzip() is None
+            return {info.filename: (info.compress_type, info.file_size) for info in zip_file.infolist()}
+
+    assert {t for t, _ in compress_types(builds["stored"][0]).values()} == {zipfile.ZIP_STORED}
+    for compress_type, size in compress_types(builds["threshold"][0]).values():
+        assert compress_type == (zipfile.ZIP_STORED if size < 20 else zipfile.ZIP_DEFLATED)
+    with zipfile.ZipFile(io.BytesIO(builds["deflate"][0])) as zip_file:
+        assert {info.date_time for info in zip_file.infolist()} == {(1980, 1, 1, 0, 0, 0)}
+
+
+def test_streaming_peak_memory_is_bounded(tmp_path):
+    file_size = 512 * 1024
+
+    async def scenario(big_files):
+        async with serve_assets(big_files) as server:
+            generator = DatapackGenerator("big", [], base_url=server.url, max_concurrency=4)
+            tracemalloc.start()
+            try:
+                await generator.stream_datapack(str(tmp_path / "big.zip"))
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+    peaks = {}
+    for count in (48, 96):
+        big_files = {f"draaftpack/data/draaft/blob_{i:02}.bin": os.urandom(file_size) for i in range(count)}
+        peaks[count] = asyncio.run(scenario(big_files))
+        print(f"streamed {count * file_size / 2**20:.0f}MiB with a peak of {peaks[count] / 2**20:.1f}MiB")
+        assert len(_zip_names((tmp_path / "big.zip").read_bytes())) == count
+
+    # Memory depends on the download window and compression threads, not on pack size
+    assert peaks[48] < 48 * file_size / 2
+    assert peaks[96] < peaks[48] * 1.5
+
+
+def test_base_pack_is_compressed_once_and_copied(tmp_path):
+    async def scenario():
+        async with serve_assets(SAMPLE_FILES) as server:
+            first = await DatapackGenerator("a", [items.d_mesa], base_url=server.url).generate_datapack()
+            server.requests.clear()
+            second = await DatapackGenerator("b", [items.d_rods], base_url=server.url).generate_datapack()
+            uncached = [path for path, _ in server.requests]
+
+            clear_base_packs()
+            cache = AssetCache(str(tmp_path / "cache"))
+            await DatapackGenerator("c", [items.d_mesa], base_url=server.url,
+                                    asset_cache=cache).generate_datapack()
+            server.requests.clear()
+            await DatapackGenerator("d", [items.d_rods], base_url=server.url,
+                                    asset_cache=cache).generate_datapack()
+            return first, second, uncached, [path for path, _ in server.requests]
+
+    first, second, uncached, cached = asyncio.run(scenario())
+    # Without an asset cache nothing vouches for upstream files that kept
+    # their path, so every file is fetched again
+    assert sorted(uncached) == sorted(["index.txt", *SAMPLE_FILES])
+    # While the cached index is fresh nothing is fetched again
+    assert cached == []
+    overlay = {"on_load.mcfunction"}
+
+    with zipfile.ZipFile(io.BytesIO(first)) as a, zipfile.ZipFile(io.BytesIO(second)) as b:
+        assert a.testzip() is None and b.testzip() is None
+        for name in a.namelist():
+            if name in overlay or name not in b.namelist():
+                continue
+            assert a.getinfo(name).CRC == b.getinfo(name).CRC
+            assert a.getinfo(name).compress_size == b.getinfo(name).compress_size
+
+
+def test_datapack_cache_shares_archives_between_item_orders():
+    def draft(draft_id, status, picks):
+        return {'draft_id': draft_id, 'status': status, 'players': [(1, "Steve Alex")],
+                'categories_order': ["Biomes", "Misc"],
+                'drafted_items_by_player': {1: picks}}
+
+    async def scenario():
+        cache = DatapackCache()
+        async with serve_assets(SAMPLE_FILES) as server:
+            first = draft("d1", 'completed', {"Biomes": ["Mesa"], "Misc": ["Rod Rates"]})
+            second = draft("d2", 'completed', {"Misc": ["Rod Rates"], "Biomes": ["Mesa"]})
+            name, data = await get_player_datapack(first, 1, cache, base_url=server.url)
+            builds = await asyncio.gather(*[
+                get_player_datapack(second, 1, cache, base_url=server.url) for _ in range(3)])
+            with pytest.raises(ValueError):
+                await get_player_datapack(draft("d3", 'active', {}), 1, cache, base_url=server.url)
+            return cache, name, data, builds
+
+    cache, name, data, builds = asyncio.run(scenario())
+    assert name == "draaft_d1_Steve_Alex.zip"
+    assert all(other == data for _, other in builds)
+    assert "data/minecraft/loot_tables/entities/blaze.json" in _zip_names(data)
+    stats = cache.stats()
+    assert stats['entries'] == 1 and stats['hits'] == 3 and stats['misses'] == 1
+
+
+def test_draft_datapacks_build_in_parallel_with_shared_downloads():
+    draft_state = {
+        'draft_id': "batch", 'status': 'completed',
+        'players': [(1, "a"), (2, "b"), (3, "c")],
+        'categories_order': ["Biomes", "Misc"],
+        'drafted_items_by_player': {1: {"Biomes": ["Mesa"]}, 2: {"Misc": ["Rod Rates"]}, 3: {}},
+    }
+
+    async def scenario():
+        async with serve_assets(SAMPLE_FILES, latency=0.01) as server:
+            packs = await build_draft_datapacks(draft_state, DatapackCache(), base_url=server.url)
+            return packs, [path for path, _ in server.requests]
+
+    packs, requested = asyncio.run(scenario())
+    assert [name for name, _ in packs.values()] == [
+        "draaft_batch_a.zip", "draaft_batch_b.zip", "draaft_batch_c.zip"]
+    # Every file is fetched once for the whole draft
+    assert sorted(requested) == sorted(["index.txt", *SAMPLE_FILES])
+    assert "data/minecraft/loot_tables/entities/blaze.json" in _zip_names(packs[2][1])
+    assert packs[1][1] != packs[3][1]
+
+
+def test_datapack_cache_evicts_within_budget():
+    cache = DatapackCache(max_bytes=250)
+    cache.put("a", b"a" * 100)
+    cache.put("b", b"b" * 100)
+    assert cache.get("a") is not None
+    cache.put("c", b"c" * 100)
+    cache.put("huge", b"h" * 1000)
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.total_bytes == 200
+    assert cache.stats()['evictions'] == 1
 
 
 async def main():
+    parser = argparse.ArgumentParser(description="Build a datapack with every item.")
+    parser.add_argument('--live', action='store_true',
+                        help="build from the live asset server instead of the recorded fixture")
+    args = parser.parse_args()
+
     # Get all items from all pools
     all_draft_items = []
     for pool in pools:
         # pool[2] contains the list of DraftItems
         all_draft_items.extend(pool[2])
 
-    # Create the datapack generator with all items
-    generator = DatapackGenerator("test_all_items", all_draft_items)
-
     try:
-        # Generate and save the datapack
-        output_path = await generator.save_datapack()
+        if args.live:
+            # Create the datapack generator with all items
+            generator = DatapackGenerator("test_all_items", all_draft_items,
+                                          asset_cache=get_default_asset_cache())
+            output_path = await generator.save_datapack()
+        else:
+            async with serve_assets(load_fixture()) as server:
+                generator = DatapackGenerator("test_all_items", all_draft_items, base_url=server.url)
+                output_path = await generator.save_datapack()
         print(f"Successfully generated datapack at: {output_path}")
         print(f"Total items included: {len(all_draft_items)}")
 
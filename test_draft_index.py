@@ -0,0 +1,105 @@
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+
+import bot
+import database
+import tracing
+from draft_index import DraftIndex
+from load_test import _DRAFT_ID, FakeDiscord, FakeInteraction, simulated_bot
+
+
+def test_suggestions_rank_own_and_active_drafts_first():
+    index = DraftIndex(recent_per_channel=2)
+    index.load([])
+    index.add('aaa111', 1, [(10, "Alice"), (11, "Bob")], 100)
+    index.add('bbb222', 1, [(12, "Carol"), (13, "Dave")], 200)
+    index.add('ccc333', 1, [(10, "Alice"), (12, "Carol")], 300)
+    index.add('ddd444', 2, [(10, "Alice"), (13, "Dave")], 400)
+    index.set_status('ccc333', 'completed')
+
+    assert [d.draft_id for d in index.suggest(1, 10, "")] == ['aaa111', 'bbb222', 'ccc333']
+    assert [d.draft_id for d in index.suggest(1, 13, "")] == ['bbb222', 'aaa111', 'ccc333']
+    assert [d.draft_id for d in index.suggest(1, 10, " CAROL")] == ['bbb222', 'ccc333']
+    assert [d.draft_id for d in index.suggest(1, 10, "ccc")] == ['ccc333']
+    assert [d.draft_id for d in index.suggest(1, 10, "", active_only=True)] == ['aaa111', 'bbb222']
+    assert index.suggest(3, 10, "") == []
+    assert len(index.get('aaa111').choice_name()) <= 100
+
+    # Only the two most recent finished drafts of a channel are kept
+    index.set_status('aaa111', 'reset')
+    index.set_status('bbb222', 'completed')
+    assert index.get('aaa111') is None
+    assert [d.draft_id for d in index.suggest(1, 12, "")] == ['ccc333', 'bbb222']
+    assert len(index) == 3
+
+
+def test_rules_out_only_what_the_index_knows():
+    index = DraftIndex()
+    assert not index.rules_out('unknown', 1, active_only=True)
+    index.load([{'draft_id': 'aaa111', 'channel_id': 1, 'status': 'completed',
+                 'created_at_utc': 1, 'players': [(10, "Alice")]}])
+    assert index.rules_out('aaa111', 2)
+    assert not index.rules_out('aaa111', 1)
+    assert index.rules_out('aaa111', 1, active_only=True)
+    # An unindexed draft may be an old finished one, but is never active
+    assert not index.rules_out('unknown', 1)
+    assert index.rules_out('unknown', 1, active_only=True)
+
+
+def test_load_keeps_active_and_recent_drafts():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, 'index.db')
+        database.initialize_database(db_name)
+        drafts = []
+        for n in range(6):
+            draft_id = database.create_draft(db_name, 1, 5, 10, [(10, "Alice"), (11, f"P{n}")],
+                                             2, 12, [0, 1], 24)
+            drafts.append(draft_id)
+        conn = sqlite3.connect(db_name)
+        conn.executemany("UPDATE drafts SET created_at_utc = ? WHERE draft_id = ?",
+                         [(n, draft_id) for n, draft_id in enumerate(drafts)])
+        conn.commit()
+        conn.close()
+        for draft_id in drafts[:4]:
+            database.update_draft_status(db_name, draft_id, 'completed')
+
+        index = DraftIndex(recent_per_channel=2)
+        index.load(database.get_indexed_drafts(db_name, index.recent_per_channel))
+        assert {draft.draft_id for draft in index.suggest(5, 10, "")} == set(drafts[2:])
+        assert index.get(drafts[3]).players == "Alice, P3"
+        assert index.get(drafts[1]) is None
+
+
+def test_commands_autocomplete_and_reject_from_the_index():
+    for command in (bot.draftboard_slash, bot.mydraft_slash, bot.draftstatus_slash, bot.resetdraft_slash):
+        assert command._params['draft_id'].autocomplete is not None
+
+    async def scenario():
+        world = FakeDiscord(channels=2, rest_latency=0)
+        channel, other = world.channels.values()
+        with simulated_bot(world, random.Random(0)):
+            players = [world.users[user_id] for user_id in (1, 2)]
+            start = FakeInteraction(world, players[0], channel)
+            await bot.start_draft_slash.callback(start, *players)
+            draft_id = _DRAFT_ID.search(start.original.content).group(1)
+
+            typing_id = FakeInteraction(world, players[1], channel)
+            with tracing.trace('autocomplete') as current:
+                choices = await bot.draft_id_autocomplete(typing_id, draft_id[:3])
+            assert [choice.value for choice in choices] == [draft_id]
+            assert current.queries == []
+            assert await bot.draft_id_autocomplete(FakeInteraction(world, players[1], other), "") == []
+
+            # The wrong channel is caught before any query
+            wrong_channel = FakeInteraction(world, players[0], other)
+            with tracing.trace('draftboard') as current:
+                await bot.draftboard_slash.callback(wrong_channel, draft_id)
+            assert current.queries == []
+
+            await bot.resetdraft_slash.callback(FakeInteraction(world, players[0], channel), draft_id)
+            assert await bot.active_draft_id_autocomplete(typing_id, "") == []
+            assert [choice.value for choice in await bot.draft_id_autocomplete(typing_id, "")] == [draft_id]
+    asyncio.run(scenario())
@@ -0,0 +1,68 @@
+import discord
+
+from embed_layout import (EmbedSpec, Section, layout_pages, embed_size,
+                          EMBEDS_PER_MESSAGE, FIELD_COUNT_LIMIT, FIELD_NAME_LIMIT,
+                          FIELD_VALUE_LIMIT, MESSAGE_TOTAL_LIMIT, TITLE_LIMIT)
+
+
+def assert_within_limits(pages):
+    for page in pages:
+        assert 1 <= len(page) <= EMBEDS_PER_MESSAGE
+        assert sum(embed_size(embed) for embed in page) <= MESSAGE_TOTAL_LIMIT
+        for embed in page:
+            assert len(embed.title) <= TITLE_LIMIT
+            assert len(embed.fields) <= FIELD_COUNT_LIMIT
+            for field in embed.fields:
+                assert len(field.name) <= FIELD_NAME_LIMIT
+                assert 0 < len(field.value) <= FIELD_VALUE_LIMIT
+
+
+def test_small_layout_is_one_embed():
+    spec = EmbedSpec("Title", "Description", sections=[
+        Section("A", ["one", "two"]), Section("B", ["three"])])
+    pages = layout_pages([spec])
+    assert len(pages) == 1 and len(pages[0]) == 1
+    embed = pages[0][0]
+    assert [(f.name, f.value) for f in embed.fields] == [
+        ("A", "one\ntwo"), ("B", "three")]
+    assert embed.description == "Description"
+
+
+def test_long_section_wraps_into_continuation_fields():
+    lines = [f"**Item {i}** - a reasonably long item description" for i in range(100)]
+    pages = layout_pages([EmbedSpec("Board", sections=[Section("Items", lines)])])
+    assert_within_limits(pages)
+    fields = [f for page in pages for embed in page for f in embed.fields]
+    assert fields[0].name == "Items"
+    assert all(f.name == "Items (cont.)" for f in fields[1:])
+    # No line is lost or cut when wrapping
+    assert "\n".join(f.value for f in fields).split("\n") == lines
+
+
+def test_many_sections_split_across_embeds_and_pages():
+    sections = [Section(f"Player {i}", [f"pick {j}" * 20 for j in range(10)])
+                for i in range(60)]
+    specs = [EmbedSpec("Status", "Rules", color=discord.Color.gold(), sections=sections),
+             EmbedSpec("History", "No picks made yet.")]
+    pages = layout_pages(specs)
+    assert len(pages) > 1
+    assert_within_limits(pages)
+    assert pages[-1][-1].title == "History"
+
+
+def test_max_pages_truncates_with_notice():
+    sections = [Section(f"Player {i}", ["x" * 900]) for i in range(20)]
+    pages = layout_pages([EmbedSpec("Board", footer="Draft ID: abc", sections=sections)],
+                         max_pages=1)
+    assert len(pages) == 1
+    assert_within_limits(pages)
+    footer = pages[0][-1].footer.text
+    assert footer.startswith("Draft ID: abc | ")
+    assert "more line(s) not shown" in footer
+
+
+def test_oversized_text_is_clipped():
+    spec = EmbedSpec("T" * 400, sections=[Section("N" * 400, ["v" * 5000])])
+    pages = layout_pages([spec])
+    assert_within_limits(pages)
+    assert pages[0][0].fields[0].value.endswith("…")
@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+import database
+import export
+
+DAY = 24 * 3600
+JAN_1 = 1735689600  # 2025-01-01 00:00 UTC
+
+
+@pytest.fixture
+def db_name():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, 'export.db')
+        database.initialize_database(db_name)
+        yield db_name
+
+
+def add_draft(db_name: str, guild_id: int, created_at_utc: int, players, status: str = 'completed',
+              picks=None) -> str:
+    order = list(range(len(players))) * 2
+    draft_id = database.create_draft(db_name, guild_id, 10, players[0], [(p, f"user{p}") for p in players],
+                                     1, 2, order, len(order), seed=f"seed{guild_id}")
+    items = [(category, item) for category, names in database.INITIAL_ITEMS_BY_CATEGORY.items()
+             for item in names]
+    for slot, (category, item) in list(zip(order, items))[:picks]:
+        assert database.record_pick(db_name, draft_id, players[slot], category, item)
+    database.update_draft_status(db_name, draft_id, status)
+    conn = sqlite3.connect(db_name)
+    conn.execute("UPDATE drafts SET created_at_utc = ? WHERE draft_id = ?", (created_at_utc, draft_id))
+    conn.commit()
+    conn.close()
+    return draft_id
+
+
+def test_ndjson_has_one_ordered_record_per_completed_draft(db_name):
+    first = add_draft(db_name, 1, JAN_1, [1, 2])
+    add_draft(db_name, 1, JAN_1 + DAY, [3, 4], status='active')
+    second = add_draft(db_name, 2, JAN_1 + 2 * DAY, [5, 6, 7])
+
+    out = io.StringIO()
+    # A tiny chunk size splits drafts across fetches
+    assert export.export_drafts(db_name, out, 'ndjson', chunk_size=3) == 2
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [record['draft_id'] for record in records] == [first, second]
+    assert [player['user_id'] for player in records[1]['players']] == [5, 6, 7]
+    picks = records[1]['picks']
+    assert [pick['pick_number'] for pick in picks] == list(range(1, 7))
+    assert [pick['user_id'] for pick in picks] == [5, 6, 7, 5, 6, 7]
+    assert records[0]['seed'] == "seed1" and records[0]['players'][0]['display_name'] == "user1"
+
+
+def test_csv_filters_by_guild_and_date(db_name):
+    add_draft(db_name, 1, JAN_1, [1, 2])
+    in_range = add_draft(db_name, 1, JAN_1 + DAY, [3, 4])
+    add_draft(db_name, 2, JAN_1 + DAY, [5, 6])
+    add_draft(db_name, 1, JAN_1 + 3 * DAY, [7, 8])
+
+    out = io.StringIO()
+    since, until = export.parse_date("2025-01-02"), export.parse_date("2025-01-03", end_of_day=True)
+    assert export.export_drafts(db_name, out, 'csv', guild_id=1, since=since, until=until) == 4
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert {row['draft_id'] for row in rows} == {in_range}
+    assert [row['pick_number'] for row in rows] == ['1', '2', '3', '4']
+    assert list(rows[0]) == list(export.CSV_COLUMNS)
+
+
+def test_players_and_drafts_without_picks_are_exported(db_name):
+    # Only the first pick was made before each draft was marked completed
+    partial = add_draft(db_name, 1, JAN_1, [1, 2], picks=1)
+    empty = add_draft(db_name, 1, JAN_1 + DAY, [3, 4], picks=0)
+
+    out = io.StringIO()
+    assert export.export_drafts(db_name, out, 'ndjson') == 2
+    records = {record['draft_id']: record for record in map(json.loads, out.getvalue().splitlines())}
+    assert [player['user_id'] for player in records[partial]['players']] == [1, 2]
+    assert [pick['user_id'] for pick in records[partial]['picks']] == [1]
+    assert [player['display_name'] for player in records[empty]['players']] == ["user3", "user4"]
+    assert records[empty]['picks'] == []
+
+    out = io.StringIO()
+    assert export.export_drafts(db_name, out, 'csv') == 4
+    rows = [(row['draft_id'], row['user_id'], row['pick_number'])
+            for row in csv.DictReader(io.StringIO(out.getvalue()))]
+    assert rows == [(partial, '1', '1'), (partial, '2', ''), (empty, '3', ''), (empty, '4', '')]
+
+
+def test_picks_commit_while_an_export_is_reading(db_name):
+    add_draft(db_name, 1, JAN_1, [1, 2])
+    active = add_draft(db_name, 1, JAN_1 + DAY, [3, 4], status='active', picks=0)
+    rows = export.iter_rows(db_name, chunk_size=1)
+    next(rows)
+    # The export's read cursor is still open, and the pick commits anyway
+    category, names = next(iter(database.INITIAL_ITEMS_BY_CATEGORY.items()))
+    assert database.record_pick(db_name, active, 3, category, names[0])
+    assert len(list(rows)) == 3
+
+
+def test_filters_are_served_by_indexes(db_name):
+    conn = sqlite3.connect(db_name)
+    for filters in [(1, JAN_1, JAN_1 + DAY), (None, JAN_1, None), (1, None, None), (None, None, None)]:
+        query, params = export._draft_query(*filters)
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+        assert "SCAN" not in plan and "TEMP B-TREE" not in plan, plan
+    conn.close()
@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+
+# Modules the bot's helpers import at startup. Importing them must not build
+# the datapack payloads or pull in the network/client stack.
+STARTUP_MODULES = ["items", "database", "utils", "datapack_generator"]
+HEAVY_MODULES = ["item_payloads", "aiohttp", "discord"]
+
+# Generous enough for a slow CI box, tight enough to catch an eager
+# `import discord` (~300ms) sneaking back in.
+IMPORT_BUDGET_SECONDS = 0.15
+
+_MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def measure_startup_import(modules=STARTUP_MODULES) -> dict:
+    """Import the given modules in a fresh interpreter and report the cost."""
+    script = _MEASURE_SCRIPT.format(modules=modules, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_startup_imports_skip_heavy_modules():
+    measurement = measure_startup_import()
+    assert measurement["loaded"] == []
+
+
+def test_startup_import_time_within_budget():
+    # Best of a few runs to keep scheduler noise out of the comparison
+    best = min(measure_startup_import()["elapsed"] for _ in range(3))
+    print(f"startup import time: {best * 1000:.1f}ms")
+    assert best < IMPORT_BUDGET_SECONDS
+
+
+def test_payloads_load_on_first_use():
+    script = (
+        "import sys, items\n"
+        "assert 'item_payloads' not in sys.modules\n"
+        "assert items.d_rods.datapack_ops[0].content.startswith('{')\n"
+        "assert 'item_payloads' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script],
+                   cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
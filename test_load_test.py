@@ -0,0 +1,26 @@
+import asyncio
+
+import bot
+import database
+from load_test import run_load
+
+
+def test_simulated_drafts_run_to_completion():
+    database_name = bot.DATABASE_NAME
+    result = asyncio.run(run_load(4, think=0, rest_latency=0, view_rate=0.5, channels=2,
+                                  datapacks=True, seed=7))
+
+    assert result['completed'] == 4
+    assert not result['errors']
+    assert result['picks'] == len(result['latencies']['pick'])
+    # Every draft makes 24 picks with two or four players and 18 with three
+    assert 4 * 18 <= result['picks'] <= 4 * 24
+    assert {'startdraft', 'pick'} <= set(result['latencies'])
+    probe = result['database']
+    assert probe.calls and probe.statements > probe.calls and probe.failures == 0
+    assert result['loop_lag']
+
+    # The fakes are unpatched afterwards
+    assert bot.DATABASE_NAME == database_name
+    assert 'get_channel' not in vars(bot.bot)
+    assert not bot.background_tasks
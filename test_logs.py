@@ -0,0 +1,113 @@
+import asyncio
+import io
+import json
+import logging
+import threading
+import time
+
+import pytest
+
+import logs
+
+
+class SlowStream(io.StringIO):
+    """A terminal that takes a while to accept each write."""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+        self.writer_threads = set()
+
+    def write(self, text):
+        self.writer_threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        return super().write(text)
+
+
+@pytest.fixture
+def output():
+    stream = SlowStream(0)
+    logs.setup_logging(level='INFO', log_format='text', path=None, stream=stream)
+    yield stream
+    logs.stop_logging()
+
+
+def lines(stream):
+    logs.stop_logging()
+    return stream.getvalue().splitlines()
+
+
+class _Interaction:
+    guild_id = 10
+    channel_id = 20
+    data = {'options': [{'name': 'draft_id', 'value': 'abc123'}]}
+
+    class user:
+        id = 30
+
+
+def test_records_carry_the_context_of_their_own_task(output):
+    logger = logging.getLogger('test_logs')
+
+    async def handle(interaction, draft_id=None):
+        logs.bind_interaction(interaction, draft_id=draft_id)
+        await asyncio.sleep(0)
+        logger.info("handled")
+
+    async def scenario():
+        await asyncio.gather(handle(_Interaction()), handle(_Interaction(), draft_id='view999'))
+        logger.info("outside")
+
+    asyncio.run(scenario())
+    written = lines(output)
+    assert any(line.endswith("handled draft_id=abc123 guild_id=10 channel_id=20 user_id=30") for line in written)
+    assert any("draft_id=view999" in line for line in written)
+    assert written[-1].endswith("test_logs: outside")
+
+
+def test_noisy_records_are_sampled(output):
+    logger = logging.getLogger('test_logs')
+    for n in range(250):
+        logger.warning("Draft %s has too many categories", n, extra=logs.sample(100))
+    logger.warning("not sampled")
+
+    written = lines(output)
+    sampled = [line for line in written if "too many categories" in line]
+    assert [line.split("Draft ")[1].split(" ")[0] for line in sampled] == ["0", "100", "200"]
+    assert sampled[1].endswith("occurrences=101")
+    assert "not sampled" in written[-1]
+
+
+def test_levels_change_at_runtime(output):
+    logger = logging.getLogger('test_logs.quiet')
+    logger.debug("hidden")
+    assert logs.set_level('debug', 'test_logs.quiet') == 'INFO'
+    logger.debug("shown")
+    with pytest.raises(ValueError):
+        logs.set_level('loud')
+    logger.setLevel(logging.NOTSET)
+    assert [line.split(": ", 1)[1] for line in lines(output)] == ["shown"]
+
+
+def test_slow_output_does_not_block_the_caller():
+    stream = SlowStream(0.05)
+    logs.setup_logging(level='INFO', path=None, stream=stream)
+    start = time.perf_counter()
+    for n in range(10):
+        logging.getLogger('test_logs').info("record %d", n)
+    elapsed = time.perf_counter() - start
+    assert len(lines(stream)) == 10
+    assert elapsed < 0.05
+    assert threading.get_ident() not in stream.writer_threads
+
+
+def test_json_lines_include_exceptions():
+    stream = io.StringIO()
+    logs.setup_logging(level='INFO', log_format='json', path=None, stream=stream)
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logging.getLogger('test_logs').exception("failed")
+    record = json.loads(lines(stream)[0])
+    assert record['level'] == 'ERROR' and record['logger'] == 'test_logs'
+    assert record['message'].startswith("failed\nTraceback") and "RuntimeError: boom" in record['message']
@@ -0,0 +1,83 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, 'ENABLED', True)
+    metrics.registry.clear()
+    yield metrics.registry
+    metrics.registry.clear()
+
+
+def test_disabled_decorator_returns_function_unchanged(monkeypatch):
+    monkeypatch.setattr(metrics, 'ENABLED', False)
+
+    def lookup():
+        return 1
+    assert metrics.timed('database')(lookup) is lookup
+
+
+def test_records_latency_counts_and_errors(enabled):
+    @metrics.timed('database')
+    def lookup(fail=False):
+        if fail:
+            raise ValueError("boom")
+        return 1
+
+    @metrics.timed('slash_command', 'startdraft')
+    async def command():
+        await asyncio.sleep(0.002)
+
+    assert lookup() == 1
+    with pytest.raises(ValueError):
+        lookup(fail=True)
+    asyncio.run(command())
+
+    database = enabled.histogram('database', 'test_records_latency_counts_and_errors.<locals>.lookup')
+    assert (database.count, database.errors) == (2, 1)
+    slash = enabled.histogram('slash_command', 'startdraft')
+    assert slash.count == 1 and slash.total >= 0.002
+    assert slash.cumulative_counts()[-1] == 1
+
+
+class _Route:
+    method = "PATCH"
+    path = "/channels/{channel_id}/messages/{message_id}"
+
+
+class _FakeHTTPClient:
+    async def request(self, route, **kwargs):
+        if kwargs.get('fail'):
+            raise RuntimeError("429")
+        return {}
+
+
+def test_discord_rest_calls_and_scrape_endpoint(enabled):
+    async def scenario():
+        client = _FakeHTTPClient()
+        metrics.instrument_http(client)
+        metrics.instrument_http(client)
+        await client.request(_Route())
+        with pytest.raises(RuntimeError):
+            await client.request(_Route(), fail=True)
+
+        runner = await metrics.start_http_server(port=0)
+        try:
+            port = runner.addresses[0][1]
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    return response.headers['Content-Type'], await response.text()
+        finally:
+            await runner.cleanup()
+
+    content_type, text = asyncio.run(scenario())
+    assert content_type.startswith("text/plain; version=0.0.4")
+    labels = 'kind="discord_rest",name="PATCH /channels/{channel_id}/messages/{message_id}"'
+    assert f'draaft_calls_total{{{labels}}} 2' in text
+    assert f'draaft_errors_total{{{labels}}} 1' in text
+    assert f'draaft_latency_seconds_bucket{{{labels},le="+Inf"}} 2' in text
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+
+import pytest
+
+import bot
+import database
+import tracing
+from load_test import _DRAFT_ID, FakeDiscord, FakeInteraction, dispatch_pick, find_board, patched, simulated_bot
+
+STATS_TABLES = ('guild_pick_stats', 'item_pick_stats', 'player_pick_stats', 'player_item_stats')
+ITEMS = [(category, item) for category, names in database.INITIAL_ITEMS_BY_CATEGORY.items() for item in names]
+
+
+@pytest.fixture
+def db_name():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, 'stats.db')
+        database.initialize_database(db_name)
+        yield db_name
+
+
+def play_draft(db_name: str, guild_id: int, players, items, status='completed') -> str:
+    order = list(range(len(players))) * 2
+    draft_id = database.create_draft(db_name, guild_id, 10, players[0], [(p, f"user{p}") for p in players],
+                                     1, 2, order, len(order))
+    for slot, (category, item) in zip(order, items):
+        assert database.record_pick(db_name, draft_id, players[slot], category, item)
+    if status != 'active':
+        database.update_draft_status(db_name, draft_id, status)
+    return draft_id
+
+
+def snapshot(db_name: str):
+    conn = sqlite3.connect(db_name)
+    tables = {table: sorted(conn.execute(f"SELECT * FROM {table}")) for table in STATS_TABLES}
+    conn.close()
+    return tables
+
+
+def test_counters_match_a_rebuild(db_name):
+    rng = random.Random(3)
+    for _ in range(12):
+        players = rng.sample(range(1, 8), rng.choice((2, 3)))
+        picks = rng.randint(0, len(players) * 2)
+        play_draft(db_name, rng.choice((1, 2)), players, rng.sample(ITEMS, picks),
+                   status=rng.choice(('completed', 'reset', 'active')))
+    # A repeated completion, as from racing final picks, changes nothing
+    completed = play_draft(db_name, 1, [1, 2], ITEMS[:4])
+    assert not database.update_draft_status(db_name, completed, 'completed')
+    incremental = snapshot(db_name)
+    assert all(incremental.values())
+    assert database.rebuild_pick_stats(db_name)
+    assert snapshot(db_name) == incremental
+
+
+def test_item_and_player_stats(db_name):
+    first, second, third = ITEMS[:3]
+    play_draft(db_name, 1, [1, 2], [first, second, third, ITEMS[3]])
+    play_draft(db_name, 1, [2, 3], [second, first], status='active')
+    play_draft(db_name, 2, [1, 2], [third])
+
+    stats = database.get_item_stats(db_name, 1)
+    assert (stats['drafts_with_picks'], stats['picks']) == (2, 6)
+    top = stats['items'][0]
+    assert (top['picks'], top['first_picks'], top['pick_number_sum']) == (2, 1, 3)
+    by_first = database.get_item_stats(db_name, 1, order='first_picks', limit=2)['items']
+    assert {item['item_name'] for item in by_first} == {first[1], second[1]}
+    earliest = database.get_item_stats(db_name, 1, order='average_pick', limit=1)['items'][0]
+    assert earliest['pick_number_sum'] / earliest['picks'] == 1.5
+    assert database.get_item_stats(db_name, 1, category_name='No such category')['items'] == []
+
+    player = database.get_player_stats(db_name, 1, 2)
+    assert (player['drafts_started'], player['drafts_completed'], player['picks'], player['first_picks']) == (2, 1, 3, 1)
+    assert player['favourite_items'][0]['picks'] == 2
+    assert database.get_player_stats(db_name, 1, 99) is None
+
+
+def test_existing_history_is_counted_on_upgrade(db_name):
+    play_draft(db_name, 1, [1, 2], ITEMS[:4])
+    before = snapshot(db_name)
+    conn = sqlite3.connect(db_name)
+    for table in STATS_TABLES:
+        conn.execute(f"DROP TABLE {table}")
+    conn.commit()
+    conn.close()
+    database.initialize_database(db_name)
+    assert snapshot(db_name) == before
+
+
+def test_stats_commands_only_read_counters():
+    async def scenario():
+        world = FakeDiscord(channels=1, rest_latency=0)
+        channel = next(iter(world.channels.values()))
+        with simulated_bot(world, random.Random(0)):
+            play_draft(bot.DATABASE_NAME, world.guild.id, [1, 2], ITEMS[:4])
+            for command, args in ((bot.itemstats_slash, ()), (bot.playerstats_slash, (world.users[1],))):
+                interaction = FakeInteraction(world, world.users[1], channel)
+                with tracing.trace(command.name) as current:
+                    await command.callback(interaction, *args)
+                assert interaction.response.is_done()
+                tables = {label.split()[1] for label in current.query_counts()}
+                assert tables <= set(STATS_TABLES), tables
+    asyncio.run(scenario())
+
+
+def test_picks_wait_for_a_rebuild():
+    async def scenario():
+        world = FakeDiscord(channels=1, rest_latency=0)
+        channel = next(iter(world.channels.values()))
+        with simulated_bot(world, random.Random(0)):
+            conn = sqlite3.connect(bot.DATABASE_NAME)
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            conn.close()
+
+            start = FakeInteraction(world, world.users[1], channel)
+            await bot.start_draft_slash.callback(start, world.users[1], world.users[2])
+            draft_id = _DRAFT_ID.search(start.original.content).group(1)
+            view = find_board(channel, draft_id).view
+            value = next(option.value for child in view.children for option in child.options)
+            pick = FakeInteraction(world, world.users[view.current_player_id], channel,
+                                   message=find_board(channel, draft_id), data={'values': [value]})
+            with patched(bot, rebuilding_pick_stats=True):
+                await dispatch_pick(view, pick)
+            assert pick.response.is_done()
+            state = database.get_draft_state(bot.DATABASE_NAME, draft_id)
+            assert state['current_pick_global_index'] == 0
+    asyncio.run(scenario())
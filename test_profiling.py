@@ -0,0 +1,61 @@
+import asyncio
+import time
+import tracemalloc
+
+import pytest
+
+import profiling
+
+
+def blocking_handler():
+    time.sleep(0.02)
+
+
+async def busy_bot(until: float, retained: list):
+    while time.perf_counter() < until:
+        blocking_handler()
+        retained.append(bytearray(10_000))
+        await asyncio.sleep(0.005)
+
+
+def profile_while_busy(mode: str, memory: bool = False) -> str:
+    async def scenario():
+        retained = []
+        bot = asyncio.create_task(busy_bot(time.perf_counter() + 0.5, retained))
+        report = await profiling.run_profile(mode, 0.4, memory)
+        await bot
+        return report
+    return asyncio.run(scenario())
+
+
+def test_sampling_finds_blocking_code_and_loop_lag():
+    report = profile_while_busy('sample')
+    assert report.startswith("sample profile, 0.4s")
+    busiest = report.split("Busiest lines")[1].split("\n\n")[0]
+    assert "blocking_handler" in busiest
+    max_lag_ms = float(report.split("max ")[1].split("ms")[0])
+    assert max_lag_ms >= 10
+    assert "busy_bot" in report.split("Tasks alive at the end")[1]
+    assert not profiling.is_running()
+
+
+def test_cpu_profile_with_memory_snapshots():
+    report = profile_while_busy('cpu', memory=True)
+    assert "blocking_handler" in report and "cumulative" in report
+    growth = report.split("Memory growth during the profile")[1].split("Largest allocations")[0]
+    assert "test_profiling.py" in growth
+    # Tracing is only left on if it was already on
+    assert not tracemalloc.is_tracing()
+
+
+def test_one_profile_at_a_time():
+    async def scenario():
+        first = asyncio.create_task(profiling.run_profile('sample', 0.2))
+        await asyncio.sleep(0.05)
+        assert profiling.is_running()
+        with pytest.raises(profiling.ProfilerBusy):
+            await profiling.run_profile('cpu', 0.1)
+        await first
+    asyncio.run(scenario())
+    with pytest.raises(ValueError):
+        asyncio.run(profiling.run_profile('wall', 1))
@@ -0,0 +1,131 @@
+import asyncio
+import random
+
+import pytest
+
+import bot
+import tracing
+from load_test import _DRAFT_ID, FakeDiscord, FakeInteraction, dispatch_pick, find_board, patched, simulated_bot
+
+# (SQL statements, Discord API calls) each command may make. These pin
+# today's counts for a three-player draft: lower them when a command gets
+# cheaper, and never raise them to make a test pass without a reason.
+# Keeping the pick statistics costs startdraft one upsert per player plus
+# one for the guild, each pick four upserts and the final pick one more.
+BUDGETS = {
+    'startdraft': (54, 4),
+    'pick': (36, 5),
+    'final_pick': (36, 7),
+    'draftboard': (17, 4),
+    'mydraft': (4, 1),
+    'draftstatus': (4, 1),
+    'listdrafts': (1, 2),
+    'recentdrafts': (1, 2),
+    'channeloverview': (1, 1),
+    'resetdraft': (5, 3),
+}
+
+
+def run_commands(commands):
+    """Start a three-player draft, then run commands(context) inside the simulated bot."""
+    async def scenario():
+        world = FakeDiscord(channels=1, rest_latency=0)
+        channel = next(iter(world.channels.values()))
+        with simulated_bot(world, random.Random(0)):
+            players = [world.users[user_id] for user_id in (1, 2, 3)]
+            start = FakeInteraction(world, players[0], channel)
+            with tracing.assert_max_queries(*BUDGETS['startdraft'], name='startdraft'):
+                await bot.start_draft_slash.callback(start, *players)
+            draft_id = _DRAFT_ID.search(start.original.content).group(1)
+            await commands(world, channel, players, draft_id)
+    asyncio.run(scenario())
+
+
+async def make_pick(world, channel, draft_id) -> bool:
+    board = find_board(channel, draft_id)
+    view = board.view
+    if not isinstance(view, bot.DraftPickView):
+        return False
+    value = next(option.value for child in view.children for option in child.options)
+    interaction = FakeInteraction(world, world.users[view.current_player_id], channel,
+                                  message=board, data={'values': [value]})
+    return await dispatch_pick(view, interaction)
+
+
+def test_every_pick_stays_within_budget():
+    async def commands(world, channel, players, draft_id):
+        picks = 0
+        while True:
+            final = bot.database.get_draft_state(bot.DATABASE_NAME, draft_id)
+            remaining = final['total_picks_to_make'] - final['current_pick_global_index']
+            if remaining == 0:
+                break
+            budget = 'final_pick' if remaining == 1 else 'pick'
+            with tracing.assert_max_queries(*BUDGETS[budget], name=budget):
+                assert await make_pick(world, channel, draft_id)
+            picks += 1
+        assert picks == 18
+    run_commands(commands)
+
+
+def test_repeated_final_pick_announces_completion_once():
+    async def commands(world, channel, players, draft_id):
+        builds = []
+
+        async def count_builds(channel, draft_id):
+            builds.append(draft_id)
+
+        with patched(bot, post_draft_datapacks=count_builds):
+            while find_board(channel, draft_id):
+                view = find_board(channel, draft_id).view
+                assert await make_pick(world, channel, draft_id)
+            state = bot.database.get_draft_state(bot.DATABASE_NAME, draft_id)
+            # A racing final pick that also saw the last pick made
+            await view._handle_post_pick(FakeInteraction(world, players[0], channel), state)
+            await asyncio.sleep(0)
+        announcements = [message for message in channel.messages.values()
+                         if message.content and "The draft is complete" in message.content]
+        assert len(announcements) == 1
+        assert builds == [draft_id]
+    run_commands(commands)
+
+
+def test_read_commands_stay_within_budget():
+    async def commands(world, channel, players, draft_id):
+        await make_pick(world, channel, draft_id)
+        for name in ('draftboard', 'mydraft', 'draftstatus'):
+            command = getattr(bot, f"{name}_slash")
+            with tracing.assert_max_queries(*BUDGETS[name], name=name):
+                await command.callback(FakeInteraction(world, players[0], channel), draft_id)
+        for name in ('listdrafts', 'recentdrafts', 'channeloverview'):
+            command = getattr(bot, f"{name}_slash")
+            with tracing.assert_max_queries(*BUDGETS[name], name=name):
+                await command.callback(FakeInteraction(world, players[0], channel))
+        with tracing.assert_max_queries(*BUDGETS['resetdraft'], name='resetdraft'):
+            await bot.resetdraft_slash.callback(FakeInteraction(world, players[0], channel), draft_id)
+    run_commands(commands)
+
+
+def test_budget_failure_names_the_queries():
+    async def commands(world, channel, players, draft_id):
+        with tracing.assert_max_queries(1, name='draftboard'):
+            await bot.draftboard_slash.callback(FakeInteraction(world, players[0], channel), draft_id)
+
+    with pytest.raises(AssertionError, match=r"draftboard: 17 queries, budget is 1\n\[trace\] draftboard .*SELECT drafts x3"):
+        run_commands(commands)
+
+
+def test_concurrent_interactions_are_attributed_separately():
+    async def commands(world, channel, players, draft_id):
+        async def traced(name, coro):
+            with tracing.trace(name) as current:
+                await asyncio.sleep(0)
+                await coro
+            return current
+
+        listed, status = await asyncio.gather(
+            traced('listdrafts', bot.listdrafts_slash.callback(FakeInteraction(world, players[0], channel))),
+            traced('mydraft', bot.mydraft_slash.callback(FakeInteraction(world, players[1], channel), draft_id)))
+        assert listed.query_counts() == {'SELECT drafts': 1}
+        assert len(status.queries) == BUDGETS['mydraft'][0]
+    run_commands(commands)
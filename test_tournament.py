@@ -0,0 +1,107 @@
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+
+import pytest
+
+import bot
+import database
+import utils
+from load_test import FakeDiscord, FakeInteraction, find_board, patched, simulated_bot
+
+
+def test_parse_player_groups():
+    assert bot.parse_player_groups("<@1> <@!2>; <@3> <@4> <@5>\n<@6><@7>") == [[1, 2], [3, 4, 5], [6, 7]]
+    assert bot.parse_player_groups(" <@1> <@2> ; ; ") == [[1, 2]]
+    for text in ("", "<@1>", "<@1> <@2> <@3> <@4> <@5>", "<@1> <@1>", "<@1> <@2>; <@2> <@3>"):
+        with pytest.raises(ValueError):
+            bot.parse_player_groups(text)
+
+
+def test_tournament_creates_every_draft_at_once():
+    groups = [[1, 2], [3, 4, 5], [6, 7, 8, 9], [10, 11], [12, 13, 14], [15, 16], [17, 18], [19, 20, 21]]
+
+    async def scenario():
+        world = FakeDiscord(channels=1, rest_latency=0.01)
+        channel = next(iter(world.channels.values()))
+        in_flight = max_in_flight = 0
+        rest_call = world.rest_call
+
+        async def counting_rest_call(route):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            try:
+                await rest_call(route)
+            finally:
+                in_flight -= 1
+
+        statements = []
+        with simulated_bot(world, random.Random(0)):
+            seed_fetches = []
+            random_seeds = utils.get_random_seeds
+
+            async def counting_seeds(count):
+                seed_fetches.append(count)
+                return await random_seeds(count)
+
+            text = "; ".join(" ".join(f"<@{user_id}>" for user_id in group) for group in groups)
+            interaction = FakeInteraction(world, world.users[1], channel)
+            database.add_query_listener(statements.append)
+            try:
+                with patched(world, rest_call=counting_rest_call), \
+                        patched(utils, get_random_seeds=counting_seeds):
+                    await bot.tournament_slash.callback(interaction, text, "Finals")
+            finally:
+                database.remove_query_listener(statements.append)
+
+            assert seed_fetches == [len(groups)]
+            # The tournament and all of its drafts are written in one transaction
+            statements = [" ".join(statement.split()) for statement in statements]
+            inserts = [s for s in statements if s.startswith(('INSERT INTO tournaments', 'INSERT INTO drafts '))]
+            assert len(inserts) == 1 + len(groups)
+            assert sum(s.startswith('BEGIN') for s in statements[:statements.index(inserts[-1])]) == 1
+            assert 1 < max_in_flight <= bot.TOURNAMENT_POST_CONCURRENCY
+
+            tournament_id = database.get_draft_state(
+                bot.DATABASE_NAME, database.get_active_drafts_in_channel(
+                    bot.DATABASE_NAME, channel.id)[0]['draft_id'])['tournament_id']
+            tournament = database.get_tournament(bot.DATABASE_NAME, tournament_id)
+            assert tournament['name'] == "Finals"
+            assert [draft['players'] for draft in tournament['drafts']] == [
+                [f"user{user_id}" for user_id in group] for group in groups]
+            for draft in tournament['drafts']:
+                assert draft['message_link']
+                assert isinstance(find_board(channel, draft['draft_id']).view, bot.DraftPickView)
+
+            status = FakeInteraction(world, world.users[1], channel)
+            await bot.tournamentstatus_slash.callback(status, tournament_id)
+            assert status.response.is_done()
+
+    asyncio.run(scenario())
+
+
+def test_initialize_adds_tournament_column_to_old_databases():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, 'old.db')
+        conn = sqlite3.connect(db_name)
+        # The drafts table as released before tournaments
+        conn.execute('''
+            CREATE TABLE drafts (
+                draft_id TEXT PRIMARY KEY, guild_id INTEGER NOT NULL, channel_id INTEGER NOT NULL,
+                admin_user_id INTEGER NOT NULL, status TEXT NOT NULL DEFAULT 'active',
+                num_players INTEGER NOT NULL, picks_allowed_per_player_per_category INTEGER NOT NULL,
+                total_picks_allotted_per_player INTEGER NOT NULL, current_pick_global_index INTEGER DEFAULT 0,
+                total_picks_to_make INTEGER NOT NULL, draft_order_player_indices_json TEXT NOT NULL,
+                board_message_id INTEGER, last_event_message TEXT, created_at_utc INTEGER NOT NULL,
+                message_link TEXT, seed TEXT
+            )
+        ''')
+        conn.close()
+        database.initialize_database(db_name)
+        conn = sqlite3.connect(db_name)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(drafts)")}
+        conn.close()
+        assert 'tournament_id' in columns
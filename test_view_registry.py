@@ -0,0 +1,82 @@
+import asyncio
+import random
+
+import discord
+
+import bot
+import metrics
+from load_test import _DRAFT_ID, FakeDiscord, FakeInteraction, dispatch_pick, find_board, simulated_bot
+from view_registry import ViewRegistry, approximate_size
+
+
+def make_view(options: int = 25) -> discord.ui.View:
+    view = discord.ui.View(timeout=None)
+    view.add_item(discord.ui.Select(options=[
+        discord.SelectOption(label=f"Item {n}", value=f"Category|Item {n}", description="x" * 80)
+        for n in range(options)]))
+    return view
+
+
+def test_one_live_view_per_draft():
+    async def scenario():
+        registry = ViewRegistry()
+        first, second, other = make_view(), make_view(), make_view()
+        assert registry.register('a', first) is None
+        registry.register('b', other)
+        assert registry.register('a', second) is first
+        assert first.is_finished() and not second.is_finished()
+        assert registry.get('a') is second and registry.superseded == 1
+
+        # Discarding someone else's view leaves the live one alone
+        registry.discard('a', first)
+        assert registry.get('a') is second
+        registry.discard('a')
+        assert second.is_finished() and registry.get('a') is None
+
+        # Views that stop on their own drop out of the counts
+        other.stop()
+        assert len(registry) == 0 and registry.stats()['approximate_bytes'] == 0
+    asyncio.run(scenario())
+
+
+def test_approximate_size_covers_components():
+    async def scenario():
+        registry = ViewRegistry()
+        registry.register('small', make_view(1))
+        small = registry.approximate_bytes()
+        registry.register('large', make_view(25))
+        assert registry.approximate_bytes() - small > 24 * approximate_size("x" * 80)
+    asyncio.run(scenario())
+
+
+def test_board_updates_stop_superseded_views():
+    async def scenario():
+        world = FakeDiscord(channels=1, rest_latency=0)
+        channel = next(iter(world.channels.values()))
+        with simulated_bot(world, random.Random(0)):
+            players = [world.users[1], world.users[2]]
+            start = FakeInteraction(world, players[0], channel)
+            await bot.start_draft_slash.callback(start, *players)
+            draft_id = _DRAFT_ID.search(start.original.content).group(1)
+
+            shown = [bot.live_views.get(draft_id)]
+            for _ in range(3):
+                await bot.draftboard_slash.callback(FakeInteraction(world, players[1], channel), draft_id)
+                shown.append(bot.live_views.get(draft_id))
+            assert len(set(map(id, shown))) == 4
+            assert all(view.is_finished() for view in shown[:-1])
+            assert find_board(channel, draft_id).view is shown[-1] and not shown[-1].is_finished()
+
+            gauges = metrics.registry.render()
+            assert 'draaft_live_views{view="DraftPickView"} 1' in gauges
+            assert 'draaft_live_view_bytes ' in gauges
+
+            board = find_board(channel, draft_id)
+            while isinstance(view := board.view, bot.DraftPickView):
+                value = next(option.value for child in view.children for option in child.options)
+                await dispatch_pick(view, FakeInteraction(world, world.users[view.current_player_id], channel,
+                                                          message=board, data={'values': [value]}))
+                assert view.is_finished()
+            assert board.view is None
+            assert bot.live_views.get(draft_id) is None
+    asyncio.run(scenario())
@@ -0,0 +1,183 @@
+"""Attribution of database queries and Discord API calls to interactions.
+
+Each traced slash command or view callback runs inside a Trace held in a
+context variable. Every SQL statement database.py executes, and every
+Discord REST call, is recorded on the trace of the interaction that caused
+it. That includes calls from tasks the interaction starts, since tasks copy
+the context they are created in. When the handler returns, a one-line
+summary is logged.
+
+Tracing is switched on with DRAAFT_TRACE=1. As with metrics, the choice is
+made when a handler is decorated, so while disabled traced() returns the
+function unchanged. assert_max_queries() traces a block regardless, for
+query budget tests.
+"""
+import contextvars
+import functools
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import database
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv('DRAAFT_TRACE', '').lower() in ('1', 'true', 'yes')
+
+# Transaction control is not counted as a query
+_NOT_QUERIES = ('BEGIN', 'COMMIT', 'ROLLBACK')
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE(?: IF NOT EXISTS)?)\s+(\w+)', re.IGNORECASE)
+
+_current: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('draaft_trace', default=None)
+# Traces open at once; the query listener is only installed while there are any
+_open_traces = 0
+
+
+class Trace:
+    """The queries and REST calls made on behalf of one interaction."""
+
+    def __init__(self, name: str, **context: Any):
+        self.name = name
+        self.context = context
+        self.queries: List[str] = []
+        self.rest_calls: List[str] = []
+        self.start = time.perf_counter()
+        self.elapsed: Optional[float] = None
+
+    def query_counts(self) -> Counter:
+        """Queries grouped by verb and table, e.g. 'SELECT drafts'."""
+        return Counter(statement_label(statement) for statement in self.queries)
+
+    def summary(self) -> str:
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.start
+        context = "".join(f" {key}={value}" for key, value in self.context.items())
+        return (f"[trace] {self.name}{context} {elapsed * 1000:.1f}ms: "
+                f"{len(self.queries)} queries ({_format_counts(self.query_counts())}), "
+                f"{len(self.rest_calls)} Discord calls ({_format_counts(Counter(self.rest_calls))})")
+
+
+def statement_label(statement: str) -> str:
+    words = statement.split(None, 1)
+    if not words:
+        return "?"
+    match = _TABLE.search(statement)
+    return f"{words[0].upper()} {match.group(1)}" if match else words[0].upper()
+
+
+def _format_counts(counts: Counter) -> str:
+    return ", ".join(f"{label} x{count}" if count > 1 else label
+                     for label, count in counts.most_common())
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def _record_query(statement: str):
+    trace = _current.get()
+    if trace is not None and not statement.lstrip().upper().startswith(_NOT_QUERIES):
+        trace.queries.append(statement)
+
+
+def record_rest_call(route: str):
+    """Attribute a Discord API call, labelled by method and route, to the current trace."""
+    trace = _current.get()
+    if trace is not None:
+        trace.rest_calls.append(route)
+
+
+@contextmanager
+def trace(name: str, **context: Any) -> Iterator[Trace]:
+    """Trace the block. Inside an existing trace, the outer trace is used."""
+    global _open_traces
+    existing = _current.get()
+    if existing is not None:
+        yield existing
+        return
+
+    current = Trace(name, **context)
+    token = _current.set(current)
+    if _open_traces == 0:
+        database.add_query_listener(_record_query)
+    _open_traces += 1
+    try:
+        yield current
+    finally:
+        current.elapsed = time.perf_counter() - current.start
+        _open_traces -= 1
+        if _open_traces == 0:
+            database.remove_query_listener(_record_query)
+        _current.reset(token)
+
+
+def _interaction_context(args: tuple) -> Dict[str, Any]:
+    context = {}
+    interaction = next((arg for arg in args if hasattr(arg, 'response') and hasattr(arg, 'user')), None)
+    if interaction is not None:
+        context['user'] = interaction.user.id
+        context['channel'] = interaction.channel_id
+    draft_id = getattr(args[0], 'draft_id', None) if args else None
+    if draft_id:
+        context['draft'] = draft_id
+    return context
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Trace every call to the decorated coroutine function and log its summary."""
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            outermost = _current.get() is None
+            with trace(label, **_interaction_context(args)) as current:
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    if outermost:
+                        current.elapsed = time.perf_counter() - current.start
+                        logger.info(current.summary())
+        return wrapper
+
+    return decorator
+
+
+def instrument_http(http_client: Any):
+    """Attribute every Discord REST call made through a discord.py HTTPClient."""
+    if not ENABLED or getattr(http_client, '_draaft_traced', False):
+        return
+    request = http_client.request
+
+    @functools.wraps(request)
+    async def traced_request(route, *args, **kwargs):
+        record_rest_call(f"{route.method} {route.path}")
+        return await request(route, *args, **kwargs)
+
+    http_client.request = traced_request
+    http_client._draaft_traced = True
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, max_rest_calls: Optional[int] = None,
+                       name: str = "budget") -> Iterator[Trace]:
+    """Fail if the block runs more than max_queries SQL statements (or REST calls).
+
+    Used by tests to pin each command's query count, so an N+1 regression
+    fails instead of quietly slowing the bot down.
+    """
+    with trace(name) as current:
+        queries_before, rest_calls_before = len(current.queries), len(current.rest_calls)
+        yield current
+    queries = len(current.queries) - queries_before
+    rest_calls = len(current.rest_calls) - rest_calls_before
+    if queries > max_queries:
+        raise AssertionError(f"{name}: {queries} queries, budget is {max_queries}\n{current.summary()}")
+    if max_rest_calls is not None and rest_calls > max_rest_calls:
+        raise AssertionError(
+            f"{name}: {rest_calls} Discord calls, budget is {max_rest_calls}\n{current.summary()}")
@@ -1,11 +1,18 @@
-import discord
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
 from datetime import datetime
-import aiohttp
 import random
 import asyncio
+import logging
 from functools import lru_cache
-from items import all_items
+from items import get_draft_item_by_name
+from embed_layout import Section
+
+logger = logging.getLogger(__name__)
+
+# discord and aiohttp are imported where they are used so that importing the
+# formatting helpers does not pull the whole client stack in with them.
+if TYPE_CHECKING:
+    import discord
 
 # Cache for storing the seed list
 _seed_list_cache = None
@@ -24,6 +31,8 @@ async def fetch_seed_list() -> List[str]:
         if current_time - _last_fetch_time < _CACHE_DURATION:
             return _seed_list_cache
 
+    import aiohttp
+
     # Fetch new list if cache is invalid
     async with aiohttp.ClientSession() as session:
         async with session.get('https://disrespec.tech/assets/seedlist.txt') as response:
@@ -44,22 +53,41 @@ async def get_random_seed() -> Optional[str]:
         seed_list = await fetch_seed_list()
         return random.choice(seed_list)
     except Exception as e:
-        print(f"Error getting random seed: {e}")
+        logger.warning("Error getting random seed: %s", e)
         return None
 
 
-def create_draft_embed(title: str, description: str, color: discord.Color = discord.Color.blue()) -> discord.Embed:
+async def get_random_seeds(count: int) -> List[Optional[str]]:
+    """Get count random seeds from a single fetch of the seed list, distinct while it lasts."""
+    try:
+        seed_list = await fetch_seed_list()
+    except Exception as e:
+        logger.warning("Error getting random seeds: %s", e)
+        return [None] * count
+    if not seed_list:
+        return [None] * count
+    if count <= len(seed_list):
+        return random.sample(seed_list, count)
+    return random.choices(seed_list, k=count)
+
+
+def create_draft_embed(title: str, description: str, color: Optional['discord.Color'] = None) -> 'discord.Embed':
     """Create a standardized embed for draft-related messages."""
+    import discord
+
+    if color is None:
+        color = discord.Color.blue()
     embed = discord.Embed(title=title, description=description, color=color)
     # embed.set_thumbnail()
     return embed
 
 
-def format_draft_status(draft_state: Dict[str, Any], guild: discord.Guild) -> tuple[str, str]:
+def format_draft_status(draft_state: Dict[str, Any], guild: 'discord.Guild') -> tuple[str, str]:
     """Format the draft status for display in an embed."""
     draft_id = draft_state['draft_id']
 
-    if draft_state['status'] != 'active':
+    # The last pick is on the board before the draft is marked completed
+    if draft_state['status'] != 'active' or draft_state['current_pick_global_index'] >= draft_state['total_picks_to_make']:
         description = f"🎉 Draft ID: {draft_id} - Status: {draft_state['status'].capitalize()}! 🎉"
         if draft_state.get('drafted_items_by_player'):
             description += f" View final picks with `/draftstatus draft_id={draft_id}`."
@@ -98,33 +126,39 @@ def format_draft_status(draft_state: Dict[str, Any], guild: discord.Guild) -> tu
     return title, description
 
 
-def format_category_field(category_name: str, master_list: List[str], available_items: List[str]) -> tuple[str, str]:
-    """Format a category field for the draft board."""
-    available_count = len(available_items)
+def format_category_section(category_name: str, master_list: List[str], available_items: List[str]) -> Section:
+    """Format a category section for the draft board."""
+    available = set(available_items)
     display_items = []
 
     for item_name in master_list:
-        # Get the DraftItem object for this item
-        draft_item = next(
-            (item for item in all_items if item.pretty_name == item_name), None)
+        draft_item = get_draft_item_by_name(item_name)
         if draft_item:
-            if item_name in available_items:
+            if item_name in available:
                 display_items.append(
                     f"**{item_name}** - {draft_item.description}")
             else:
                 display_items.append(
                     f"~~**{item_name}** - {draft_item.description}~~")
         else:
-            if item_name in available_items:
+            if item_name in available:
                 display_items.append(item_name)
             else:
                 display_items.append(f"~~{item_name}~~")
 
-    value = "\n".join(display_items) if display_items else "No items defined."
-    if len(value) > 1020:
-        value = value[:1020] + "..."
+    return Section(f"🎁 {category_name} ({len(available_items)} available)",
+                   display_items, empty_text="No items defined.")
+
+
+def format_pick_history_sections(draft_state: Dict[str, Any], recent_picks: List[Dict[str, Any]]) -> List[Section]:
+    """Group picks by player, in draft order, for the pick history embed."""
+    picks_by_player: Dict[int, List[str]] = {}
+    for pick in recent_picks:
+        picks_by_player.setdefault(pick['player_id'], []).append(
+            f"**{pick['item_name']}** from {pick['category_name']}")
 
-    return f"🎁 {category_name} ({available_count} available)", value
+    return [Section(f"🎯 {player_name}'s Picks", picks_by_player[player_id])
+            for player_id, player_name in draft_state['players'] if player_id in picks_by_player]
 
 
 def format_pick_order(draft_state: Dict[str, Any], current_index: int) -> str:
@@ -168,8 +202,7 @@ def get_player_draft_summary(draft_state: Dict[str, Any], player_id: int) -> tup
             # Get descriptions for each item
             item_descriptions = []
             for item_name in items_in_category:
-                draft_item = next(
-                    (item for item in all_items if item.pretty_name == item_name), None)
+                draft_item = get_draft_item_by_name(item_name)
                 if draft_item:
                     item_descriptions.append(
                         f"**{item_name}** - {draft_item.description}")
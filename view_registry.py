@@ -0,0 +1,99 @@
+"""Keeps exactly one live view per draft.
+
+Every board update attaches a fresh DraftPickView or MinecraftUsernameView.
+Left alone, the one it replaces stays in discord.py's view store, with its
+components, options and timeout task, until VIEW_TIMEOUT_SECONDS pass, and
+then fires its own on_timeout for a turn that is long over. Registering
+the new view stops the old one straight away.
+"""
+import sys
+from collections import Counter
+from typing import Any, Dict, Optional, Set
+
+import discord
+
+# Only these are walked when sizing a view, so the estimate covers the view
+# and its components without wandering into the loop, the bot or modules
+_OWNED_TYPES = (discord.ui.View, discord.ui.Modal, discord.ui.Item, discord.SelectOption,
+                discord.components.Component, discord.PartialEmoji)
+
+
+class ViewRegistry:
+    def __init__(self):
+        self._views: Dict[str, discord.ui.View] = {}
+        # Views stopped because a newer one replaced them, since start-up
+        self.superseded = 0
+
+    def register(self, draft_id: str, view: discord.ui.View) -> Optional[discord.ui.View]:
+        """Make view the draft's live view; returns the view it superseded, now stopped."""
+        previous = self._views.get(draft_id)
+        self._views[draft_id] = view
+        if previous is None or previous is view:
+            return None
+        if not previous.is_finished():
+            previous.stop()
+            self.superseded += 1
+        return previous
+
+    def discard(self, draft_id: str, view: Optional[discord.ui.View] = None):
+        """Stop and forget the draft's live view, if it is view (or any view when None)."""
+        current = self._views.get(draft_id)
+        if current is None or (view is not None and current is not view):
+            return
+        del self._views[draft_id]
+        if not current.is_finished():
+            current.stop()
+
+    def get(self, draft_id: str) -> Optional[discord.ui.View]:
+        self._prune()
+        return self._views.get(draft_id)
+
+    def __len__(self) -> int:
+        self._prune()
+        return len(self._views)
+
+    def _prune(self):
+        """Forget views that timed out or were stopped elsewhere."""
+        for draft_id in [draft_id for draft_id, view in self._views.items() if view.is_finished()]:
+            del self._views[draft_id]
+
+    def counts(self) -> Counter:
+        """Live views by class name."""
+        self._prune()
+        return Counter(type(view).__name__ for view in self._views.values())
+
+    def approximate_bytes(self) -> int:
+        self._prune()
+        seen: Set[int] = set()
+        return sum(approximate_size(view, seen) for view in self._views.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'live': len(self),
+            'by_type': dict(self.counts()),
+            'superseded': self.superseded,
+            'approximate_bytes': self.approximate_bytes(),
+        }
+
+
+def approximate_size(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """sys.getsizeof of obj plus everything it owns, counting shared objects once."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(key, seen) + approximate_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, seen) for item in obj)
+    elif isinstance(obj, _OWNED_TYPES):
+        if hasattr(obj, '__dict__'):
+            size += approximate_size(vars(obj), seen)
+        for cls in type(obj).__mro__:
+            slots = getattr(cls, '__slots__', ())
+            for slot in (slots,) if isinstance(slots, str) else slots:
+                if hasattr(obj, slot):
+                    size += approximate_size(getattr(obj, slot), seen)
+    return size